@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumno', '0002_alter_alumno_carrera_alter_alumno_legajo'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='alumno',
+            name='legajo',
+            field=models.CharField(help_text='Identificador único del alumno', max_length=20, unique=True, verbose_name='Legajo'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:04
+
+from django.db import migrations, models
+
+from gestion_academica.texto import normalizar
+
+
+def normalizar_campos(apps, schema_editor):
+    Alumno = apps.get_model('alumno', 'Alumno')
+    campos = ('legajo',)
+    objetos = list(Alumno.objects.only(*campos))
+    for objeto in objetos:
+        for campo in campos:
+            setattr(objeto, f'{campo}_normalizado', normalizar(getattr(objeto, campo)))
+    Alumno.objects.bulk_update(objetos, [f'{campo}_normalizado' for campo in campos], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumno', '0003_alter_alumno_legajo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='alumno',
+            name='legajo_normalizado',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=20),
+        ),
+        migrations.RunPython(normalizar_campos, migrations.RunPython.noop),
+    ]
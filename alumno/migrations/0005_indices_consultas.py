@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumno', '0004_legajo_normalizado'),
+        ('carrera', '0002_campos_normalizados'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='alumno',
+            index=models.Index(fields=['carrera', 'activo'], name='alumno_carrera_activo_idx'),
+        ),
+    ]
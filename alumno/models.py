@@ -3,11 +3,12 @@ from django.core.exceptions import ValidationError
 from django.utils import timezone
 from usuario.models import Usuario
 from carrera.models import Carrera
+from gestion_academica.texto import CamposNormalizadosMixin
 import re
 
 
 # Create your models here.
-class Alumno(models.Model):
+class Alumno(CamposNormalizadosMixin, models.Model):
     """
     Modelo para gestionar la información académica de los alumnos.
     Extiende el modelo Usuario con datos específicos del alumno.
@@ -60,10 +61,17 @@ class Alumno(models.Model):
         verbose_name='Observaciones'
     )
 
+    # Copia en minúsculas y sin acentos para la búsqueda
+    legajo_normalizado = models.CharField(max_length=20, default='', editable=False, db_index=True)
+    campos_normalizados = ('legajo',)
+
     class Meta:
         verbose_name = 'Alumno'
         verbose_name_plural = 'Alumnos'
         ordering = ['legajo']
+        indexes = [
+            models.Index(fields=['carrera', 'activo'], name='alumno_carrera_activo_idx'),
+        ]
 
     def __str__(self):
         return f"{self.legajo} - {self.nombre_completo}"
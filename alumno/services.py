@@ -8,6 +8,7 @@ from .models import Alumno
 from usuario.models import Usuario
 from carrera.models import Carrera
 from django.contrib.auth.models import Group
+from gestion_academica.busqueda import BusquedaService
 
 
 class AlumnoService:
@@ -79,6 +80,23 @@ class AlumnoService:
             activo=True
         ).select_related('usuario', 'carrera')
     
+    @staticmethod
+    def obtener_ids_cohorte(carrera_id, anio_ingreso=None, legajos=None):
+        """
+        Obtiene los IDs de los alumnos activos de una cohorte, ordenados por legajo.
+
+        Args:
+            carrera_id: carrera de la cohorte
+            anio_ingreso: año de ingreso (opcional)
+            legajos: lista de legajos para acotar la cohorte (opcional)
+        """
+        queryset = Alumno.objects.filter(carrera_id=carrera_id, activo=True)
+        if anio_ingreso:
+            queryset = queryset.filter(fecha_ingreso__year=anio_ingreso)
+        if legajos:
+            queryset = queryset.filter(legajo__in=[l.upper() for l in legajos])
+        return list(queryset.order_by('legajo').values_list('id', flat=True))
+    
     @staticmethod
     def obtener_alumno_por_dni(dni):
         """
@@ -186,11 +204,7 @@ class AlumnoService:
         Busca alumnos por nombre, apellido, DNI, legajo o email.
         """
         return Alumno.objects.filter(
-            Q(usuario__first_name__icontains=termino) |
-            Q(usuario__last_name__icontains=termino) |
-            Q(usuario__username__icontains=termino) |
-            Q(legajo__icontains=termino) |
-            Q(usuario__email__icontains=termino)
+            BusquedaService.filtro(termino, usuario='usuario', pk='alumno')
         ).select_related('usuario', 'carrera')
     
     @staticmethod
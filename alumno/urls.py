@@ -3,6 +3,7 @@ from . import views
 
 urlpatterns = [
     path('', views.AlumnoListView.as_view(), name='alumno_list'),
+    path('exportar/', views.AlumnoExportView.as_view(), name='alumno_exportar'),
     path('crear/', views.AlumnoCreateView.as_view(), name='alumno_create'),
     path('<int:pk>/', views.AlumnoDetailView.as_view(), name='alumno_detail'),
     path('<int:pk>/editar/', views.AlumnoUpdateView.as_view(), name='alumno_update'),
@@ -8,6 +8,10 @@ from .models import Alumno
 from .forms import AlumnoForm
 from .services import AlumnoService
 from carrera.models import Carrera
+from usuario.services import AutorizacionService
+from gestion_academica.exportar import ExportarCSVMixin
+from gestion_academica.paginacion import KeysetPaginacionMixin
+from gestion_academica.services import EstadisticasService
 
 
 # Create your views here.
@@ -16,17 +20,14 @@ class AdminRequiredMixin(UserPassesTestMixin):
     Mixin para verificar que el usuario sea administrador.
     """
     def test_func(self):
-        return self.request.user.is_authenticated and (
-            self.request.user.is_superuser or 
-            self.request.user.groups.filter(name='Administradores').exists()
-        )
+        return self.request.user.is_authenticated and AutorizacionService.es_admin(self.request.user)
     
     def handle_no_permission(self):
         messages.error(self.request, 'No tienes permisos para acceder a esta sección.')
         return redirect('admin:index')
 
 
-class AlumnoListView(LoginRequiredMixin, AdminRequiredMixin, ListView):
+class AlumnoListView(LoginRequiredMixin, AdminRequiredMixin, KeysetPaginacionMixin, ListView):
     """
     Vista para listar todos los alumnos con filtros.
     """
@@ -34,6 +35,8 @@ class AlumnoListView(LoginRequiredMixin, AdminRequiredMixin, ListView):
     template_name = 'gestion_academica/alumnos/list.html'
     context_object_name = 'alumnos'
     paginate_by = 20
+    # El legajo es único, alcanza para un orden estable
+    orden_keyset = ('legajo',)
     
     def get_queryset(self):
         queryset = Alumno.objects.select_related('usuario', 'carrera').all()
@@ -64,16 +67,34 @@ class AlumnoListView(LoginRequiredMixin, AdminRequiredMixin, ListView):
         context['carrera_seleccionada'] = self.request.GET.get('carrera', '')
         context['estado_seleccionado'] = self.request.GET.get('estado', '')
         
-        # Contadores para las tarjetas
-        context['total_alumnos_count'] = Alumno.objects.count()
-        context['alumnos_activos_count'] = Alumno.objects.filter(activo=True).count()
-        
-        # Detectar alumnos sin carrera asignada
-        context['alumnos_sin_carrera'] = Alumno.objects.filter(carrera__isnull=True).count()
+        # Contadores para las tarjetas, en una sola consulta
+        context.update(EstadisticasService.contar(Alumno, {
+            'total_alumnos_count': None,
+            'alumnos_activos_count': Q(activo=True),
+            # Detectar alumnos sin carrera asignada
+            'alumnos_sin_carrera': Q(carrera__isnull=True),
+        }))
         
         return context
 
 
+class AlumnoExportView(ExportarCSVMixin, AlumnoListView):
+    """
+    Exporta a CSV los alumnos con los filtros del listado.
+    """
+    nombre_archivo = 'alumnos.csv'
+    columnas = (
+        ('Legajo', 'legajo'),
+        ('Apellido', 'usuario__last_name'),
+        ('Nombre', 'usuario__first_name'),
+        ('DNI', 'usuario__username'),
+        ('Email', 'usuario__email'),
+        ('Carrera', 'carrera__nombre'),
+        ('Fecha de Ingreso', 'fecha_ingreso'),
+        ('Activo', 'activo'),
+    )
+
+
 class AlumnoDetailView(LoginRequiredMixin, AdminRequiredMixin, DetailView):
     """
     Vista para ver el detalle completo de un alumno.
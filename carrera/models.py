@@ -3,7 +3,10 @@ from django.db import models
 from django.core.validators import RegexValidator, MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
 
-class Carrera(models.Model):
+from gestion_academica.texto import CamposNormalizadosMixin
+
+
+class Carrera(CamposNormalizadosMixin, models.Model):
     """
     Modelo para las carreras académicas
     """
@@ -22,6 +25,11 @@ class Carrera(models.Model):
     activa = models.BooleanField(default=True, verbose_name='Activa')
     fecha_creacion = models.DateTimeField(auto_now_add=True)
 
+    # Copias en minúsculas y sin acentos para la búsqueda
+    nombre_normalizado = models.CharField(max_length=200, default='', editable=False, db_index=True)
+    codigo_normalizado = models.CharField(max_length=10, default='', editable=False, db_index=True)
+    campos_normalizados = ('nombre', 'codigo')
+
     class Meta:
         verbose_name = 'Carrera'
         verbose_name_plural = 'Carreras'
@@ -6,6 +6,8 @@ from django.views.generic import (
 )
 from django.core.exceptions import ValidationError
 
+from gestion_academica.busqueda import BusquedaService
+from gestion_academica.services import EstadisticasService
 from usuario.views import AdminRequiredMixin
 
 from .models import Carrera
@@ -33,11 +35,7 @@ class CarreraListView(AdminRequiredMixin, ListView):
         
         search = self.request.GET.get('search')
         if search:
-            from django.db.models import Q
-            queryset = queryset.filter(
-                Q(nombre__icontains=search) | 
-                Q(codigo__icontains=search)
-            )
+            queryset = queryset.filter(BusquedaService.filtro(search, pk='carrera'))
         return queryset.order_by('nombre')
 
     def get_context_data(self, **kwargs):
@@ -45,12 +43,15 @@ class CarreraListView(AdminRequiredMixin, ListView):
         context['search'] = self.request.GET.get('search', '')
         context['estado_seleccionado'] = self.request.GET.get('estado', '')
         # Stats
-        context['total_carreras'] = Carrera.objects.count()
-        context['carreras_activas'] = Carrera.objects.filter(activa=True).count()
-        context['carreras_inactivas'] = Carrera.objects.filter(activa=False).count()
+        from django.db.models import Avg, Q
+        stats = EstadisticasService.contar(Carrera, {
+            'total_carreras': None,
+            'carreras_activas': Q(activa=True),
+            'carreras_inactivas': Q(activa=False),
+        }, promedio_duracion=Avg('duracion_anios'))
         # Calculate average duration
-        from django.db.models import Avg
-        avg = Carrera.objects.aggregate(Avg('duracion_anios'))['duracion_anios__avg']
+        avg = stats.pop('promedio_duracion')
+        context.update(stats)
         context['promedio_duracion'] = round(avg, 1) if avg else 0
         return context
 
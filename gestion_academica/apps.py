@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class GestionAcademicaConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'gestion_academica'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,172 @@
+"""
+Índice de búsqueda por subcadenas sobre SQLite FTS5.
+
+Cada modelo indexado tiene su tabla virtual busqueda_<nombre>, con el pk
+del objeto como rowid y una columna por campo normalizado (minúsculas y
+sin acentos, ver gestion_academica.texto), usando el tokenizer trigram: un
+MATCH con la frase buscada, normalizada igual, equivale a un icontains
+sobre cada columna pero resuelto con el índice en lugar de un LIKE por fila.
+
+Las señales de gestion_academica.signals mantienen las tablas al día y el
+comando reconstruir_busqueda las vuelve a generar. En otras bases de datos,
+si la tabla no existe o para términos cortos se busca por prefijo sobre las
+columnas normalizadas, que tienen índice.
+"""
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from alumno.models import Alumno
+from carrera.models import Carrera
+from materia.models import Materia
+from usuario.models import Usuario
+
+from .texto import normalizar
+
+
+class BusquedaService:
+    """
+    Servicio para consultar y mantener el índice de búsqueda
+    """
+    # nombre del índice -> (modelo, campos indexados)
+    INDICES = {
+        'carrera': (Carrera, ('nombre_normalizado', 'codigo_normalizado')),
+        'materia': (Materia, ('nombre_normalizado', 'codigo_normalizado')),
+        'usuario': (Usuario, ('first_name_normalizado', 'last_name_normalizado', 'username', 'email_normalizado')),
+        'alumno': (Alumno, ('legajo_normalizado',)),
+    }
+    # El tokenizer trigram no encuentra términos de menos de 3 caracteres
+    LARGO_MINIMO = 3
+
+    _disponible = {}
+
+    @staticmethod
+    def tabla(nombre):
+        return f'busqueda_{nombre}'
+
+    @staticmethod
+    def disponible():
+        """Indica si la base de datos actual tiene el índice FTS5 creado"""
+        clave = (connection.alias, connection.settings_dict['NAME'])
+        if clave not in BusquedaService._disponible:
+            BusquedaService._disponible[clave] = (
+                connection.vendor == 'sqlite'
+                and BusquedaService.tabla('usuario') in connection.introspection.table_names()
+            )
+        return BusquedaService._disponible[clave]
+
+    @staticmethod
+    def filtro(termino, **rutas):
+        """
+        Retorna un Q que busca el término en los índices indicados.
+
+        rutas: prefijo de lookup -> nombre del índice, por ejemplo
+        filtro(termino, pk='materia') o
+        filtro(termino, alumno__usuario='usuario', materia='materia')
+        """
+        termino = normalizar(termino.strip())
+        usar_indice = len(termino) >= BusquedaService.LARGO_MINIMO and BusquedaService.disponible()
+
+        condicion = Q()
+        for prefijo, nombre in rutas.items():
+            _, campos = BusquedaService.INDICES[nombre]
+            if usar_indice:
+                tabla = BusquedaService.tabla(nombre)
+                frase = '"' + termino.replace('"', '""') + '"'
+                condicion |= Q(**{f'{prefijo}__in': RawSQL(
+                    f'SELECT rowid FROM {tabla} WHERE {tabla} MATCH %s', (frase,)
+                )})
+            else:
+                # Rango en lugar de startswith: el LIKE con ESCAPE no usa el índice en SQLite
+                base = '' if prefijo == 'pk' else f'{prefijo}__'
+                for campo in campos:
+                    condicion |= Q(**{f'{base}{campo}__gte': termino, f'{base}{campo}__lt': termino + '\U0010ffff'})
+        return condicion
+
+    @staticmethod
+    def coincidencias(termino, nombre):
+        """
+        Subconsulta con los pk del modelo del índice que coinciden con el
+        término, para filtrar por una columna propia (materia__in=...) en
+        lugar de un OR sobre tablas unidas, que SQLite no resuelve con índices
+        """
+        modelo, _ = BusquedaService.INDICES[nombre]
+        return modelo._default_manager.filter(BusquedaService.filtro(termino, pk=nombre)).values('pk')
+
+    @staticmethod
+    def nombre_indice(modelo):
+        for nombre, (modelo_indice, _) in BusquedaService.INDICES.items():
+            if modelo_indice is modelo:
+                return nombre
+        return None
+
+    @staticmethod
+    def indexar(objeto):
+        """Agrega o reemplaza la fila del objeto en su índice"""
+        nombre = BusquedaService.nombre_indice(type(objeto))
+        if nombre is None or not BusquedaService.disponible():
+            return
+        _, campos = BusquedaService.INDICES[nombre]
+        tabla = BusquedaService.tabla(nombre)
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {tabla} WHERE rowid = %s', [objeto.pk])
+            cursor.execute(
+                f'INSERT INTO {tabla} (rowid, {", ".join(campos)}) VALUES (%s{", %s" * len(campos)})',
+                [objeto.pk, *(getattr(objeto, campo) or '' for campo in campos)],
+            )
+
+    @staticmethod
+    def desindexar(modelo, pk):
+        nombre = BusquedaService.nombre_indice(modelo)
+        if nombre is None or not BusquedaService.disponible():
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {BusquedaService.tabla(nombre)} WHERE rowid = %s', [pk])
+
+    @staticmethod
+    def normalizar_campos(modelo, tamanio_lote=1000):
+        """
+        Recalcula las columnas *_normalizado del modelo, para las filas
+        escritas sin pasar por save() (bulk_create, update(), SQL directo)
+        """
+        campos = modelo.campos_normalizados
+        queryset = modelo.objects.only('pk', *campos).order_by('pk')
+        lote = []
+        for objeto in queryset.iterator(chunk_size=tamanio_lote):
+            for campo in campos:
+                setattr(objeto, f'{campo}_normalizado', normalizar(getattr(objeto, campo)))
+            lote.append(objeto)
+            if len(lote) == tamanio_lote:
+                modelo.objects.bulk_update(lote, [f'{campo}_normalizado' for campo in campos])
+                lote = []
+        if lote:
+            modelo.objects.bulk_update(lote, [f'{campo}_normalizado' for campo in campos])
+
+    @staticmethod
+    def reconstruir(nombres=None):
+        """
+        Recalcula las columnas normalizadas de los índices indicados (por
+        defecto todos) y, si hay FTS5, vuelve a generar sus tablas.
+        Retorna las filas procesadas por índice.
+        """
+        resultado = {}
+        with transaction.atomic(), connection.cursor() as cursor:
+            for nombre in nombres or BusquedaService.INDICES:
+                modelo, campos = BusquedaService.INDICES[nombre]
+                BusquedaService.normalizar_campos(modelo)
+                if not BusquedaService.disponible():
+                    resultado[nombre] = modelo.objects.count()
+                    continue
+                tabla = BusquedaService.tabla(nombre)
+                columnas = ', '.join(
+                    f'COALESCE({connection.ops.quote_name(modelo._meta.get_field(campo).column)}, \'\')'
+                    for campo in campos
+                )
+                cursor.execute(f'DELETE FROM {tabla}')
+                cursor.execute(
+                    f'INSERT INTO {tabla} (rowid, {", ".join(campos)}) '
+                    f'SELECT {connection.ops.quote_name(modelo._meta.pk.column)}, {columnas} '
+                    f'FROM {connection.ops.quote_name(modelo._meta.db_table)}'
+                )
+                resultado[nombre] = cursor.rowcount
+        return resultado
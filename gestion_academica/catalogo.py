@@ -0,0 +1,86 @@
+"""
+GET condicional y cache del catálogo en las páginas públicas.
+"""
+import hashlib
+
+from django.contrib import messages
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.utils.safestring import mark_safe
+
+from usuario.models import Usuario
+
+from .services import EstadisticasService
+
+
+class CatalogoPublicoMixin:
+    """
+    Mixin para las vistas públicas del catálogo.
+
+    La versión del contenido sale de las versiones guardadas de los modelos
+    que muestra la página (ver EstadisticasService), así que:
+    - si el navegador ya tiene esa versión se responde 304 Not Modified;
+    - el HTML del catálogo se guarda en cache por versión y filtros, y la
+      página sólo renderiza a su alrededor la navegación del usuario.
+
+    modelos_catalogo: modelos cuyo cambio altera el contenido
+    parametros_catalogo: parámetros GET que cambian el contenido
+    fragmento_template_name: template del catálogo (sin base.html)
+    """
+    modelos_catalogo = ()
+    parametros_catalogo = ()
+    fragmento_template_name = None
+    TIMEOUT_FRAGMENTO = 60 * 10
+
+    def get_filtros_catalogo(self):
+        return [(parametro, self.request.GET.get(parametro, '')) for parametro in self.parametros_catalogo]
+
+    def get_version_catalogo(self):
+        return EstadisticasService.versiones(*self.modelos_catalogo)
+
+    def get_etag(self):
+        # La navegación depende del usuario, por eso entra en el ETag
+        usuario = self.request.user
+        firma = [self.version_catalogo, self.get_filtros_catalogo(), usuario.pk]
+        if usuario.is_authenticated:
+            firma.append(EstadisticasService.versiones(Usuario))
+        return quote_etag(hashlib.md5(repr(firma).encode()).hexdigest())
+
+    def get(self, request, *args, **kwargs):
+        self.version_catalogo = self.get_version_catalogo()
+        etag = self.get_etag()
+        modificado = EstadisticasService.modificado(*self.modelos_catalogo)
+        last_modified = int(modificado.timestamp()) if modificado else None
+
+        # Con mensajes pendientes la página cambia aunque el catálogo no
+        if not len(messages.get_messages(request)):
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is not None:
+                return response
+
+        response = self.response_class(
+            request=request,
+            template=[self.template_name],
+            context={
+                'view': self,
+                'fragmento_catalogo': mark_safe(self.get_fragmento_catalogo(*args, **kwargs)),
+            },
+        )
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def get_fragmento_catalogo(self, *args, **kwargs):
+        firma = repr([self.version_catalogo, self.get_filtros_catalogo()])
+        clave = f'catalogo:{self.fragmento_template_name}:{hashlib.md5(firma.encode()).hexdigest()}'
+        fragmento = cache.get(clave)
+        if fragmento is None:
+            # La vista arma su contexto completo sólo cuando no hay cache
+            context = super().get(self.request, *args, **kwargs).context_data
+            fragmento = render_to_string(self.fragmento_template_name, context, self.request)
+            cache.set(clave, fragmento, self.TIMEOUT_FRAGMENTO)
+        return fragmento
@@ -0,0 +1,68 @@
+"""
+Exportación de listados a CSV en streaming.
+"""
+import csv
+from datetime import date, datetime
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+
+class _Eco:
+    """Buffer de escritura que devuelve la línea en lugar de guardarla"""
+
+    def write(self, valor):
+        return valor
+
+
+# Caracteres con los que Excel/LibreOffice interpretan la celda como fórmula
+INICIOS_FORMULA = ('=', '+', '-', '@', '\t', '\r')
+
+
+class ExportarCSVMixin:
+    """
+    Mixin para ListView que responde el queryset filtrado de la vista como
+    CSV. Las filas se leen con values_list() e iterator(), por lo que la
+    memoria usada no depende de la cantidad de registros.
+
+    columnas: secuencia de (encabezado, campo de values_list)
+    """
+    columnas = ()
+    nombre_archivo = 'exportacion.csv'
+    chunk_size = 2000
+    paginate_by = None
+
+    def get(self, request, *args, **kwargs):
+        encabezados = [encabezado for encabezado, _ in self.columnas]
+        campos = [campo for _, campo in self.columnas]
+        filas = self.get_queryset().values_list(*campos).iterator(chunk_size=self.chunk_size)
+
+        escritor = csv.writer(_Eco())
+
+        def generar():
+            # BOM para que Excel detecte UTF-8
+            yield '\ufeff' + escritor.writerow(encabezados)
+            for fila in filas:
+                yield escritor.writerow([self.formatear(valor) for valor in fila])
+
+        response = StreamingHttpResponse(generar(), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{self.nombre_archivo}"'
+        return response
+
+    @staticmethod
+    def formatear(valor):
+        """
+        Valor listo para la celda. Los textos que empiezan como una fórmula
+        se escapan con un apóstrofo para que la planilla no los evalúe.
+        """
+        if valor is None:
+            return ''
+        if isinstance(valor, bool):
+            return 'Sí' if valor else 'No'
+        if isinstance(valor, datetime):
+            return timezone.localtime(valor).strftime('%d/%m/%Y %H:%M')
+        if isinstance(valor, date):
+            return valor.strftime('%d/%m/%Y')
+        if isinstance(valor, str) and valor.startswith(INICIOS_FORMULA):
+            return f"'{valor}"
+        return valor
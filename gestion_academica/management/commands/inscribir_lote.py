@@ -0,0 +1,58 @@
+"""
+Comando para inscribir una cohorte completa en varias materias
+"""
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from alumno.services import AlumnoService
+from inscripcion.services import InscripcionService
+
+
+class Command(BaseCommand):
+    help = 'Inscribe un lote de alumnos en una o varias materias'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--materia',
+            type=int,
+            nargs='+',
+            required=True,
+            help='IDs de las materias',
+        )
+        parser.add_argument(
+            '--alumno',
+            type=int,
+            nargs='+',
+            help='IDs de los alumnos',
+        )
+        parser.add_argument(
+            '--carrera',
+            type=int,
+            help='Inscribe a los alumnos activos de esta carrera',
+        )
+        parser.add_argument(
+            '--anio-ingreso',
+            type=int,
+            help='Con --carrera, limita la cohorte a un año de ingreso',
+        )
+
+    def handle(self, *args, **options):
+        if options['alumno']:
+            alumno_ids = options['alumno']
+        elif options['carrera']:
+            alumno_ids = AlumnoService.obtener_ids_cohorte(
+                options['carrera'], anio_ingreso=options['anio_ingreso']
+            )
+        else:
+            raise CommandError('Debe indicar --alumno o --carrera')
+
+        self.stdout.write(f'Inscribiendo {len(alumno_ids)} alumno(s) en {len(options["materia"])} materia(s)...')
+        try:
+            reporte = InscripcionService.inscribir_lote(alumno_ids, options['materia'])
+        except ValidationError as e:
+            raise CommandError(e.messages[0])
+
+        for estado, cantidad in sorted(reporte['resumen'].items()):
+            self.stdout.write(f'✓ {estado}: {cantidad}')
+        self.stdout.write(self.style.SUCCESS('¡Lote procesado!'))
@@ -0,0 +1,78 @@
+"""
+Worker del modo ráfaga: procesa la cola de pedidos de inscripción
+"""
+
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from inscripcion.services import SolicitudInscripcionService
+
+
+class Command(BaseCommand):
+    help = 'Procesa en orden de llegada los pedidos de inscripción encolados'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Cantidad de hilos que procesan la cola (por defecto 1)',
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=1.0,
+            help='Segundos de espera cuando la cola está vacía',
+        )
+        parser.add_argument(
+            '--una-vez',
+            action='store_true',
+            help='Vacía la cola y termina en lugar de quedar escuchando',
+        )
+        parser.add_argument(
+            '--recuperar',
+            action='store_true',
+            help='Reencola los pedidos que quedaron en proceso tras una caída',
+        )
+
+    def handle(self, *args, **options):
+        if options['recuperar']:
+            recuperadas = SolicitudInscripcionService.recuperar_en_proceso()
+            self.stdout.write(f'✓ Pedidos reencolados: {recuperadas}')
+
+        detener = threading.Event()
+        totales = []
+        lock = threading.Lock()
+
+        def worker():
+            procesadas = 0
+            try:
+                while not detener.is_set():
+                    lote = SolicitudInscripcionService.procesar_pendientes(limite=50)
+                    procesadas += lote
+                    if not lote:
+                        if options['una_vez']:
+                            break
+                        detener.wait(options['intervalo'])
+            finally:
+                connection.close()
+                with lock:
+                    totales.append(procesadas)
+
+        self.stdout.write(f'Procesando inscripciones con {options["workers"]} worker(s)...')
+        hilos = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, options['workers']))]
+        for hilo in hilos:
+            hilo.start()
+
+        try:
+            for hilo in hilos:
+                while hilo.is_alive():
+                    hilo.join(0.5)
+        except KeyboardInterrupt:
+            detener.set()
+            for hilo in hilos:
+                hilo.join()
+
+        self.stdout.write(self.style.SUCCESS(f'¡Pedidos procesados: {sum(totales)}!'))
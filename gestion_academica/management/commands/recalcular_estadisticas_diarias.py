@@ -0,0 +1,52 @@
+"""
+Comando para generar o reconstruir el resumen diario de inscripciones
+"""
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+
+from gestion_academica.services import EstadisticasService, TrabajoReporteService
+from inscripcion.models import EstadisticaDiaria, Inscripcion
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye EstadisticaDiaria a partir del historial de inscripciones para un rango de fechas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--desde',
+            type=date.fromisoformat,
+            help='Fecha inicial AAAA-MM-DD (por defecto, la primera inscripción)',
+        )
+        parser.add_argument(
+            '--hasta',
+            type=date.fromisoformat,
+            help='Fecha final AAAA-MM-DD (por defecto, hoy)',
+        )
+        parser.add_argument(
+            '--materia',
+            type=int,
+            nargs='*',
+            help='IDs de las materias a reconstruir (por defecto todas)',
+        )
+
+    def handle(self, *args, **options):
+        hasta = options['hasta'] or timezone.localdate()
+        desde = options['desde']
+        if desde is None:
+            primera = Inscripcion.objects.aggregate(primera=Min('fecha_inscripcion'))['primera']
+            desde = timezone.localdate(primera) if primera else hasta
+        if desde > hasta:
+            raise CommandError('--desde no puede ser posterior a --hasta')
+
+        self.stdout.write(f'Reconstruyendo estadísticas diarias del {desde} al {hasta}...')
+        filas = EstadisticaDiaria.reconstruir(desde, hasta, materia_ids=options['materia'])
+        # La versión en cache sólo llega a los demás procesos con un cache
+        # compartido; los trabajos guardados se descartan en la base
+        EstadisticasService.invalidar(EstadisticaDiaria)
+        TrabajoReporteService.descartar('serie_inscripciones')
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Filas generadas: {filas}'))
@@ -0,0 +1,34 @@
+"""
+Comando para reconciliar el contador de inscriptos activos de cada materia
+"""
+
+from django.core.management.base import BaseCommand
+
+from materia.models import Materia
+from materia.services import MateriaService
+from gestion_academica.services import EstadisticasService
+
+
+class Command(BaseCommand):
+    help = 'Recalcula Materia.inscriptos_activos a partir de las inscripciones activas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--materia',
+            type=int,
+            nargs='*',
+            help='IDs de las materias a recalcular (por defecto todas)',
+        )
+
+    def handle(self, *args, **options):
+        queryset = Materia.objects.all()
+        if options['materia']:
+            queryset = queryset.filter(id__in=options['materia'])
+
+        self.stdout.write('Recalculando inscriptos activos...')
+        corregidas = Materia.recalcular_inscriptos(queryset)
+        if corregidas:
+            MateriaService.invalidar_oferta(*queryset.values_list('carrera_id', flat=True).distinct())
+            EstadisticasService.invalidar(Materia)
+            self.stdout.write(self.style.WARNING(f'✓ Materias corregidas: {corregidas}'))
+        self.stdout.write(self.style.SUCCESS('¡Contadores de inscriptos sincronizados!'))
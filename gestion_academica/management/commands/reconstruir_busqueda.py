@@ -0,0 +1,33 @@
+"""
+Comando para regenerar el índice de búsqueda FTS5
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from gestion_academica.busqueda import BusquedaService
+
+
+class Command(BaseCommand):
+    help = 'Recalcula las columnas normalizadas y regenera las tablas de búsqueda FTS5'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'indices',
+            nargs='*',
+            help=f'Índices a regenerar: {", ".join(BusquedaService.INDICES)} (por defecto todos)',
+        )
+
+    def handle(self, *args, **options):
+        desconocidos = set(options['indices']) - set(BusquedaService.INDICES)
+        if desconocidos:
+            raise CommandError(f'Índices desconocidos: {", ".join(sorted(desconocidos))}')
+
+        if not BusquedaService.disponible():
+            self.stdout.write(self.style.WARNING(
+                'La base de datos no tiene el índice FTS5: sólo se recalculan las columnas normalizadas'
+            ))
+
+        self.stdout.write('Reconstruyendo índice de búsqueda...')
+        for nombre, filas in BusquedaService.reconstruir(options['indices']).items():
+            self.stdout.write(f'  {nombre}: {filas} filas')
+        self.stdout.write(self.style.SUCCESS('¡Índice de búsqueda actualizado!'))
@@ -0,0 +1,58 @@
+from django.db import migrations
+from django.db.utils import OperationalError
+
+# tabla -> (tabla del modelo, {campo indexado: columna del modelo})
+INDICES = {
+    'busqueda_carrera': ('carrera_carrera', {'nombre': 'nombre', 'codigo': 'codigo'}),
+    'busqueda_materia': ('materia_materia', {'nombre': 'nombre', 'codigo': 'codigo'}),
+    'busqueda_usuario': ('usuario_usuario', {
+        'first_name': 'first_name', 'last_name': 'last_name', 'username': 'dni', 'email': 'email',
+    }),
+    'busqueda_alumno': ('alumno_alumno', {'legajo': 'legajo'}),
+}
+
+
+def fts5_disponible(schema_editor):
+    # SQLite compilado sin FTS5 o anterior a 3.34 (sin tokenizer trigram)
+    try:
+        schema_editor.execute("CREATE VIRTUAL TABLE temp.busqueda_prueba USING fts5(texto, tokenize='trigram')")
+    except OperationalError:
+        return False
+    schema_editor.execute('DROP TABLE temp.busqueda_prueba')
+    return True
+
+
+def crear_indices(apps, schema_editor):
+    # FTS5 sólo existe en SQLite; en otras bases la búsqueda usa un rango por
+    # prefijo sobre las columnas normalizadas
+    if schema_editor.connection.vendor != 'sqlite' or not fts5_disponible(schema_editor):
+        return
+    for tabla, (origen, columnas) in INDICES.items():
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {tabla} USING fts5({', '.join(columnas)}, tokenize='trigram')"
+        )
+        valores = ', '.join(f"COALESCE({columna}, '')" for columna in columnas.values())
+        schema_editor.execute(
+            f"INSERT INTO {tabla} (rowid, {', '.join(columnas)}) SELECT id, {valores} FROM {origen}"
+        )
+
+
+def eliminar_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for tabla in INDICES:
+        schema_editor.execute(f'DROP TABLE IF EXISTS {tabla}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumno', '0003_alter_alumno_legajo'),
+        ('carrera', '0001_initial'),
+        ('materia', '0002_inscriptos_activos'),
+        ('usuario', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indices, eliminar_indices),
+    ]
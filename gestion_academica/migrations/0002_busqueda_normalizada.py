@@ -0,0 +1,65 @@
+from django.db import migrations
+from django.db.utils import OperationalError
+
+# tabla -> (tabla del modelo, {campo indexado: columna del modelo})
+INDICES = {
+    'busqueda_carrera': ('carrera_carrera', {
+        'nombre_normalizado': 'nombre_normalizado', 'codigo_normalizado': 'codigo_normalizado',
+    }),
+    'busqueda_materia': ('materia_materia', {
+        'nombre_normalizado': 'nombre_normalizado', 'codigo_normalizado': 'codigo_normalizado',
+    }),
+    'busqueda_usuario': ('usuario_usuario', {
+        'first_name_normalizado': 'first_name_normalizado',
+        'last_name_normalizado': 'last_name_normalizado',
+        'username': 'dni',
+        'email_normalizado': 'email_normalizado',
+    }),
+    'busqueda_alumno': ('alumno_alumno', {'legajo_normalizado': 'legajo_normalizado'}),
+}
+
+# Estructura de 0001, sobre las columnas originales
+INDICES_ANTERIORES = {
+    'busqueda_carrera': ('carrera_carrera', {'nombre': 'nombre', 'codigo': 'codigo'}),
+    'busqueda_materia': ('materia_materia', {'nombre': 'nombre', 'codigo': 'codigo'}),
+    'busqueda_usuario': ('usuario_usuario', {
+        'first_name': 'first_name', 'last_name': 'last_name', 'username': 'dni', 'email': 'email',
+    }),
+    'busqueda_alumno': ('alumno_alumno', {'legajo': 'legajo'}),
+}
+
+
+def recrear(indices):
+    def operacion(apps, schema_editor):
+        # Sin las tablas de 0001 (otra base o SQLite sin FTS5) no hay nada que recrear
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        try:
+            schema_editor.execute('SELECT 1 FROM busqueda_usuario LIMIT 1')
+        except OperationalError:
+            return
+        for tabla, (origen, columnas) in indices.items():
+            schema_editor.execute(f'DROP TABLE {tabla}')
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE {tabla} USING fts5({', '.join(columnas)}, tokenize='trigram')"
+            )
+            valores = ', '.join(f"COALESCE({columna}, '')" for columna in columnas.values())
+            schema_editor.execute(
+                f"INSERT INTO {tabla} (rowid, {', '.join(columnas)}) SELECT id, {valores} FROM {origen}"
+            )
+    return operacion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_academica', '0001_busqueda'),
+        ('alumno', '0004_legajo_normalizado'),
+        ('carrera', '0002_campos_normalizados'),
+        ('materia', '0003_campos_normalizados'),
+        ('usuario', '0002_campos_normalizados'),
+    ]
+
+    operations = [
+        migrations.RunPython(recrear(INDICES), recrear(INDICES_ANTERIORES)),
+    ]
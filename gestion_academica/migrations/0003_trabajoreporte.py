@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:31
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_academica', '0002_busqueda_normalizada'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrabajoReporte',
+            fields=[
+                ('id', models.CharField(max_length=32, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=50, verbose_name='Reporte')),
+                ('parametros', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Parámetros')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('listo', 'Listo'), ('error', 'Error')], default='pendiente', max_length=10, verbose_name='Estado')),
+                ('resultado', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True, verbose_name='Resultado')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('solicitado', models.DateTimeField(verbose_name='Solicitado')),
+                ('finalizado', models.DateTimeField(blank=True, null=True, verbose_name='Finalizado')),
+                ('vence', models.DateTimeField(db_index=True, verbose_name='Vence')),
+            ],
+            options={
+                'verbose_name': 'Trabajo de Reporte',
+                'verbose_name_plural': 'Trabajos de Reporte',
+                'ordering': ['-solicitado'],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_academica', '0003_trabajoreporte'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionModelo',
+            fields=[
+                ('modelo', models.CharField(max_length=100, primary_key=True, serialize=False, verbose_name='Modelo')),
+                ('version', models.PositiveBigIntegerField(default=0, verbose_name='Versión')),
+                ('modificado', models.DateTimeField(blank=True, null=True, verbose_name='Modificado')),
+            ],
+            options={
+                'verbose_name': 'Versión de Modelo',
+                'verbose_name_plural': 'Versiones de Modelos',
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+
+class TrabajoReporte(models.Model):
+    """
+    Reporte generado fuera de la request por TrabajoReporteService.
+    Se guarda en la base para que cualquier proceso pueda consultar su
+    estado y para que un mismo pedido no se lance dos veces.
+    """
+    PENDIENTE = 'pendiente'
+    LISTO = 'listo'
+    ERROR = 'error'
+    ESTADOS = [
+        (PENDIENTE, 'Pendiente'),
+        (LISTO, 'Listo'),
+        (ERROR, 'Error'),
+    ]
+
+    # Hash del reporte, sus parámetros y las versiones de los datos
+    id = models.CharField(max_length=32, primary_key=True, verbose_name='ID')
+    nombre = models.CharField(max_length=50, verbose_name='Reporte')
+    parametros = models.JSONField(default=dict, encoder=DjangoJSONEncoder, verbose_name='Parámetros')
+    estado = models.CharField(max_length=10, choices=ESTADOS, default=PENDIENTE, verbose_name='Estado')
+    resultado = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder, verbose_name='Resultado')
+    error = models.TextField(blank=True, verbose_name='Error')
+    solicitado = models.DateTimeField(verbose_name='Solicitado')
+    finalizado = models.DateTimeField(null=True, blank=True, verbose_name='Finalizado')
+    vence = models.DateTimeField(db_index=True, verbose_name='Vence')
+
+    class Meta:
+        verbose_name = 'Trabajo de Reporte'
+        verbose_name_plural = 'Trabajos de Reporte'
+        ordering = ['-solicitado']
+
+    def __str__(self):
+        return f"{self.nombre} ({self.get_estado_display()})"
+
+
+class VersionModelo(models.Model):
+    """
+    Versión de los datos de un modelo, que EstadisticasService incrementa
+    ante cada escritura. Vive en la base para que sobreviva a un reinicio
+    o al vaciado del cache y la compartan todos los procesos.
+    """
+    modelo = models.CharField(max_length=100, primary_key=True, verbose_name='Modelo')
+    version = models.PositiveBigIntegerField(default=0, verbose_name='Versión')
+    modificado = models.DateTimeField(null=True, blank=True, verbose_name='Modificado')
+
+    class Meta:
+        verbose_name = 'Versión de Modelo'
+        verbose_name_plural = 'Versiones de Modelos'
+
+    def __str__(self):
+        return f"{self.modelo} v{self.version}"
@@ -0,0 +1,194 @@
+"""
+Paginación por keyset ("seek") para los listados de alto volumen.
+"""
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+class PaginadorKeyset:
+    """
+    Reemplazo del Paginator de Django para las plantillas: no conoce la
+    cantidad de páginas, sólo un total aproximado y acotado.
+    """
+
+    def __init__(self, queryset, per_page, limite_total):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.limite_total = limite_total
+
+    @cached_property
+    def total(self):
+        """
+        Cantidad de filas contando como máximo limite_total + 1, para que
+        el costo no crezca con la tabla. None si el conteo está desactivado.
+        """
+        if self.limite_total is None:
+            return None
+        return self.queryset.order_by()[:self.limite_total + 1].count()
+
+    @property
+    def total_exacto(self):
+        return self.total is not None and self.total <= self.limite_total
+
+
+class PaginaKeyset:
+    """Página de resultados con los cursores para moverse a las vecinas"""
+
+    def __init__(self, object_list, paginator, hay_anterior, hay_siguiente, cursor_anterior=None, cursor_siguiente=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.hay_anterior = hay_anterior
+        self.hay_siguiente = hay_siguiente
+        self.cursor_anterior = cursor_anterior
+        self.cursor_siguiente = cursor_siguiente
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_previous(self):
+        return self.hay_anterior
+
+    def has_next(self):
+        return self.hay_siguiente
+
+    def has_other_pages(self):
+        return self.has_previous() or self.has_next()
+
+
+class KeysetPaginacionMixin:
+    """
+    Mixin para ListView que pagina con WHERE sobre los valores de la última
+    fila mostrada en lugar de OFFSET, así cualquier página cuesta lo mismo
+    que la primera, y sin COUNT completo.
+
+    orden_keyset: orden total y estable de la lista; el último campo debe
+    ser único (normalmente 'pk') y ninguno puede ser NULL.
+    El cursor viaja firmado en el parámetro GET parametro_cursor, con el
+    modelo y el orden en la sal: un cursor de otro listado no se acepta.
+    """
+    orden_keyset = ('-pk',)
+    parametro_cursor = 'cursor'
+    limite_total = 1000
+    SALT = 'gestion_academica.paginacion'
+
+    def get_orden_keyset(self):
+        return [
+            (campo.lstrip('-'), campo.startswith('-'))
+            for campo in self.orden_keyset
+        ]
+
+    def _campo(self, modelo, ruta):
+        campo = None
+        for nombre in ruta.split('__'):
+            campo = modelo._meta.pk if nombre == 'pk' else modelo._meta.get_field(nombre)
+            modelo = campo.related_model
+        return campo
+
+    def _valores(self, objeto):
+        valores = []
+        for ruta, _ in self.get_orden_keyset():
+            valor = objeto
+            for nombre in ruta.split('__'):
+                valor = getattr(valor, nombre)
+            # isoformat completo: DjangoJSONEncoder recorta los microsegundos
+            if isinstance(valor, (datetime, date, time)):
+                valor = valor.isoformat()
+            elif isinstance(valor, Decimal):
+                valor = str(valor)
+            valores.append(valor)
+        return valores
+
+    def _sal(self, modelo):
+        return f"{self.SALT}:{modelo._meta.label_lower}:{','.join(self.orden_keyset)}"
+
+    def crear_cursor(self, modelo, objeto, hacia_atras):
+        valores = None if objeto is None else self._valores(objeto)
+        return signing.dumps({'v': valores, 'atras': hacia_atras}, salt=self._sal(modelo), compress=True)
+
+    def leer_cursor(self, token, modelo):
+        """
+        Retorna (valores, hacia_atras), o None para la primera página si el
+        cursor no es válido para este listado
+        """
+        try:
+            cursor = signing.loads(token, salt=self._sal(modelo))
+            valores, hacia_atras = cursor['v'], bool(cursor['atras'])
+            if valores is not None:
+                orden = self.get_orden_keyset()
+                if not isinstance(valores, list) or len(valores) != len(orden):
+                    return None
+                valores = [
+                    self._campo(modelo, ruta).to_python(valor)
+                    for (ruta, _), valor in zip(orden, valores)
+                ]
+        except (signing.BadSignature, ValidationError, FieldDoesNotExist, ValueError, TypeError, KeyError):
+            return None
+        # Las columnas del orden no admiten NULL
+        if valores is not None and None in valores:
+            return None
+        return valores, hacia_atras
+
+    def _condicion(self, valores, hacia_atras):
+        # (a, b) > (x, y)  <=>  a > x OR (a = x AND b > y), según el sentido de cada campo
+        condicion = Q()
+        iguales = {}
+        for (ruta, descendente), valor in zip(self.get_orden_keyset(), valores):
+            operador = 'gt' if descendente == hacia_atras else 'lt'
+            condicion |= Q(**iguales, **{f'{ruta}__{operador}': valor})
+            iguales[ruta] = valor
+        return condicion
+
+    def paginate_queryset(self, queryset, page_size):
+        orden = [f'-{ruta}' if descendente else ruta for ruta, descendente in self.get_orden_keyset()]
+        inverso = [ruta if descendente else f'-{ruta}' for ruta, descendente in self.get_orden_keyset()]
+        paginator = PaginadorKeyset(queryset, page_size, self.limite_total)
+
+        token = self.request.GET.get(self.parametro_cursor)
+        cursor = self.leer_cursor(token, queryset.model) if token else None
+        valores, hacia_atras = cursor or (None, False)
+
+        if hacia_atras:
+            # Se recorre en orden inverso desde el cursor (o desde el final
+            # para la última página) y se invierte el resultado
+            filas = queryset.order_by(*inverso)
+            if valores is not None:
+                filas = filas.filter(self._condicion(valores, True))
+            filas = list(filas[:page_size + 1])
+            hay_anterior = len(filas) > page_size
+            filas = filas[:page_size][::-1]
+            hay_siguiente = valores is not None
+        else:
+            filas = queryset.order_by(*orden)
+            if valores is not None:
+                filas = filas.filter(self._condicion(valores, False))
+            filas = list(filas[:page_size + 1])
+            hay_siguiente = len(filas) > page_size
+            filas = filas[:page_size]
+            hay_anterior = valores is not None
+
+        page = PaginaKeyset(
+            filas,
+            paginator,
+            hay_anterior,
+            hay_siguiente,
+            cursor_anterior=self.crear_cursor(queryset.model, filas[0], True) if hay_anterior and filas else None,
+            cursor_siguiente=self.crear_cursor(queryset.model, filas[-1], False) if hay_siguiente and filas else None,
+        )
+        return paginator, page, filas, page.has_other_pages()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        filtros = self.request.GET.copy()
+        filtros.pop(self.parametro_cursor, None)
+        filtros.pop('page', None)
+        context['filtros_query'] = filtros.urlencode()
+        context['cursor_ultima'] = self.crear_cursor(self.object_list.model, None, True)
+        return context
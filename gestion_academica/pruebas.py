@@ -0,0 +1,78 @@
+"""
+Datos compartidos por los tests de las apps.
+"""
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.utils import timezone
+
+from alumno.models import Alumno
+from carrera.models import Carrera
+from materia.models import Materia
+from usuario.models import Usuario
+
+
+def crear_carrera(**campos):
+    return Carrera.objects.create(**{
+        'nombre': 'Ingeniería', 'codigo': 'ING01', 'duracion_anios': 5, **campos,
+    })
+
+
+def crear_materia(carrera, **campos):
+    return Materia.objects.create(**{
+        'nombre': 'Programación I', 'codigo': 'PRO101', 'carrera': carrera,
+        'año': 1, 'cuatrimestre': 1, 'cupo_maximo': 10, **campos,
+    })
+
+
+def crear_alumno(carrera, **campos_usuario):
+    usuario = Usuario.objects.create(**{
+        'username': '30111222', 'email': 'alumno@test.edu.ar', 'password': '!', **campos_usuario,
+    })
+    return Alumno.objects.create(
+        usuario=usuario, legajo='T-00001', carrera=carrera, fecha_ingreso=timezone.localdate()
+    )
+
+
+def crear_alumnos(carrera, cantidad):
+    # bulk_create evita el hash de la contraseña inicial en Usuario.save
+    usuarios = Usuario.objects.bulk_create([
+        Usuario(
+            username=f'{30000000 + i}',
+            email=f'alumno{i}@test.edu.ar',
+            first_name='Alumno',
+            last_name=str(i),
+            password='!',
+        )
+        for i in range(cantidad)
+    ])
+    return Alumno.objects.bulk_create([
+        Alumno(
+            usuario=usuario,
+            legajo=f'T-{i:05d}',
+            carrera=carrera,
+            fecha_ingreso=timezone.now().date(),
+        )
+        for i, usuario in enumerate(usuarios)
+    ])
+
+
+def crear_admin(**campos):
+    admin = Usuario.objects.create(**{
+        'username': '30999888', 'email': 'admin@test.edu.ar', 'password': '!', **campos,
+    })
+    admin.groups.add(Group.objects.get_or_create(name='Administradores')[0])
+    return admin
+
+
+class CarreraMateriaMixin:
+    """
+    Mixin de TestCase/TransactionTestCase: limpia el cache y crea
+    self.carrera con la materia self.materia de cupo cupo_maximo.
+    """
+    cupo_maximo = 10
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.carrera = crear_carrera()
+        self.materia = crear_materia(self.carrera, cupo_maximo=self.cupo_maximo)
@@ -3,12 +3,123 @@ Servicios para la lógica de negocio del sistema académico.
 Implementa la separación de capas y abstracción de la lógica.
 """
 
+import csv
+import hashlib
+import io
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.utils import timezone
 
 from carrera.models import Carrera
 from materia.models import Materia
+from materia.services import MateriaService
 from alumno.models import Alumno
 from usuario.models import Usuario
-from inscripcion.models import Inscripcion
+from inscripcion.models import Inscripcion, EstadisticaDiaria
+
+from .exportar import ExportarCSVMixin
+from .models import TrabajoReporte, VersionModelo
+
+
+class EstadisticasService:
+    """
+    Contadores de las tarjetas de estadísticas de los listados.
+    Cada modelo tiene su propia versión en VersionModelo, que las señales de
+    gestion_academica.signals incrementan ante cualquier escritura. Cada
+    proceso la reutiliza de su cache durante VERSIONES_CACHE_TIMEOUT
+    segundos, así que una escritura hecha en otro proceso se ve a lo sumo
+    ese tiempo después.
+    """
+    TIMEOUT = 60 * 10
+
+    @staticmethod
+    def _clave_version(modelo):
+        return f'estadisticas:{modelo._meta.label_lower}:version'
+
+    @staticmethod
+    def _leer(modelos):
+        """(versión, modificado) de cada modelo, en el mismo orden"""
+        claves = [EstadisticasService._clave_version(modelo) for modelo in modelos]
+        leidas = cache.get_many(claves)
+        faltantes = [modelo for modelo, clave in zip(modelos, claves) if clave not in leidas]
+        if faltantes:
+            etiquetas = {modelo._meta.label_lower: modelo for modelo in faltantes}
+            guardadas = {
+                fila[0]: fila[1:] for fila in VersionModelo.objects.filter(
+                    modelo__in=etiquetas
+                ).values_list('modelo', 'version', 'modificado')
+            }
+            nuevas = {
+                EstadisticasService._clave_version(modelo): guardadas.get(etiqueta, (0, None))
+                for etiqueta, modelo in etiquetas.items()
+            }
+            cache.set_many(nuevas, settings.VERSIONES_CACHE_TIMEOUT)
+            leidas.update(nuevas)
+        return [leidas[clave] for clave in claves]
+
+    @staticmethod
+    def versiones(*modelos):
+        """Retorna la versión actual de cada modelo, en el mismo orden"""
+        return [version for version, _ in EstadisticasService._leer(modelos)]
+
+    @staticmethod
+    def modificado(*modelos):
+        """
+        Fecha de la última escritura registrada sobre cualquiera de los
+        modelos, o None si todavía no se registró ninguna
+        """
+        return max(
+            (fecha for _, fecha in EstadisticasService._leer(modelos) if fecha is not None),
+            default=None,
+        )
+
+    @staticmethod
+    def invalidar(modelo):
+        etiqueta = modelo._meta.label_lower
+        ahora = timezone.now()
+        cambios = {'version': F('version') + 1, 'modificado': ahora}
+        if not VersionModelo.objects.filter(modelo=etiqueta).update(**cambios):
+            try:
+                with transaction.atomic():
+                    VersionModelo.objects.create(modelo=etiqueta, version=1, modificado=ahora)
+            except IntegrityError:
+                # Otro proceso creó la fila en el medio
+                VersionModelo.objects.filter(modelo=etiqueta).update(**cambios)
+        cache.delete(EstadisticasService._clave_version(modelo))
+
+    @staticmethod
+    def contar(modelo, contadores, **agregados):
+        """
+        Calcula todos los contadores de un modelo en un único aggregate().
+
+        contadores: dict nombre -> Q (o None para el total), cada uno se
+        resuelve como Count('pk', filter=Q, distinct=True).
+        agregados: expresiones adicionales (Avg, Sum, ...) pasadas tal cual.
+        """
+        expresiones = {
+            nombre: Count('pk', filter=filtro, distinct=True)
+            for nombre, filtro in contadores.items()
+        }
+        expresiones.update(agregados)
+
+        firma = hashlib.md5(repr(sorted(expresiones.items())).encode()).hexdigest()
+        version, = EstadisticasService.versiones(modelo)
+        clave = f'estadisticas:{modelo._meta.label_lower}:{version}:{firma}'
+        resultado = cache.get(clave)
+        if resultado is None:
+            resultado = modelo.objects.aggregate(**expresiones)
+            cache.set(clave, resultado, EstadisticasService.TIMEOUT)
+        return resultado
 
 
 class ReportesService:
@@ -16,30 +127,305 @@ class ReportesService:
     Servicio para generar reportes y consultas específicas
     """
     
+    MODELOS_REPORTE_GENERAL = (Carrera, Materia, Alumno, Inscripcion, Usuario)
+    TIMEOUT = 60 * 10
+
+    @staticmethod
+    def _contar(conteos):
+        """
+        Ejecuta varios conteos en una sola consulta: cada queryset se
+        compila como subconsulta escalar de un único SELECT.
+        """
+        columnas, params = [], []
+        for queryset in conteos.values():
+            sql, sql_params = queryset.order_by().values('pk').query.sql_with_params()
+            columnas.append(f'(SELECT COUNT(*) FROM ({sql}) AS conteo)')
+            params.extend(sql_params)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT ' + ', '.join(columnas), params)
+            return dict(zip(conteos, cursor.fetchone()))
+
     @staticmethod
     def reporte_general():
         """
-        Genera un reporte general del sistema
+        Genera un reporte general del sistema.
+        Se calcula en una sola consulta y se cachea hasta la próxima escritura
+        sobre carreras, materias, alumnos, inscripciones o usuarios.
+        """
+        versiones = EstadisticasService.versiones(*ReportesService.MODELOS_REPORTE_GENERAL)
+        clave = 'reportes:general:' + ':'.join(map(str, versiones))
+        reporte = cache.get(clave)
+        if reporte is None:
+            materias = Materia.objects.filter(activa=True)
+            reporte = ReportesService._contar({
+                'total_carreras': Carrera.objects.filter(activa=True),
+                'total_materias': materias,
+                'total_alumnos': Alumno.objects.filter(activo=True),
+                'total_inscripciones': Inscripcion.objects.filter(activa=True),
+                'materias_con_cupo': materias.con_cupo(),
+                'total_usuarios': Usuario.objects.filter(is_active=True),
+            })
+            cache.set(clave, reporte, ReportesService.TIMEOUT)
+        return reporte
+    
+    @staticmethod
+    def ocupacion_por_celda():
+        """
+        Cupos ofrecidos, ocupados y porcentaje de ocupación de las materias
+        activas agrupadas por carrera, año y cuatrimestre, en un solo GROUP BY.
+        Se cachea hasta el próximo cambio de carreras, materias o inscripciones.
+        """
+        versiones = EstadisticasService.versiones(Carrera, Materia, Inscripcion)
+        clave = 'reportes:ocupacion:' + ':'.join(map(str, versiones))
+        celdas = cache.get(clave)
+        if celdas is None:
+            filas = (
+                Materia.objects.filter(activa=True, carrera__activa=True)
+                .values('carrera_id', 'carrera__nombre', 'año', 'cuatrimestre')
+                .annotate(
+                    materias=Count('id'),
+                    cupos_ofrecidos=Sum('cupo_maximo'),
+                    cupos_ocupados=Sum('inscriptos_activos'),
+                )
+                .order_by('carrera__nombre', 'año', 'cuatrimestre')
+            )
+            celdas = [
+                {
+                    'carrera_id': fila['carrera_id'],
+                    'carrera': fila['carrera__nombre'],
+                    'anio': fila['año'],
+                    'cuatrimestre': fila['cuatrimestre'],
+                    'materias': fila['materias'],
+                    'cupos_ofrecidos': fila['cupos_ofrecidos'],
+                    'cupos_ocupados': fila['cupos_ocupados'],
+                    'ocupacion': round(fila['cupos_ocupados'] * 100 / fila['cupos_ofrecidos'])
+                    if fila['cupos_ofrecidos'] else 0,
+                }
+                for fila in filas
+            ]
+            cache.set(clave, celdas, ReportesService.TIMEOUT)
+        return celdas
+
+    @staticmethod
+    def mapa_ocupacion(celdas):
+        """
+        Arma la matriz del mapa de calor: una fila por carrera y una columna
+        por cada (año, cuatrimestre) presente; las celdas vacías quedan en None.
         """
+        columnas = sorted({(celda['anio'], celda['cuatrimestre']) for celda in celdas})
+        filas = {}
+        for celda in celdas:
+            fila = filas.setdefault(celda['carrera_id'], {'carrera': celda['carrera'], 'celdas': {}})
+            fila['celdas'][(celda['anio'], celda['cuatrimestre'])] = celda
         return {
-            'total_carreras': Carrera.objects.filter(activa=True).count(),
-            'total_materias': Materia.objects.filter(activa=True).count(),
-            'total_alumnos': Alumno.objects.filter(activo=True).count(),
-            'total_inscripciones': Inscripcion.objects.filter(activa=True).count(),     
-            'materias_con_cupo': Materia.objects.filter(activa=True).count(),
-            'total_usuarios': Usuario.objects.filter(is_active=True).count(),
+            'columnas': columnas,
+            'filas': [
+                {'carrera': fila['carrera'], 'celdas': [fila['celdas'].get(columna) for columna in columnas]}
+                for fila in filas.values()
+            ],
         }
-    
+
+    @staticmethod
+    def inscripciones_del_dia(fecha=None):
+        """
+        Altas del día leídas del resumen EstadisticaDiaria
+        """
+        fecha = fecha or timezone.localdate()
+        total = EstadisticaDiaria.objects.filter(fecha=fecha).aggregate(total=Sum('altas'))['total']
+        return total or 0
+
+    @staticmethod
+    def serie_inscripciones(desde, hasta, carrera_id=None):
+        """
+        Serie diaria de altas, bajas y activos entre dos fechas, sumando las
+        filas pre-agregadas de EstadisticaDiaria. Los días sin movimientos
+        no aparecen en la serie.
+        Sólo las materias con movimientos en el día tienen fila, así que los
+        activos de cada fecha suman el último valor conocido de cada materia.
+        """
+        filas = EstadisticaDiaria.objects.all()
+        if carrera_id:
+            filas = filas.filter(carrera_id=carrera_id)
+
+        # Activos de cada materia al empezar el período: su última fila previa
+        ultima_previa = EstadisticaDiaria.objects.filter(
+            materia_id=OuterRef('materia_id'), fecha__lt=desde
+        ).order_by('-fecha').values('fecha')[:1]
+        activos_por_materia = dict(
+            filas.filter(fecha__lt=desde, fecha=Subquery(ultima_previa))
+            .values_list('materia_id', 'activos')
+        )
+        activos = sum(activos_por_materia.values())
+
+        serie = []
+        del_periodo = filas.filter(fecha__gte=desde, fecha__lte=hasta).order_by('fecha').values_list(
+            'fecha', 'materia_id', 'altas', 'bajas', 'activos'
+        )
+        for fecha, materia_id, altas, bajas, activos_materia in del_periodo:
+            if not serie or serie[-1]['fecha'] != fecha:
+                serie.append({'fecha': fecha, 'altas': 0, 'bajas': 0, 'activos': 0})
+            dia = serie[-1]
+            dia['altas'] += altas
+            dia['bajas'] += bajas
+            activos += activos_materia - activos_por_materia.get(materia_id, 0)
+            activos_por_materia[materia_id] = activos_materia
+            dia['activos'] = activos
+        return serie
+
     @staticmethod
-    def materias_con_cupo_por_carrera():
+    def materias_con_cupo_por_carrera(carrera_id=None, anio=None):
         """
-        Retorna materias con cupo agrupadas por carrera
+        Retorna materias con cupo agrupadas por carrera.
+        Las carreras activas sin materias con cupo quedan con una lista vacía.
         """
-        resultado = {}
-        for carrera in Carrera.objects.filter(activa=True):
-            materias_con_cupo = []
-            for materia in carrera.materias.filter(activa=True):
-                if materia.tiene_cupo:
-                    materias_con_cupo.append(materia)
-            resultado[carrera] = materias_con_cupo
+        carreras = Carrera.objects.filter(activa=True)
+        if carrera_id:
+            carreras = carreras.filter(id=carrera_id)
+        resultado = {carrera: [] for carrera in carreras}
+        por_id = {carrera.id: carrera for carrera in resultado}
+
+        materias = MateriaService.obtener_materias_con_cupo(
+            carrera_id=carrera_id, anio=anio
+        ).filter(carrera__activa=True).order_by('carrera', 'año', 'cuatrimestre', 'nombre')
+        for materia in materias:
+            carrera = por_id.get(materia.carrera_id)
+            if carrera is not None:
+                materia.carrera = carrera
+                resultado[carrera].append(materia)
         return resultado
+
+
+class TrabajoReporteService:
+    """
+    Genera reportes de ReportesService fuera de la request. Cada trabajo se
+    guarda en TrabajoReporte con su estado y, al terminar, con el resultado
+    durante REPORTES_TRABAJOS_TTL segundos. Los pedidos con el mismo reporte
+    y parámetros, sin escrituras en el medio, reutilizan el mismo trabajo
+    aunque lleguen a procesos distintos.
+    """
+    PENDIENTE = TrabajoReporte.PENDIENTE
+    LISTO = TrabajoReporte.LISTO
+    ERROR = TrabajoReporte.ERROR
+
+    # Un trabajo perdido (p. ej. reinicio del proceso) deja de bloquear
+    # nuevos pedidos tras este tiempo
+    TIMEOUT_PENDIENTE = 60 * 10
+
+    REPORTES = {
+        'general': ReportesService.reporte_general,
+        'ocupacion': ReportesService.ocupacion_por_celda,
+        'serie_inscripciones': ReportesService.serie_inscripciones,
+    }
+    MODELOS = (*ReportesService.MODELOS_REPORTE_GENERAL, EstadisticaDiaria)
+
+    _executor = None
+    _executor_lock = threading.Lock()
+
+    @classmethod
+    def _obtener_executor(cls):
+        with cls._executor_lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(
+                    max_workers=settings.REPORTES_TRABAJOS_WORKERS,
+                    thread_name_prefix='reportes',
+                )
+            return cls._executor
+
+    @classmethod
+    def solicitar(cls, nombre, **parametros):
+        """
+        Encola el reporte y retorna el id del trabajo. Si ya hay uno igual
+        en curso o terminado, retorna ese mismo id.
+        """
+        if nombre not in cls.REPORTES:
+            raise ValidationError(f'Reporte desconocido: {nombre}')
+
+        # Las versiones están en la base: un reinicio o cache.clear() no
+        # vuelve a apuntar a un trabajo hecho con datos anteriores
+        versiones = EstadisticasService.versiones(*cls.MODELOS)
+        firma = json.dumps([nombre, parametros, versiones], sort_keys=True, cls=DjangoJSONEncoder)
+        trabajo_id = hashlib.md5(firma.encode()).hexdigest()
+
+        ahora = timezone.now()
+        if TrabajoReporte.objects.filter(pk=trabajo_id, vence__gt=ahora).exists():
+            return trabajo_id
+        try:
+            with transaction.atomic():
+                # Los trabajos vencidos, incluido uno anterior con este id, se descartan
+                TrabajoReporte.objects.filter(vence__lte=ahora).delete()
+                TrabajoReporte.objects.create(
+                    id=trabajo_id,
+                    nombre=nombre,
+                    parametros=parametros,
+                    solicitado=ahora,
+                    vence=ahora + timedelta(seconds=cls.TIMEOUT_PENDIENTE),
+                )
+        except IntegrityError:
+            # Otro pedido igual ganó la inserción y ya lanzó el trabajo
+            return trabajo_id
+
+        if settings.REPORTES_TRABAJOS_WORKERS:
+            # El hilo lee el trabajo con su propia conexión: esperar al commit
+            transaction.on_commit(partial(cls._obtener_executor().submit, cls._ejecutar, trabajo_id))
+        else:
+            cls._ejecutar(trabajo_id)
+        return trabajo_id
+
+    @classmethod
+    def _ejecutar(cls, trabajo_id):
+        try:
+            trabajo = TrabajoReporte.objects.get(pk=trabajo_id)
+            try:
+                resultado = cls.REPORTES[trabajo.nombre](**cls._parametros(trabajo))
+                cambios = {'estado': cls.LISTO, 'resultado': resultado, 'ttl': settings.REPORTES_TRABAJOS_TTL}
+            except Exception as e:
+                # Los errores se conservan poco para permitir reintentar
+                cambios = {'estado': cls.ERROR, 'error': str(e), 'ttl': 60}
+            ahora = timezone.now()
+            TrabajoReporte.objects.filter(pk=trabajo_id, estado=cls.PENDIENTE).update(
+                finalizado=ahora, vence=ahora + timedelta(seconds=cambios.pop('ttl')), **cambios
+            )
+        finally:
+            if settings.REPORTES_TRABAJOS_WORKERS:
+                # Cada hilo del pool abre su propia conexión
+                connection.close()
+
+    @staticmethod
+    def _parametros(trabajo):
+        # Las fechas vuelven de JSON como texto
+        parametros = dict(trabajo.parametros)
+        for clave in ('desde', 'hasta'):
+            if isinstance(parametros.get(clave), str):
+                parametros[clave] = date.fromisoformat(parametros[clave])
+        return parametros
+
+    @classmethod
+    def obtener(cls, trabajo_id):
+        """Retorna el trabajo como diccionario, o None si no existe o ya expiró"""
+        return TrabajoReporte.objects.filter(pk=trabajo_id, vence__gt=timezone.now()).values().first()
+
+    @staticmethod
+    def descartar(*nombres):
+        """
+        Vence los trabajos de los reportes indicados, para procesos que
+        reescriben datos sin pasar por las señales (p. ej. la reconstrucción
+        de EstadisticaDiaria desde un comando)
+        """
+        TrabajoReporte.objects.filter(nombre__in=nombres).delete()
+
+    @staticmethod
+    def como_csv(resultado):
+        """
+        Convierte el resultado en filas CSV: una lista de diccionarios usa
+        sus claves como encabezado y un diccionario se exporta como clave/valor.
+        """
+        formatear = ExportarCSVMixin.formatear
+        salida = io.StringIO()
+        escritor = csv.writer(salida)
+        if isinstance(resultado, dict):
+            escritor.writerow(['clave', 'valor'])
+            escritor.writerows([clave, formatear(valor)] for clave, valor in resultado.items())
+        elif resultado:
+            escritor.writerow(resultado[0].keys())
+            escritor.writerows([formatear(valor) for valor in fila.values()] for fila in resultado)
+        return salida.getvalue()
@@ -0,0 +1,68 @@
+"""
+Señales que invalidan las estadísticas y reportes cacheados y mantienen
+el índice de búsqueda
+"""
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_save, post_delete
+from django.dispatch import receiver
+
+from carrera.models import Carrera
+from materia.models import Materia
+from alumno.models import Alumno
+from usuario.models import Usuario
+from inscripcion.models import Inscripcion
+from inscripcion.signals import inscripciones_masivas
+from .busqueda import BusquedaService
+from .services import EstadisticasService
+
+
+@receiver(post_save, sender=Carrera)
+@receiver(post_save, sender=Materia)
+@receiver(post_save, sender=Alumno)
+@receiver(post_save, sender=Usuario)
+@receiver(post_save, sender=Inscripcion)
+@receiver(post_delete, sender=Carrera)
+@receiver(post_delete, sender=Materia)
+@receiver(post_delete, sender=Alumno)
+@receiver(post_delete, sender=Usuario)
+@receiver(post_delete, sender=Inscripcion)
+def invalidar_reportes(sender, update_fields=None, **kwargs):
+    # El login sólo actualiza last_login, que no afecta a los reportes
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    # Invalidar tras el commit para no cachear datos previos a la escritura
+    transaction.on_commit(partial(EstadisticasService.invalidar, sender))
+
+
+@receiver(inscripciones_masivas)
+def invalidar_reportes_masivos(sender, **kwargs):
+    transaction.on_commit(partial(EstadisticasService.invalidar, Inscripcion))
+
+
+@receiver(m2m_changed, sender=Usuario.groups.through)
+def invalidar_por_grupos(sender, action, **kwargs):
+    # Los contadores de administradores/alumnos dependen de los grupos
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        transaction.on_commit(partial(EstadisticasService.invalidar, Usuario))
+
+
+@receiver(post_save, sender=Carrera)
+@receiver(post_save, sender=Materia)
+@receiver(post_save, sender=Alumno)
+@receiver(post_save, sender=Usuario)
+def indexar_busqueda(sender, instance, update_fields=None, **kwargs):
+    # Dentro de la misma transacción: si se revierte, el índice también
+    _, campos = BusquedaService.INDICES[BusquedaService.nombre_indice(sender)]
+    if update_fields and not set(update_fields) & set(campos):
+        return
+    BusquedaService.indexar(instance)
+
+
+@receiver(post_delete, sender=Carrera)
+@receiver(post_delete, sender=Materia)
+@receiver(post_delete, sender=Alumno)
+@receiver(post_delete, sender=Usuario)
+def desindexar_busqueda(sender, instance, **kwargs):
+    BusquedaService.desindexar(sender, instance.pk)
@@ -1,3 +1,624 @@
-from django.test import TestCase
+import csv
+import re
+from contextlib import ExitStack
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import Group
+from django.core import signing
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Avg, Q, QuerySet
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from carrera.models import Carrera
+from inscripcion.models import EstadisticaDiaria, Inscripcion
+from alumno.services import AlumnoService
+from inscripcion.services import InscripcionService
+from inscripcion.views import InscripcionListView
+from materia.models import Materia
+from materia.services import MateriaService
+from usuario.models import Usuario
+from usuario.views import UsuarioListView
+
+from .busqueda import BusquedaService
+from .exportar import ExportarCSVMixin
+from .models import TrabajoReporte, VersionModelo
+from .pruebas import CarreraMateriaMixin, crear_admin, crear_alumno, crear_carrera, crear_materia
+from .services import EstadisticasService, ReportesService, TrabajoReporteService
+
+
+class ReporteGeneralTest(CarreraMateriaMixin, TestCase):
+    cupo_maximo = 0
+
+    def test_una_consulta_y_luego_cache(self):
+        # La lectura de las versiones y el reporte
+        with self.assertNumQueries(2):
+            reporte = ReportesService.reporte_general()
+        self.assertEqual(reporte['total_carreras'], 1)
+        self.assertEqual(reporte['total_materias'], 1)
+        self.assertEqual(reporte['materias_con_cupo'], 0)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(ReportesService.reporte_general(), reporte)
+
+    def test_escritura_invalida_reporte(self):
+        ReportesService.reporte_general()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Carrera.objects.create(nombre='Medicina', codigo='MED01', duracion_anios=6)
+
+        self.assertEqual(ReportesService.reporte_general()['total_carreras'], 2)
+
+
+class EstadisticasServiceTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        crear_carrera()
+        crear_carrera(nombre='Medicina', codigo='MED01', duracion_anios=6, activa=False)
+
+    def contar(self):
+        return EstadisticasService.contar(Carrera, {
+            'total': None,
+            'activas': Q(activa=True),
+        }, promedio=Avg('duracion_anios'))
+
+    def test_una_consulta_y_luego_cache(self):
+        # La lectura de la versión y el conteo
+        with self.assertNumQueries(2):
+            stats = self.contar()
+        self.assertEqual(stats, {'total': 2, 'activas': 1, 'promedio': 5.5})
+
+        with self.assertNumQueries(0):
+            self.contar()
+
+    def test_escritura_invalida_solo_su_modelo(self):
+        self.contar()
+        version_materias = EstadisticasService.versiones(Materia)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Carrera.objects.filter(codigo='MED01').get().delete()
+
+        self.assertEqual(self.contar()['total'], 1)
+        self.assertEqual(EstadisticasService.versiones(Materia), version_materias)
+
+    def test_la_version_sobrevive_al_cache(self):
+        # Un reinicio o cache.clear() no vuelve a una versión ya usada
+        with self.captureOnCommitCallbacks(execute=True):
+            Carrera.objects.create(nombre='Derecho', codigo='DER01', duracion_anios=5)
+        version, = EstadisticasService.versiones(Carrera)
+        cache.clear()
+
+        self.assertEqual(EstadisticasService.versiones(Carrera), [version])
+        self.assertEqual(VersionModelo.objects.get(pk='carrera.carrera').version, version)
+
+
+class ExportarCSVTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        carrera = crear_carrera()
+        for i, codigo in enumerate(['PRO101', 'MAT101']):
+            crear_materia(carrera, nombre=f'Materia {i}', codigo=codigo)
+        self.client.force_login(crear_admin())
+
+    def test_exporta_con_los_filtros_del_listado(self):
+        response = self.client.get(reverse('materia_exportar'), {'search': 'PRO'})
+
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        filas = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(len(filas), 2)
+        self.assertTrue(filas[1].startswith('PRO101,Materia 0,Ingeniería'))
+
+    def test_escapa_valores_que_parecen_formulas(self):
+        Materia.objects.filter(codigo='PRO101').update(nombre='=HYPERLINK("http://x","y")')
+
+        response = self.client.get(reverse('materia_exportar'), {'search': 'PRO'})
+
+        filas = list(csv.reader(b''.join(response.streaming_content).decode('utf-8-sig').splitlines()))
+        self.assertEqual(filas[1][1], '\'=HYPERLINK("http://x","y")')
+        for valor in ['+1', '-1', '@SUMA(A1)', '\tx', '\rx']:
+            self.assertEqual(ExportarCSVMixin.formatear(valor), f"'{valor}")
+        self.assertEqual(ExportarCSVMixin.formatear('Ingeniería - Sistemas'), 'Ingeniería - Sistemas')
+        self.assertEqual(ExportarCSVMixin.formatear(-1), -1)
+
+
+class OcupacionPorCeldaTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.carrera = crear_carrera()
+        self.materias = [
+            crear_materia(self.carrera, nombre=f'Materia {i}', codigo=f'PRO10{i}', cupo_maximo=2)
+            for i in range(2)
+        ]
+        self.alumno = crear_alumno(self.carrera)
+
+    def test_agrupa_por_celda_y_se_invalida_al_inscribir(self):
+        with self.assertNumQueries(2):
+            celdas = ReportesService.ocupacion_por_celda()
+        self.assertEqual(len(celdas), 1)
+        self.assertEqual(celdas[0]['cupos_ofrecidos'], 4)
+        self.assertEqual(celdas[0]['cupos_ocupados'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            InscripcionService.inscribir_alumno(self.alumno.id, self.materias[0].id)
+
+        celda, = ReportesService.ocupacion_por_celda()
+        self.assertEqual(celda['cupos_ocupados'], 1)
+        self.assertEqual(celda['ocupacion'], 25)
+
+    def test_json_de_ocupacion(self):
+        url = reverse('reporte_ocupacion_json')
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        self.client.force_login(crear_admin())
+        response = self.client.get(url)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.json(), {'celdas': [{
+            'carrera_id': self.carrera.id, 'carrera': 'Ingeniería', 'anio': 1, 'cuatrimestre': 1,
+            'materias': 2, 'cupos_ofrecidos': 4, 'cupos_ocupados': 0, 'ocupacion': 0,
+        }]})
+
+
+class MateriasConCupoPorCarreraTest(CarreraMateriaMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.segunda = crear_materia(self.carrera, nombre='Análisis I', codigo='ANA101', año=2)
+        self.medicina = crear_carrera(nombre='Medicina', codigo='MED01', duracion_anios=6)
+        crear_materia(self.medicina, nombre='Anatomía', codigo='ANT101', cupo_maximo=1, inscriptos_activos=1)
+        crear_carrera(nombre='Derecho', codigo='DER01', activa=False)
+
+    def test_agrupa_por_carrera_en_dos_consultas(self):
+        with self.assertNumQueries(2):
+            grupos = ReportesService.materias_con_cupo_por_carrera()
+            nombres = {
+                carrera.nombre: [(materia.codigo, materia.carrera.nombre) for materia in materias]
+                for carrera, materias in grupos.items()
+            }
+
+        # La carrera con su única materia llena queda con la lista vacía
+        self.assertEqual(nombres, {
+            'Ingeniería': [('PRO101', 'Ingeniería'), ('ANA101', 'Ingeniería')],
+            'Medicina': [],
+        })
+        self.assertEqual(
+            list(ReportesService.materias_con_cupo_por_carrera(carrera_id=self.carrera.id, anio=2).values()),
+            [[self.segunda]],
+        )
+
+
+class SerieInscripcionesTest(CarreraMateriaMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.otra = crear_materia(self.carrera, nombre='Análisis I', codigo='ANA101')
+        self.hoy = timezone.localdate()
+
+    def dia(self, dias_atras, materia, **valores):
+        EstadisticaDiaria.objects.create(
+            fecha=self.hoy - timedelta(days=dias_atras), materia=materia, carrera=self.carrera, **valores
+        )
+
+    def test_activos_arrastran_el_ultimo_valor_de_cada_materia(self):
+        # La materia con 10 activos se movió antes del período y un día en el medio
+        self.dia(3, self.materia, altas=10, activos=10)
+        self.dia(1, self.materia, altas=1, activos=11)
+        self.dia(2, self.otra, altas=1, activos=1)
+        self.dia(0, self.otra, bajas=1, activos=0)
+
+        with self.assertNumQueries(2):
+            serie = ReportesService.serie_inscripciones(self.hoy - timedelta(days=2), self.hoy)
+
+        self.assertEqual(
+            [(fila['fecha'], fila['altas'], fila['bajas'], fila['activos']) for fila in serie],
+            [
+                (self.hoy - timedelta(days=2), 1, 0, 11),
+                (self.hoy - timedelta(days=1), 1, 0, 12),
+                (self.hoy, 0, 1, 11),
+            ],
+        )
+        otra_carrera = crear_carrera(nombre='Medicina', codigo='MED01')
+        self.assertEqual(ReportesService.serie_inscripciones(self.hoy - timedelta(days=2), self.hoy, otra_carrera.id), [])
+
+
+class CatalogoPublicoTest(CarreraMateriaMixin, TestCase):
+    cupo_maximo = 2
+
+    def setUp(self):
+        super().setUp()
+        self.alumno = crear_alumno(self.carrera)
+        self.url = reverse('materias_con_cupo')
+
+    def test_responde_304_y_reutiliza_el_fragmento(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertContains(response, 'Programación I')
+
+        # Otros filtros son otro fragmento y otro ETag
+        response = self.client.get(self.url, {'anio': 2})
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertNotContains(response, 'Programación I')
+
+    def test_inscripcion_cambia_la_version(self):
+        etag = self.client.get(self.url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            InscripcionService.inscribir_alumno(self.alumno.id, self.materia.id)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Last-Modified', response)
+        self.assertContains(response, '<span class="badge bg-warning text-dark">1</span>', html=True)
+
+    def test_etag_no_se_repite_despues_de_vaciar_el_cache(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            crear_materia(self.carrera, nombre='Programación II', codigo='PRO102')
+        etag = self.client.get(self.url)['ETag']
+        cache.clear()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            crear_materia(self.carrera, nombre='Programación III', codigo='PRO103')
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Programación III')
+
+
+@override_settings(REPORTES_TRABAJOS_WORKERS=0)
+class TrabajoReporteServiceTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        crear_carrera()
+
+    def test_pedidos_iguales_reutilizan_el_trabajo(self):
+        trabajo_id = TrabajoReporteService.solicitar('general')
+
+        with self.assertNumQueries(1):
+            self.assertEqual(TrabajoReporteService.solicitar('general'), trabajo_id)
+
+        trabajo = TrabajoReporteService.obtener(trabajo_id)
+        self.assertEqual(trabajo['estado'], TrabajoReporteService.LISTO)
+        self.assertEqual(trabajo['resultado']['total_carreras'], 1)
+        self.assertIn('total_carreras,1', TrabajoReporteService.como_csv(trabajo['resultado']))
+
+    def test_escritura_genera_un_trabajo_nuevo(self):
+        trabajo_id = TrabajoReporteService.solicitar('general')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Carrera.objects.create(nombre='Medicina', codigo='MED01', duracion_anios=6)
+
+        self.assertNotEqual(TrabajoReporteService.solicitar('general'), trabajo_id)
+
+    def test_el_trabajo_se_guarda_en_la_base(self):
+        trabajo_id = TrabajoReporteService.solicitar('general')
+        # Otro proceso no comparte el cache local
+        cache.clear()
+
+        self.assertEqual(TrabajoReporteService.solicitar('general'), trabajo_id)
+        self.assertEqual(TrabajoReporte.objects.count(), 1)
+        self.assertEqual(TrabajoReporteService.obtener(trabajo_id)['resultado']['total_carreras'], 1)
+
+    def test_no_reutiliza_un_trabajo_viejo_despues_de_vaciar_el_cache(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Carrera.objects.create(nombre='Medicina', codigo='MED01', duracion_anios=6)
+        trabajo_id = TrabajoReporteService.solicitar('general')
+        cache.clear()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Carrera.objects.create(nombre='Derecho', codigo='DER01', duracion_anios=5)
+
+        nuevo_id = TrabajoReporteService.solicitar('general')
+        self.assertNotEqual(nuevo_id, trabajo_id)
+        self.assertEqual(TrabajoReporteService.obtener(nuevo_id)['resultado']['total_carreras'], 3)
+
+    def test_trabajo_vencido_se_vuelve_a_generar(self):
+        trabajo_id = TrabajoReporteService.solicitar('general')
+        TrabajoReporte.objects.update(vence=timezone.now(), resultado=None)
+
+        self.assertIsNone(TrabajoReporteService.obtener(trabajo_id))
+        self.assertEqual(TrabajoReporteService.solicitar('general'), trabajo_id)
+        self.assertEqual(TrabajoReporteService.obtener(trabajo_id)['resultado']['total_carreras'], 1)
+
+    def test_reconstruir_estadisticas_descarta_la_serie_guardada(self):
+        hoy = timezone.localdate()
+        materia = crear_materia(Carrera.objects.get())
+        EstadisticaDiaria.objects.create(fecha=hoy, materia=materia, carrera=materia.carrera, altas=5, activos=5)
+        trabajo_id = TrabajoReporteService.solicitar('serie_inscripciones', desde=hoy, hasta=hoy)
+        self.assertEqual(TrabajoReporteService.obtener(trabajo_id)['resultado'][0]['altas'], 5)
+
+        call_command('recalcular_estadisticas_diarias', stdout=StringIO())
+
+        trabajo_id = TrabajoReporteService.solicitar('serie_inscripciones', desde=hoy, hasta=hoy)
+        self.assertEqual(TrabajoReporteService.obtener(trabajo_id)['resultado'], [])
+
+
+class BusquedaServiceTest(CarreraMateriaMixin, TestCase):
+    cupo_maximo = 2
+
+    def setUp(self):
+        super().setUp()
+        self.alumno = crear_alumno(self.carrera, first_name='Ana', last_name='Gómez')
+
+    def buscar(self, modelo, termino, **rutas):
+        return list(modelo.objects.filter(BusquedaService.filtro(termino, **rutas)))
+
+    def test_indice_sigue_los_cambios(self):
+        self.assertTrue(BusquedaService.disponible())
+        self.assertEqual(self.buscar(Materia, 'gramac', pk='materia'), [self.materia])
+
+        self.materia.nombre = 'Algoritmos'
+        self.materia.save()
+        self.assertEqual(self.buscar(Materia, 'gramac', pk='materia'), [])
+        self.assertEqual(self.buscar(Materia, 'ALGO', pk='materia'), [self.materia])
+
+        Materia.objects.filter(pk=self.materia.pk).delete()
+        self.assertEqual(self.buscar(Materia, 'algo', pk='materia'), [])
+
+    def test_busqueda_por_relaciones_y_terminos_cortos(self):
+        InscripcionService.inscribir_alumno(self.alumno.id, self.materia.id)
+        rutas = {'alumno__usuario': 'usuario', 'alumno': 'alumno', 'materia': 'materia'}
+
+        for termino in ('ómez', '111', '00001', 'PRO1', 'An'):
+            self.assertEqual(len(self.buscar(Inscripcion, termino, **rutas)), 1, termino)
+        self.assertEqual(self.buscar(Inscripcion, 'inexistente', **rutas), [])
+
+    def test_sin_acentos_ni_mayusculas(self):
+        self.assertEqual(self.alumno.usuario.last_name_normalizado, 'gomez')
+        for termino in ('GOMEZ', 'gómez', 'Go', 'an'):
+            self.assertEqual(len(self.buscar(Usuario, termino, pk='usuario')), 1, termino)
+        # Los términos cortos buscan por prefijo
+        self.assertEqual(self.buscar(Usuario, 'ez', pk='usuario'), [])
+
+        usuario = self.alumno.usuario
+        usuario.last_name = 'Martínez'
+        usuario.save(update_fields=['last_name'])
+        self.assertEqual(len(self.buscar(Usuario, 'martinez', pk='usuario')), 1)
+
+    def test_reconstruir(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM busqueda_usuario')
+        self.assertEqual(self.buscar(Usuario, 'Gómez', pk='usuario'), [])
+
+        BusquedaService.reconstruir(['usuario'])
+        self.assertEqual(len(self.buscar(Usuario, 'Gómez', pk='usuario')), 1)
+
+
+class PaginacionKeysetTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(crear_admin(last_name='Admin'))
+        # Apellidos repetidos para que el desempate por pk entre en juego
+        for i in range(24):
+            Usuario.objects.create(
+                username=f'4000{i:04d}', email=f'u{i}@test.edu.ar', password='!',
+                first_name='Ana', last_name=['Gómez', 'Pérez'][i % 2], is_active=i % 3 != 0,
+            )
+        self.url = reverse('usuario_list')
+
+    def recorrer(self, params, cursor_attr, cursor=None):
+        paginas = []
+        while True:
+            response = self.client.get(self.url, {**params, **({'cursor': cursor} if cursor else {})})
+            paginas.append([usuario.pk for usuario in response.context['usuarios']])
+            cursor = getattr(response.context['page_obj'], cursor_attr)
+            if cursor is None:
+                return paginas, response
+
+    def test_recorre_hacia_adelante_y_atras_sin_repetir(self):
+        esperado = list(
+            Usuario.objects.filter(is_active=True).order_by('last_name', 'first_name', 'pk').values_list('pk', flat=True)
+        )
+
+        paginas, response = self.recorrer({'estado': 'activo'}, 'cursor_siguiente')
+        self.assertEqual([pk for pagina in paginas for pk in pagina], esperado)
+        self.assertEqual([len(pagina) for pagina in paginas], [10, 7])
+        self.assertEqual(response.context['page_obj'].paginator.total, len(esperado))
+        # Los links conservan el filtro
+        self.assertEqual(response.context['filtros_query'], 'estado=activo')
+
+        paginas, _ = self.recorrer({'estado': 'activo'}, 'cursor_anterior', response.context['cursor_ultima'])
+        self.assertEqual([pk for pagina in reversed(paginas) for pk in pagina], esperado)
+        self.assertEqual([len(pagina) for pagina in paginas], [10, 7])
+
+    def test_cursor_invalido_vuelve_a_la_primera_pagina(self):
+        primera = self.client.get(self.url).context['usuarios']
+        response = self.client.get(self.url, {'cursor': 'alterado'})
+        self.assertEqual(list(response.context['usuarios']), list(primera))
+        self.assertFalse(response.context['page_obj'].has_previous())
+
+    def test_cursor_de_otro_listado_vuelve_a_la_primera_pagina(self):
+        cursor = self.client.get(self.url).context['page_obj'].cursor_siguiente
+
+        response = self.client.get(reverse('inscripcion_list'), {'cursor': cursor})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['page_obj'].has_previous())
+
+    def test_cursor_con_valores_invalidos_vuelve_a_la_primera_pagina(self):
+        primera = list(self.client.get(self.url).context['usuarios'])
+        sal = UsuarioListView()._sal(Usuario)
+        for valores in ([None], [None, None, None], ['Gómez', 'Ana', 'x'], 'Gómez'):
+            cursor = signing.dumps({'v': valores, 'atras': False}, salt=sal, compress=True)
+            response = self.client.get(self.url, {'cursor': cursor})
+            self.assertEqual(list(response.context['usuarios']), primera, valores)
+
+        # Misma sal que el listado de inscripciones, pero con un texto como fecha
+        sal = InscripcionListView()._sal(Inscripcion)
+        cursor = signing.dumps({'v': ['Gómez', 1], 'atras': False}, salt=sal, compress=True)
+        response = self.client.get(reverse('inscripcion_list'), {'cursor': cursor})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['page_obj'].has_previous())
+
+
+class PlanConsultasTest(CarreraMateriaMixin, TestCase):
+    """
+    Pasa por EXPLAIN QUERY PLAN cada consulta de las vistas y servicios de
+    uso frecuente y falla si alguna recorre completa una tabla que crece con
+    los alumnos: sin índice, o caminando un índice entero mientras filtra por
+    columnas que el índice no tiene. Carrera y las tablas de auth son
+    catálogos chicos y pueden recorrerse.
+    """
+    TABLAS_GRANDES = {'inscripcion_inscripcion', 'alumno_alumno', 'materia_materia', 'usuario_usuario'}
+    # Totales que recorren la tabla a propósito y quedan en cache hasta
+    # la próxima escritura: (clase, método)
+    TOTALES = [(EstadisticasService, 'contar'), (ReportesService, '_contar')]
+
+    def setUp(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Los planes se leen con EXPLAIN QUERY PLAN de SQLite')
+        super().setUp()
+        self.alumno = crear_alumno(self.carrera, first_name='Ana', last_name='Gómez')
+        InscripcionService.inscribir_alumno(self.alumno.id, self.materia.id)
+        self.admin = crear_admin()
+
+    def columnas_indice(self, indice):
+        """Columnas del índice más las de su condición, si es parcial"""
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA index_info("{indice}")')
+            columnas = {fila[2] for fila in cursor.fetchall()}
+            cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'index' AND name = %s", [indice])
+            fila = cursor.fetchone()
+        if fila and fila[0] and ' WHERE ' in fila[0]:
+            columnas |= set(re.findall(r'"(\w+)"', fila[0].split(' WHERE ', 1)[1]))
+        return columnas
+
+    def recorridos_completos(self, sql, params):
+        # Django usa alias (U0, T3) para subconsultas y joins repetidos
+        alias = dict((a, t) for t, a in re.findall(r'"(\w+)" (?:AS )?"?([A-Z]\d+)\b', sql))
+        filtros = ' '.join(re.findall(r' WHERE (.*?)(?= ORDER BY | GROUP BY | LIMIT |\)*$)', sql))
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            detalles = [fila[-1] for fila in cursor.fetchall()]
+        recorridos = []
+        for detalle in detalles:
+            m = re.fullmatch(r'SCAN (\w+)(?: USING (?:COVERING )?INDEX (\w+))?', detalle)
+            if not m or alias.get(m[1], m[1]) not in self.TABLAS_GRANDES:
+                continue
+            if m[2] is None:
+                recorridos.append(detalle)
+                continue
+            # Caminar el índice sirve para el ORDER BY ... LIMIT, salvo que
+            # además se filtre por columnas que no están en el índice
+            filtradas = set(re.findall(rf'"{m[1]}"\."(\w+)"', filtros))
+            if filtradas - self.columnas_indice(m[2]):
+                recorridos.append(detalle)
+        return recorridos
+
+    @staticmethod
+    def evaluar(servicio, *args):
+        # Los querysets tienen que ejecutarse dentro de la captura
+        resultado = servicio(*args)
+        if isinstance(resultado, QuerySet):
+            list(resultado)
+
+    def descargar(self, url, parametros):
+        # Las exportaciones consultan mientras se consume el CSV
+        b''.join(self.client.get(url, parametros).streaming_content)
+
+    def assertSinRecorridosCompletos(self, nombre, funcion, *args, cantidad=None):
+        """cantidad: si se indica, cantidad exacta de consultas esperada"""
+        cache.clear()
+        ejecutadas = []
+        en_total = []
+
+        def registrar(execute, sql, params, many, context):
+            ejecutadas.append((sql, params, bool(en_total)))
+            return execute(sql, params, many, context)
+
+        def marcar(metodo):
+            def envoltura(*args, **kwargs):
+                en_total.append(True)
+                try:
+                    return metodo(*args, **kwargs)
+                finally:
+                    en_total.pop()
+            return staticmethod(envoltura)
+
+        with ExitStack() as pila:
+            for clase, metodo in self.TOTALES:
+                pila.enter_context(mock.patch.object(clase, metodo, marcar(getattr(clase, metodo))))
+            pila.enter_context(connection.execute_wrapper(registrar))
+            funcion(*args)
+        if cantidad is not None:
+            with self.subTest(nombre):
+                self.assertEqual(len(ejecutadas), cantidad, [sql for sql, _, _ in ejecutadas])
+        for sql, params, total in ejecutadas:
+            if total or not sql.startswith('SELECT'):
+                continue
+            with self.subTest(nombre, sql=sql):
+                self.assertEqual(self.recorridos_completos(sql, params), [])
+
+    def test_servicios(self):
+        servicios = [
+            ('inscripciones del alumno', InscripcionService.obtener_inscripciones_alumno, self.alumno.id),
+            ('alumnos de la materia', InscripcionService.obtener_alumnos_materia, self.materia.id),
+            ('alumnos por carrera', AlumnoService.obtener_alumnos_por_carrera, self.carrera.id),
+            ('cohorte', AlumnoService.obtener_ids_cohorte, self.carrera.id),
+            ('materias por carrera', MateriaService.obtener_materias_por_carrera, self.carrera.id),
+            ('oferta de la carrera', MateriaService.obtener_oferta_json, self.carrera.id),
+            ('materias con cupo', MateriaService.obtener_materias_con_cupo, self.carrera.id),
+            ('inscripciones del día', ReportesService.inscripciones_del_dia),
+            ('reporte general', ReportesService.reporte_general),
+            ('serie de inscripciones', ReportesService.serie_inscripciones, timezone.localdate(), timezone.localdate()),
+        ]
+        for nombre, servicio, *args in servicios:
+            self.assertSinRecorridosCompletos(nombre, self.evaluar, servicio, *args)
+
+    def test_vistas_de_administracion(self):
+        self.client.force_login(self.admin)
+        vistas = [
+            ('dashboard', {}),
+            ('inscripcion_list', {}),
+            ('inscripcion_list', {'estado': 'activa', 'search': 'Gómez'}),
+            ('inscripcion_list', {'search': 'Gó'}),
+            ('alumno_list', {'carrera': self.carrera.id, 'estado': 'activo'}),
+            ('usuario_list', {'estado': 'activo'}),
+            ('materia_list', {'carrera': self.carrera.id}),
+            ('ajax_alumnos', {'q': 'Ana'}),
+            ('ajax_materias', {'carrera': self.carrera.id}),
+            ('materias_con_cupo', {'carrera': self.carrera.id}),
+            ('materias_publicas', {'carrera': self.carrera.id}),
+        ]
+        for nombre, parametros in vistas:
+            self.assertSinRecorridosCompletos(nombre, self.client.get, reverse(nombre), parametros)
+
+    def test_reportes_exportaciones_y_lote(self):
+        self.client.force_login(self.admin)
+        otra = crear_materia(self.carrera, nombre='Análisis I', codigo='ANA101')
+        # (nombre, consultas esperadas, función, *args), con el cache vacío
+        casos = [
+            ('ocupación por celda', 2, ReportesService.ocupacion_por_celda),
+            ('mapa de ocupación', 2, lambda: ReportesService.mapa_ocupacion(ReportesService.ocupacion_por_celda())),
+            ('materias con cupo por carrera', 2, ReportesService.materias_con_cupo_por_carrera, self.carrera.id),
+            ('reportes', 10, self.client.get, reverse('reportes')),
+            ('ocupación json', 6, self.client.get, reverse('reporte_ocupacion_json')),
+            ('exportar alumnos', 5, self.descargar, reverse('alumno_exportar'), {'carrera': self.carrera.id}),
+            ('exportar materias', 5, self.descargar, reverse('materia_exportar'), {'search': 'PRO'}),
+            ('exportar inscripciones', 5, self.descargar, reverse('inscripcion_exportar'), {'estado': 'activa'}),
+            ('inscripción en lote', 13, InscripcionService.inscribir_lote, [self.alumno.id], [otra.id]),
+        ]
+        for nombre, cantidad, funcion, *args in casos:
+            self.assertSinRecorridosCompletos(nombre, funcion, *args, cantidad=cantidad)
+
+    def test_vistas_del_alumno(self):
+        self.alumno.usuario.groups.add(Group.objects.create(name='Alumnos'))
+        self.client.force_login(self.alumno.usuario)
+        for nombre in ('dashboard', 'mis_materias', 'oferta_academica'):
+            self.assertSinRecorridosCompletos(nombre, self.client.get, reverse(nombre))
@@ -0,0 +1,35 @@
+"""
+Normalización de texto para búsquedas: sin mayúsculas ni acentos.
+"""
+import unicodedata
+
+
+def normalizar(texto):
+    """
+    Pasa el texto a minúsculas y le quita los acentos, diéresis y la
+    tilde de la eñe ("Martínez" -> "martinez", "Núñez" -> "nunez"), así
+    un término escrito con o sin ellos encuentra lo mismo.
+    """
+    if not texto:
+        return ''
+    descompuesto = unicodedata.normalize('NFD', texto.casefold())
+    return ''.join(caracter for caracter in descompuesto if unicodedata.category(caracter) != 'Mn')
+
+
+class CamposNormalizadosMixin:
+    """
+    Mixin de modelos que mantiene, al guardar, una columna
+    <campo>_normalizado por cada campo de campos_normalizados.
+    """
+    campos_normalizados = ()
+
+    def save(self, *args, **kwargs):
+        for campo in self.campos_normalizados:
+            setattr(self, f'{campo}_normalizado', normalizar(getattr(self, campo)))
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, *(
+                f'{campo}_normalizado' for campo in self.campos_normalizados if campo in update_fields
+            )}
+        super().save(*args, **kwargs)
@@ -16,6 +16,8 @@ urlpatterns = [
     path('mis-materias/', views.MisMateriaView.as_view(), name='mis_materias'),
     path('oferta-academica/', views.OfertaAcademicaView.as_view(), name='oferta_academica'),
     path('inscribirse/<int:materia_id>/', views.InscribirseView.as_view(), name='inscribirse'),
+    path('lista-espera/<int:pk>/salir/', views.ListaEsperaBajaView.as_view(), name='lista_espera_baja'),
+    path('solicitudes/<int:pk>/', views.SolicitudInscripcionView.as_view(), name='solicitud_inscripcion'),
     
     # Vistas para invitados
     path('carreras-publicas/', views.CarrerasPublicasView.as_view(), name='carreras_publicas'),
@@ -28,4 +30,8 @@ urlpatterns = [
     
     # Reportes
     path('reportes/', views.ReportesView.as_view(), name='reportes'),
+    path('reportes/trabajos/solicitar/<str:nombre>/', views.ReporteTrabajoSolicitarView.as_view(), name='reporte_trabajo_solicitar'),
+    path('reportes/trabajos/<str:trabajo_id>/', views.ReporteTrabajoView.as_view(), name='reporte_trabajo'),
+    path('reportes/trabajos/<str:trabajo_id>/<str:formato>/', views.ReporteTrabajoDescargaView.as_view(), name='reporte_trabajo_descarga'),
+    path('reportes/ocupacion.json', views.OcupacionJSONView.as_view(), name='reporte_ocupacion_json'),
 ]
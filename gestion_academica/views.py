@@ -1,20 +1,30 @@
+from datetime import date, timedelta
+
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.forms import PasswordChangeForm
 from django.contrib.auth import update_session_auth_hash
 from django.contrib import messages
-from django.shortcuts import redirect, render
+from django.conf import settings
+from django.http import Http404, HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.utils import timezone
 from django.views import View
 from django.views.generic import TemplateView
 from django.core.exceptions import ValidationError
 
 from carrera.models import Carrera
-from inscripcion.models import Inscripcion
-from inscripcion.services import InscripcionService
+from inscripcion.models import Inscripcion, SolicitudInscripcion
+from inscripcion.services import (
+    EnListaEspera, InscripcionService, ListaEsperaService, SolicitudInscripcionService
+)
 from materia.models import Materia
 from materia.services import MateriaService
+from materia.views import MateriasConCupoView  # noqa: F401 (usada en urls)
+from usuario.services import AutorizacionService
 from usuario.views import AdminRequiredMixin, AlumnoRequiredMixin
 
-from .services import ReportesService
+from .catalogo import CatalogoPublicoMixin
+from .services import ReportesService, TrabajoReporteService
 from .forms import FiltroMateriaForm
 
 class DashboardView(LoginRequiredMixin, TemplateView):
@@ -32,9 +42,9 @@ class DashboardView(LoginRequiredMixin, TemplateView):
         
         context['user'] = user
         
-        if user.groups.filter(name='Administradores').exists():
+        if AutorizacionService.tiene_grupo(user, 'Administradores'):
             context['stats'] = ReportesService.reporte_general()
-        elif user.groups.filter(name='Alumnos').exists():
+        elif AutorizacionService.es_alumno(user):
             try:
                 alumno = user.alumno
                 context['alumno'] = alumno
@@ -80,8 +90,10 @@ class CambiarPasswordPrimerLoginView(LoginRequiredMixin, AlumnoRequiredMixin, Vi
         return render(request, self.template_name, {'form': form})
 
 
-class CarrerasPublicasView(TemplateView):
+class CarrerasPublicasView(CatalogoPublicoMixin, TemplateView):
     template_name = 'gestion_academica/publico/carreras.html'
+    fragmento_template_name = 'gestion_academica/publico/carreras_catalogo.html'
+    modelos_catalogo = (Carrera,)
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -89,14 +101,17 @@ class CarrerasPublicasView(TemplateView):
         return context
 
 
-class MateriasPublicasView(TemplateView):
+class MateriasPublicasView(CatalogoPublicoMixin, TemplateView):
     template_name = 'gestion_academica/publico/materias.html'
+    fragmento_template_name = 'gestion_academica/publico/materias_catalogo.html'
+    modelos_catalogo = (Carrera, Materia)
+    parametros_catalogo = ('carrera',)
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
         carrera_id = self.request.GET.get('carrera')
-        materias = Materia.objects.filter(activa=True).select_related('carrera')
+        materias = Materia.objects.filter(activa=True).select_related('carrera').with_ocupacion()
         
         if carrera_id:
             materias = materias.filter(carrera_id=carrera_id)
@@ -137,57 +152,105 @@ class AlumnosPorMateriaView(LoginRequiredMixin, TemplateView):
         if materia_id:
             try:
                 context['inscripciones'] = InscripcionService.obtener_alumnos_materia(materia_id)
-                context['materia_seleccionada'] = Materia.objects.get(id=materia_id)
+                context['materia_seleccionada'] = Materia.objects.with_ocupacion().get(id=materia_id)
             except ValidationError as e:
                 messages.error(self.request, str(e))
         
-        context['materias'] = Materia.objects.filter(activa=True).select_related('carrera')
+        context['materias'] = Materia.objects.filter(activa=True).select_related('carrera').with_ocupacion()
         
         return context
 
 
-class MateriasConCupoView(TemplateView):
-    template_name = 'gestion_academica/publico/materias_con_cupo.html'
+class ReportesView(AdminRequiredMixin, TemplateView):
+    template_name = 'gestion_academica/reportes/general.html'
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        materias = MateriaService.obtener_materias_con_cupo()
-        
-        # Aplicar filtros
-        carrera_id = self.request.GET.get('carrera')
-        anio = self.request.GET.get('anio')
-        cuatrimestre = self.request.GET.get('cuatrimestre')
-        
-        if carrera_id:
-            materias = [m for m in materias if str(m.carrera.id) == carrera_id]
-        
-        if anio:
-            materias = [m for m in materias if str(m.año) == anio]
-        
-        if cuatrimestre:
-            materias = [m for m in materias if str(m.cuatrimestre) == cuatrimestre]
-        
-        context['materias'] = materias
+        carrera_id = self.request.GET.get('carrera', '')
+        anio = self.request.GET.get('anio', '')
+        carrera_id = carrera_id if carrera_id.isdigit() else ''
+        anio = anio if anio.isdigit() else ''
+
+        context['reporte'] = ReportesService.reporte_general()
+        context['materias_por_carrera'] = ReportesService.materias_con_cupo_por_carrera(
+            carrera_id=carrera_id, anio=anio
+        )
+        context['filtro_carrera'] = carrera_id
+        context['filtro_anio'] = anio
         context['carreras'] = Carrera.objects.filter(activa=True)
-        context['filtro_carrera'] = carrera_id or ''
-        context['filtro_anio'] = anio or ''
-        context['filtro_cuatrimestre'] = cuatrimestre or ''
-        
-        # Calcular total de cupos disponibles
-        context['total_cupos_disponibles'] = sum(m.cupo_disponible for m in materias)
-        
+        context['mapa_ocupacion'] = ReportesService.mapa_ocupacion(ReportesService.ocupacion_por_celda())
         return context
 
 
-class ReportesView(AdminRequiredMixin, TemplateView):
-    template_name = 'gestion_academica/reportes/general.html'
-    
+class ReporteTrabajoSolicitarView(AdminRequiredMixin, View):
+    """Encola la generación de un reporte y redirige a su estado"""
+
+    def post(self, request, nombre):
+        parametros = {}
+        if nombre == 'serie_inscripciones':
+            try:
+                hasta = date.fromisoformat(request.POST.get('hasta') or timezone.localdate().isoformat())
+                desde = date.fromisoformat(request.POST.get('desde') or (hasta - timedelta(days=30)).isoformat())
+            except ValueError:
+                messages.error(request, 'Las fechas deben tener el formato AAAA-MM-DD.', extra_tags='danger')
+                return redirect('reportes')
+            carrera_id = request.POST.get('carrera', '')
+            parametros = {
+                'desde': desde,
+                'hasta': hasta,
+                'carrera_id': int(carrera_id) if carrera_id.isdigit() else None,
+            }
+        try:
+            trabajo_id = TrabajoReporteService.solicitar(nombre, **parametros)
+        except ValidationError as e:
+            messages.error(request, str(e.message), extra_tags='danger')
+            return redirect('reportes')
+        return redirect('reporte_trabajo', trabajo_id=trabajo_id)
+
+
+class ReporteTrabajoView(AdminRequiredMixin, TemplateView):
+    """Estado de un reporte en segundo plano; la página se recarga hasta que termina"""
+    template_name = 'gestion_academica/reportes/trabajo.html'
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['reporte'] = ReportesService.reporte_general()
-        context['materias_por_carrera'] = ReportesService.materias_con_cupo_por_carrera()
+        trabajo = TrabajoReporteService.obtener(self.kwargs['trabajo_id'])
+        if trabajo is None:
+            raise Http404('El reporte no existe o ya expiró')
+        context['trabajo'] = trabajo
+        context['finalizado'] = trabajo['estado'] != TrabajoReporteService.PENDIENTE
         return context
 
+
+class ReporteTrabajoDescargaView(AdminRequiredMixin, View):
+    """Descarga el resultado de un reporte terminado en JSON o CSV"""
+
+    def get(self, request, trabajo_id, formato):
+        trabajo = TrabajoReporteService.obtener(trabajo_id)
+        if formato not in ('json', 'csv'):
+            raise Http404('Formato no soportado')
+        if trabajo is None or trabajo['estado'] != TrabajoReporteService.LISTO:
+            raise Http404('El reporte no existe, no terminó o ya expiró')
+
+        nombre_archivo = f"reporte_{trabajo['nombre']}"
+        if formato == 'csv':
+            response = HttpResponse(
+                TrabajoReporteService.como_csv(trabajo['resultado']),
+                content_type='text/csv; charset=utf-8',
+            )
+            response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}.csv"'
+        else:
+            response = JsonResponse(trabajo['resultado'], safe=False)
+            response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}.json"'
+        return response
+
+
+class OcupacionJSONView(AdminRequiredMixin, View):
+    """Ocupación por carrera, año y cuatrimestre en formato JSON"""
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse({'celdas': ReportesService.ocupacion_por_celda()})
+
 class MisMateriaView(AlumnoRequiredMixin, TemplateView):
     """Vista para que el alumno vea sus materias"""
     template_name = 'gestion_academica/alumno/mis_materias.html'
@@ -204,6 +267,7 @@ class MisMateriaView(AlumnoRequiredMixin, TemplateView):
             alumno = self.request.user.alumno
             context['alumno'] = alumno
             context['inscripciones'] = InscripcionService.obtener_inscripciones_alumno(alumno.id)
+            context['listas_espera'] = ListaEsperaService.obtener_listas_alumno(alumno.id)
         except:
             messages.error(self.request, 'No se encontró información del alumno.')
         
@@ -225,11 +289,19 @@ class OfertaAcademicaView(AlumnoRequiredMixin, TemplateView):
         try:
             alumno = self.request.user.alumno
             context['alumno'] = alumno
-            context['materias'] = MateriaService.obtener_materias_por_carrera(alumno.carrera.id)
+            # Oferta de la carrera, cacheada y compartida por todos sus alumnos
+            materias = MateriaService.obtener_oferta_carrera(alumno.carrera_id)
+            context['materias'] = materias
             
-            # Materias en las que ya está inscripto
-            inscripciones = Inscripcion.objects.filter(alumno=alumno, activa=True)
-            context['materias_inscripto'] = [i.materia.id for i in inscripciones]
+            # Materias en las que ya está inscripto: lo único propio del alumno
+            materias_inscripto = set(Inscripcion.objects.filter(
+                alumno=alumno, activa=True
+            ).values_list('materia_id', flat=True))
+            context['materias_inscripto'] = materias_inscripto
+            context['materias_disponibles'] = sum(
+                1 for m in materias if m.id not in materias_inscripto and m.tiene_cupo
+            )
+            context['materias_sin_cupo'] = sum(1 for m in materias if not m.tiene_cupo)
             
         except Exception as e:
             messages.error(self.request, 'No se pudo cargar la oferta académica.')
@@ -240,10 +312,14 @@ class OfertaAcademicaView(AlumnoRequiredMixin, TemplateView):
 class InscribirseView(AlumnoRequiredMixin, View):
     """Vista para que el alumno se inscriba a una materia"""
     def post(self, request, materia_id):
+        if getattr(settings, 'INSCRIPCION_MODO_RAFAGA', False):
+            return self.encolar(request, materia_id)
         try:
             alumno = request.user.alumno
-            inscripcion = InscripcionService.inscribir_alumno(alumno.id, materia_id)
+            inscripcion = InscripcionService.inscribir_alumno(alumno.id, materia_id, lista_espera=True)
             messages.success(request, f'Te has inscripto exitosamente a {inscripcion.materia.nombre}.')
+        except EnListaEspera as e:
+            messages.warning(request, str(e.message))
         except ValidationError as e:
             messages.error(request, str(e.message), extra_tags='danger')
         except Exception as e:
@@ -251,3 +327,40 @@ class InscribirseView(AlumnoRequiredMixin, View):
         
         return redirect('oferta_academica')
 
+
+    def encolar(self, request, materia_id):
+        """Modo ráfaga: registra el pedido y deriva a la página de estado"""
+        try:
+            solicitud = SolicitudInscripcionService.encolar(request.user.alumno.id, materia_id)
+        except Exception:
+            messages.error(request, 'Error al procesar la inscripción.')
+            return redirect('oferta_academica')
+        messages.info(request, 'Tu pedido de inscripción fue recibido y está en cola.')
+        return redirect('solicitud_inscripcion', pk=solicitud.pk)
+
+
+class SolicitudInscripcionView(AlumnoRequiredMixin, TemplateView):
+    """Vista para que el alumno siga el estado de un pedido encolado"""
+    template_name = 'gestion_academica/alumno/solicitud_inscripcion.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        solicitud = get_object_or_404(
+            SolicitudInscripcion.objects.select_related('materia'),
+            pk=self.kwargs['pk'],
+            alumno__usuario=self.request.user
+        )
+        context['solicitud'] = solicitud
+        context['posicion'] = SolicitudInscripcionService.posicion_en_cola(solicitud)
+        return context
+
+
+class ListaEsperaBajaView(AlumnoRequiredMixin, View):
+    """Vista para que el alumno salga de una lista de espera"""
+    def post(self, request, pk):
+        try:
+            ListaEsperaService.quitar(pk, request.user.alumno.id)
+            messages.success(request, 'Saliste de la lista de espera.')
+        except ValidationError as e:
+            messages.error(request, str(e.message), extra_tags='danger')
+        return redirect('mis_materias')
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from inscripcion.models import Inscripcion
+from inscripcion.models import EstadisticaDiaria, Inscripcion, ListaEspera, SolicitudInscripcion
 
 # Register your models here.
 
@@ -10,4 +10,28 @@ class InscripcionAdmin(admin.ModelAdmin):
     search_fields = ('alumno__nombre_completo', 'materia__nombre')
     ordering = ('-fecha_inscripcion',)
 
-admin.site.register(Inscripcion, InscripcionAdmin)
\ No newline at end of file
+admin.site.register(Inscripcion, InscripcionAdmin)
+
+class SolicitudInscripcionAdmin(admin.ModelAdmin):
+    list_display = ('alumno', 'materia', 'estado', 'fecha_solicitud', 'fecha_proceso')
+    list_filter = ('estado', 'materia__carrera')
+    ordering = ('fecha_solicitud', 'id')
+
+admin.site.register(SolicitudInscripcion, SolicitudInscripcionAdmin)
+
+
+class ListaEsperaAdmin(admin.ModelAdmin):
+    list_display = ('materia', 'posicion', 'alumno', 'fecha_alta')
+    list_filter = ('materia__carrera',)
+    ordering = ('materia', 'posicion')
+
+admin.site.register(ListaEspera, ListaEsperaAdmin)
+
+
+class EstadisticaDiariaAdmin(admin.ModelAdmin):
+    list_display = ('fecha', 'materia', 'carrera', 'altas', 'bajas', 'activos')
+    list_filter = ('carrera', 'fecha')
+    date_hierarchy = 'fecha'
+    ordering = ('-fecha', 'materia')
+
+admin.site.register(EstadisticaDiaria, EstadisticaDiariaAdmin)
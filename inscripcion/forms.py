@@ -1,7 +1,52 @@
 from django import forms
 from django.core.exceptions import ValidationError
+from django.forms.models import ModelChoiceIteratorValue
+from django.urls import reverse
+from carrera.models import Carrera
 from .models import Materia, Alumno, Inscripcion
 
+class AutocompleteSelect(forms.Select):
+    """
+    Select que sólo renderiza la opción elegida: el resto de las opciones
+    las pide el formulario al endpoint url_name a medida que se escribe,
+    así la página no depende de la cantidad de registros
+    """
+
+    def __init__(self, url_name, attrs=None):
+        super().__init__(attrs)
+        self.url_name = url_name
+
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        attrs = super().build_attrs(base_attrs, extra_attrs)
+        attrs['data-autocomplete-url'] = reverse(self.url_name)
+        return attrs
+
+    def optgroups(self, name, value, attrs=None):
+        elegidos = [valor for valor in value if str(valor).isdigit()]
+        opciones = []
+        if self.choices.field.empty_label is not None:
+            opciones.append(self.create_option(name, '', self.choices.field.empty_label, not elegidos, 0))
+        for indice, objeto in enumerate(self.choices.queryset.filter(pk__in=elegidos), start=1):
+            opciones.append(self.create_option(
+                name, ModelChoiceIteratorValue(objeto.pk, objeto),
+                self.choices.field.label_from_instance(objeto), True, indice,
+            ))
+        return [(None, opciones, 0)]
+
+
+class AlumnoSelect(AutocompleteSelect):
+    """
+    Select de alumnos que indica la carrera de cada opción (data-carrera),
+    para que el formulario pida la oferta por carrera y no por alumno
+    """
+
+    def create_option(self, name, value, label, selected, index, subindex=None, attrs=None):
+        option = super().create_option(name, value, label, selected, index, subindex, attrs)
+        if value:
+            option['attrs']['data-carrera'] = value.instance.carrera_id
+        return option
+
+
 class InscripcionForm(forms.ModelForm):
     """
     Formulario para gestionar inscripciones
@@ -15,6 +60,8 @@ class InscripcionForm(forms.ModelForm):
             'observaciones': 'Observaciones',
         }
         widgets = {
+            'alumno': AlumnoSelect('ajax_alumnos'),
+            'materia': AutocompleteSelect('ajax_materias'),
             'observaciones': forms.Textarea(attrs={'rows': 3, 'placeholder': 'Observaciones (opcional)...'}),
         }
 
@@ -29,6 +76,9 @@ class InscripcionForm(forms.ModelForm):
         else:
             self.fields['alumno'].queryset = Alumno.objects.filter(activo=True)
             self.fields['materia'].queryset = Materia.objects.filter(activa=True)
+        # Para el label de la opción elegida
+        self.fields['alumno'].queryset = self.fields['alumno'].queryset.select_related('usuario')
+        self.fields['materia'].queryset = self.fields['materia'].queryset.select_related('carrera')
 
     def clean(self):
         cleaned_data = super().clean()
@@ -49,3 +99,55 @@ class InscripcionForm(forms.ModelForm):
                 raise ValidationError('No hay cupo disponible en esta materia.')
 
         return cleaned_data
+
+
+class InscripcionLoteForm(forms.Form):
+    """
+    Formulario para inscribir una cohorte completa en varias materias
+    """
+    carrera = forms.ModelChoiceField(
+        queryset=Carrera.objects.filter(activa=True),
+        empty_label='Seleccionar carrera',
+        label='Carrera'
+    )
+    materias = forms.ModelMultipleChoiceField(
+        queryset=Materia.objects.none(),
+        widget=forms.CheckboxSelectMultiple,
+        label='Materias'
+    )
+    anio_ingreso = forms.IntegerField(
+        required=False,
+        min_value=1900,
+        label='Año de Ingreso',
+        help_text='Opcional: limita la cohorte a los alumnos ingresados ese año'
+    )
+    legajos = forms.CharField(
+        required=False,
+        widget=forms.Textarea(attrs={'rows': 4, 'placeholder': 'Un legajo por línea (opcional)...'}),
+        label='Legajos',
+        help_text='Opcional: limita la cohorte a los legajos indicados'
+    )
+
+    def __init__(self, *args, **kwargs):
+        carrera_id = kwargs.pop('carrera_id', None)
+        super().__init__(*args, **kwargs)
+
+        if carrera_id:
+            self.fields['materias'].queryset = Materia.objects.filter(
+                carrera_id=carrera_id, activa=True
+            ).order_by('año', 'cuatrimestre', 'nombre')
+
+    def clean_legajos(self):
+        legajos = self.cleaned_data.get('legajos', '')
+        return [l.strip() for l in legajos.replace(',', '\n').splitlines() if l.strip()]
+
+    def clean(self):
+        cleaned_data = super().clean()
+        carrera = cleaned_data.get('carrera')
+        materias = cleaned_data.get('materias')
+
+        if carrera and materias:
+            if any(materia.carrera_id != carrera.id for materia in materias):
+                raise ValidationError('Todas las materias deben pertenecer a la carrera seleccionada.')
+
+        return cleaned_data
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumno', '0003_alter_alumno_legajo'),
+        ('inscripcion', '0001_initial'),
+        ('materia', '0002_inscriptos_activos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SolicitudInscripcion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('procesando', 'Procesando'), ('aceptada', 'Aceptada'), ('rechazada', 'Rechazada')], default='pendiente', max_length=10, verbose_name='Estado')),
+                ('mensaje', models.CharField(blank=True, max_length=255, verbose_name='Mensaje')),
+                ('fecha_solicitud', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Solicitud')),
+                ('fecha_proceso', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de Proceso')),
+                ('alumno', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='solicitudes_inscripcion', to='alumno.alumno', verbose_name='Alumno')),
+                ('inscripcion', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='inscripcion.inscripcion', verbose_name='Inscripción')),
+                ('materia', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='solicitudes_inscripcion', to='materia.materia', verbose_name='Materia')),
+            ],
+            options={
+                'verbose_name': 'Solicitud de Inscripción',
+                'verbose_name_plural': 'Solicitudes de Inscripción',
+                'ordering': ['fecha_solicitud', 'id'],
+                'indexes': [models.Index(fields=['estado', 'fecha_solicitud', 'id'], name='solicitud_cola_idx')],
+            },
+        ),
+    ]
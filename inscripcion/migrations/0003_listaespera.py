@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumno', '0003_alter_alumno_legajo'),
+        ('inscripcion', '0002_solicitudinscripcion'),
+        ('materia', '0002_inscriptos_activos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListaEspera',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posicion', models.PositiveIntegerField(verbose_name='Posición')),
+                ('fecha_alta', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Alta')),
+                ('alumno', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='listas_espera', to='alumno.alumno', verbose_name='Alumno')),
+                ('materia', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lista_espera', to='materia.materia', verbose_name='Materia')),
+            ],
+            options={
+                'verbose_name': 'Lista de Espera',
+                'verbose_name_plural': 'Listas de Espera',
+                'ordering': ['materia', 'posicion'],
+                'constraints': [models.UniqueConstraint(fields=('alumno', 'materia'), name='lista_espera_alumno_materia_unica'), models.UniqueConstraint(fields=('materia', 'posicion'), name='lista_espera_materia_posicion_unica')],
+            },
+        ),
+    ]
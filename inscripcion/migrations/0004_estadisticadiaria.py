@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('carrera', '0001_initial'),
+        ('inscripcion', '0003_listaespera'),
+        ('materia', '0002_inscriptos_activos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticaDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('altas', models.PositiveIntegerField(default=0, verbose_name='Altas')),
+                ('bajas', models.PositiveIntegerField(default=0, verbose_name='Bajas')),
+                ('activos', models.PositiveIntegerField(default=0, verbose_name='Activos')),
+                ('carrera', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='estadisticas_diarias', to='carrera.carrera', verbose_name='Carrera')),
+                ('materia', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='estadisticas_diarias', to='materia.materia', verbose_name='Materia')),
+            ],
+            options={
+                'verbose_name': 'Estadística Diaria',
+                'verbose_name_plural': 'Estadísticas Diarias',
+                'ordering': ['-fecha', 'materia'],
+                'indexes': [models.Index(fields=['fecha', 'carrera'], name='estadistica_fecha_carrera_idx')],
+                'constraints': [models.UniqueConstraint(fields=('fecha', 'materia'), name='estadistica_diaria_fecha_materia_unica')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumno', '0005_indices_consultas'),
+        ('inscripcion', '0004_estadisticadiaria'),
+        ('materia', '0003_campos_normalizados'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inscripcion',
+            index=models.Index(fields=['materia', 'activa'], name='inscripcion_materia_activa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inscripcion',
+            index=models.Index(condition=models.Q(('activa', True)), fields=['alumno'], name='inscripcion_alumno_activa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inscripcion',
+            index=models.Index(fields=['fecha_inscripcion', 'id'], name='inscripcion_fecha_idx'),
+        ),
+    ]
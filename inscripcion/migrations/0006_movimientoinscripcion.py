@@ -0,0 +1,50 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:28
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def cargar_historial(apps, schema_editor):
+    # Las inscripciones previas sólo conservan la última alta y baja
+    Inscripcion = apps.get_model('inscripcion', 'Inscripcion')
+    MovimientoInscripcion = apps.get_model('inscripcion', 'MovimientoInscripcion')
+    movimientos = []
+    for inscripcion in Inscripcion.objects.values('id', 'materia_id', 'fecha_inscripcion', 'fecha_baja').iterator():
+        movimientos.append(MovimientoInscripcion(
+            inscripcion_id=inscripcion['id'], materia_id=inscripcion['materia_id'],
+            tipo='alta', fecha=inscripcion['fecha_inscripcion'],
+        ))
+        if inscripcion['fecha_baja']:
+            movimientos.append(MovimientoInscripcion(
+                inscripcion_id=inscripcion['id'], materia_id=inscripcion['materia_id'],
+                tipo='baja', fecha=inscripcion['fecha_baja'],
+            ))
+    MovimientoInscripcion.objects.bulk_create(movimientos, batch_size=500)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inscripcion', '0005_indices_consultas'),
+        ('materia', '0004_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovimientoInscripcion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('alta', 'Alta'), ('baja', 'Baja')], max_length=4, verbose_name='Tipo')),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha')),
+                ('inscripcion', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='movimientos', to='inscripcion.inscripcion', verbose_name='Inscripción')),
+                ('materia', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movimientos_inscripcion', to='materia.materia', verbose_name='Materia')),
+            ],
+            options={
+                'verbose_name': 'Movimiento de Inscripción',
+                'verbose_name_plural': 'Movimientos de Inscripción',
+                'ordering': ['fecha', 'id'],
+                'indexes': [models.Index(fields=['fecha', 'materia'], name='movimiento_fecha_materia_idx')],
+            },
+        ),
+        migrations.RunPython(cargar_historial, migrations.RunPython.noop),
+    ]
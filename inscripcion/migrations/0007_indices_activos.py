@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumno', '0005_indices_consultas'),
+        ('inscripcion', '0006_movimientoinscripcion'),
+        ('materia', '0004_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inscripcion',
+            index=models.Index(condition=models.Q(('activa', True)), fields=['fecha_inscripcion', 'id'], name='inscripcion_activa_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:51
+
+from django.db import migrations, models
+
+
+def rechazar_duplicadas(apps, schema_editor):
+    # De los pedidos en curso repetidos sólo sigue en la cola el más antiguo
+    SolicitudInscripcion = apps.get_model('inscripcion', 'SolicitudInscripcion')
+    en_curso = SolicitudInscripcion.objects.filter(estado__in=['pendiente', 'procesando'])
+    vistos = set()
+    duplicadas = []
+    for solicitud_id, alumno_id, materia_id in en_curso.order_by('fecha_solicitud', 'id').values_list(
+        'id', 'alumno_id', 'materia_id'
+    ):
+        if (alumno_id, materia_id) in vistos:
+            duplicadas.append(solicitud_id)
+        vistos.add((alumno_id, materia_id))
+    SolicitudInscripcion.objects.filter(id__in=duplicadas).update(
+        estado='rechazada', mensaje='Solicitud duplicada'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumno', '0005_indices_consultas'),
+        ('inscripcion', '0007_indices_activos'),
+        ('materia', '0004_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.RunPython(rechazar_duplicadas, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='solicitudinscripcion',
+            constraint=models.UniqueConstraint(condition=models.Q(('estado__in', ['pendiente', 'procesando'])), fields=('alumno', 'materia'), name='solicitud_en_curso_unica'),
+        ),
+    ]
@@ -1,8 +1,12 @@
-from django.db import models
+from datetime import datetime, time, timedelta
+
+from django.db import models, transaction, IntegrityError
+from django.db.models.functions import TruncDate
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 
 from alumno.models import Alumno
+from carrera.models import Carrera
 from materia.models import Materia
 # Create your models here.
 class Inscripcion(models.Model):
@@ -32,6 +36,19 @@ class Inscripcion(models.Model):
         verbose_name_plural = 'Inscripciones'
         unique_together = ['alumno', 'materia']  # Un alumno no puede inscribirse dos veces a la misma materia
         ordering = ['-fecha_inscripcion']
+        indexes = [
+            # Inscriptos de una materia, activos o dados de baja
+            models.Index(fields=['materia', 'activa'], name='inscripcion_materia_activa_idx'),
+            # Materias en curso de un alumno: sólo las filas activas
+            models.Index(fields=['alumno'], condition=models.Q(activa=True), name='inscripcion_alumno_activa_idx'),
+            # Listado paginado por keyset y resúmenes por día
+            models.Index(fields=['fecha_inscripcion', 'id'], name='inscripcion_fecha_idx'),
+            # El mismo orden filtrado por activas, sin recorrer las bajas
+            models.Index(
+                fields=['fecha_inscripcion', 'id'], condition=models.Q(activa=True),
+                name='inscripcion_activa_fecha_idx',
+            ),
+        ]
 
     def __str__(self):
         estado = "Activa" if self.activa else "Dada de baja"
@@ -40,7 +57,7 @@ class Inscripcion(models.Model):
     def clean(self):
         """Validaciones personalizadas"""
         # Validar que la materia pertenezca a la carrera del alumno
-        if self.alumno and self.materia:
+        if self.alumno_id and self.materia_id:
             if self.alumno.carrera != self.materia.carrera:
                 raise ValidationError('El alumno no puede inscribirse a una materia de otra carrera')
             
@@ -50,13 +67,321 @@ class Inscripcion(models.Model):
 
     def save(self, *args, **kwargs):
         """
-        Sobrescribe save para manejar la lógica de baja
+        Sobrescribe save para manejar la lógica de baja.
+        La reserva de cupo ocurre en post_save: si falla, la transacción
+        revierte también la fila guardada.
         """
         if not self.pk:  # Nueva inscripción
             self.fecha_inscripcion = timezone.now()
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def dar_de_baja(self):
         """Método para dar de baja la inscripción"""
         self.activa = False
+        self.fecha_baja = timezone.now()
         self.save()
+
+
+class SolicitudInscripcion(models.Model):
+    """
+    Cola persistente de pedidos de inscripción para el modo ráfaga.
+    Los pedidos se procesan en orden de llegada por los workers.
+    """
+    PENDIENTE = 'pendiente'
+    PROCESANDO = 'procesando'
+    ACEPTADA = 'aceptada'
+    RECHAZADA = 'rechazada'
+    ESTADOS = [
+        (PENDIENTE, 'Pendiente'),
+        (PROCESANDO, 'Procesando'),
+        (ACEPTADA, 'Aceptada'),
+        (RECHAZADA, 'Rechazada'),
+    ]
+
+    alumno = models.ForeignKey(
+        Alumno,
+        on_delete=models.CASCADE,
+        related_name='solicitudes_inscripcion',
+        verbose_name='Alumno'
+    )
+    materia = models.ForeignKey(
+        Materia,
+        on_delete=models.CASCADE,
+        related_name='solicitudes_inscripcion',
+        verbose_name='Materia'
+    )
+    estado = models.CharField(max_length=10, choices=ESTADOS, default=PENDIENTE, verbose_name='Estado')
+    mensaje = models.CharField(max_length=255, blank=True, verbose_name='Mensaje')
+    inscripcion = models.ForeignKey(
+        Inscripcion,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Inscripción'
+    )
+    fecha_solicitud = models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Solicitud')
+    fecha_proceso = models.DateTimeField(null=True, blank=True, verbose_name='Fecha de Proceso')
+
+    class Meta:
+        verbose_name = 'Solicitud de Inscripción'
+        verbose_name_plural = 'Solicitudes de Inscripción'
+        ordering = ['fecha_solicitud', 'id']
+        indexes = [
+            models.Index(fields=['estado', 'fecha_solicitud', 'id'], name='solicitud_cola_idx'),
+        ]
+        constraints = [
+            # Un solo pedido en curso por alumno y materia
+            models.UniqueConstraint(
+                fields=['alumno', 'materia'],
+                condition=models.Q(estado__in=['pendiente', 'procesando']),
+                name='solicitud_en_curso_unica',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.alumno} - {self.materia.nombre} ({self.get_estado_display()})"
+
+    @property
+    def finalizada(self):
+        return self.estado in (self.ACEPTADA, self.RECHAZADA)
+
+
+class ListaEspera(models.Model):
+    """
+    Lista de espera de una materia sin cupo. La posición crece en forma
+    monotónica por materia; el primero de la cola es el de menor posición.
+    """
+    alumno = models.ForeignKey(
+        Alumno,
+        on_delete=models.CASCADE,
+        related_name='listas_espera',
+        verbose_name='Alumno'
+    )
+    materia = models.ForeignKey(
+        Materia,
+        on_delete=models.CASCADE,
+        related_name='lista_espera',
+        verbose_name='Materia'
+    )
+    posicion = models.PositiveIntegerField(verbose_name='Posición')
+    fecha_alta = models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Alta')
+
+    class Meta:
+        verbose_name = 'Lista de Espera'
+        verbose_name_plural = 'Listas de Espera'
+        ordering = ['materia', 'posicion']
+        constraints = [
+            models.UniqueConstraint(fields=['alumno', 'materia'], name='lista_espera_alumno_materia_unica'),
+            models.UniqueConstraint(fields=['materia', 'posicion'], name='lista_espera_materia_posicion_unica'),
+        ]
+
+    def __str__(self):
+        return f"{self.alumno} - {self.materia.nombre} (#{self.posicion})"
+
+
+class MovimientoInscripcion(models.Model):
+    """
+    Historial de altas y bajas de las inscripciones. Una reactivación o un
+    cambio de materia quedan como movimientos propios en lugar de pisar
+    las fechas de Inscripcion, así EstadisticaDiaria.reconstruir obtiene
+    los mismos números que el registro incremental.
+    """
+    ALTA = 'alta'
+    BAJA = 'baja'
+    TIPOS = [
+        (ALTA, 'Alta'),
+        (BAJA, 'Baja'),
+    ]
+
+    inscripcion = models.ForeignKey(
+        Inscripcion,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='movimientos',
+        verbose_name='Inscripción'
+    )
+    materia = models.ForeignKey(
+        Materia,
+        on_delete=models.CASCADE,
+        related_name='movimientos_inscripcion',
+        verbose_name='Materia'
+    )
+    tipo = models.CharField(max_length=4, choices=TIPOS, verbose_name='Tipo')
+    fecha = models.DateTimeField(default=timezone.now, verbose_name='Fecha')
+
+    class Meta:
+        verbose_name = 'Movimiento de Inscripción'
+        verbose_name_plural = 'Movimientos de Inscripción'
+        ordering = ['fecha', 'id']
+        indexes = [
+            models.Index(fields=['fecha', 'materia'], name='movimiento_fecha_materia_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha:%Y-%m-%d %H:%M} - {self.materia_id} ({self.get_tipo_display()})"
+
+    @classmethod
+    def registrar(cls, movimientos):
+        """
+        Guarda los movimientos [(inscripcion_id, materia_id, tipo)] y los suma
+        al resumen del día de cada materia. Debe llamarse después de ajustar
+        Materia.inscriptos_activos.
+        """
+        ahora = timezone.now()
+        cls.objects.bulk_create([
+            cls(inscripcion_id=inscripcion_id, materia_id=materia_id, tipo=tipo, fecha=ahora)
+            for inscripcion_id, materia_id, tipo in movimientos
+        ], batch_size=500)
+        totales = {}
+        for _, materia_id, tipo in movimientos:
+            altas, bajas = totales.get(materia_id, (0, 0))
+            totales[materia_id] = (altas + (tipo == cls.ALTA), bajas + (tipo == cls.BAJA))
+        for materia_id, (altas, bajas) in totales.items():
+            EstadisticaDiaria.registrar(materia_id, altas=altas, bajas=bajas, fecha=timezone.localdate(ahora))
+
+
+class EstadisticaDiaria(models.Model):
+    """
+    Resumen diario de inscripciones por materia. Se mantiene en forma
+    incremental desde MovimientoInscripcion.registrar y se puede reconstruir
+    con el comando recalcular_estadisticas_diarias.
+    activos refleja los inscriptos activos de la materia al cierre del día.
+    """
+    fecha = models.DateField(verbose_name='Fecha')
+    materia = models.ForeignKey(
+        Materia,
+        on_delete=models.CASCADE,
+        related_name='estadisticas_diarias',
+        verbose_name='Materia'
+    )
+    carrera = models.ForeignKey(
+        Carrera,
+        on_delete=models.CASCADE,
+        related_name='estadisticas_diarias',
+        verbose_name='Carrera'
+    )
+    altas = models.PositiveIntegerField(default=0, verbose_name='Altas')
+    bajas = models.PositiveIntegerField(default=0, verbose_name='Bajas')
+    activos = models.PositiveIntegerField(default=0, verbose_name='Activos')
+
+    class Meta:
+        verbose_name = 'Estadística Diaria'
+        verbose_name_plural = 'Estadísticas Diarias'
+        ordering = ['-fecha', 'materia']
+        constraints = [
+            models.UniqueConstraint(fields=['fecha', 'materia'], name='estadistica_diaria_fecha_materia_unica'),
+        ]
+        indexes = [
+            models.Index(fields=['fecha', 'carrera'], name='estadistica_fecha_carrera_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha} - {self.materia.nombre} (+{self.altas} / -{self.bajas})"
+
+    @classmethod
+    def registrar(cls, materia_id, altas=0, bajas=0, fecha=None):
+        """
+        Suma altas/bajas al resumen del día y copia el contador actual de
+        la materia. Debe llamarse después de ajustar Materia.inscriptos_activos.
+        """
+        fecha = fecha or timezone.localdate()
+        activos = Materia.objects.filter(pk=models.OuterRef('materia_id')).values('inscriptos_activos')
+        actualizados = cls.objects.filter(fecha=fecha, materia_id=materia_id).update(
+            altas=models.F('altas') + altas,
+            bajas=models.F('bajas') + bajas,
+            activos=models.Subquery(activos),
+        )
+        if actualizados:
+            return
+        materia = Materia.objects.only('carrera_id', 'inscriptos_activos').get(pk=materia_id)
+        try:
+            with transaction.atomic():
+                cls.objects.create(
+                    fecha=fecha, materia_id=materia_id, carrera_id=materia.carrera_id,
+                    altas=altas, bajas=bajas, activos=materia.inscriptos_activos,
+                )
+        except IntegrityError:
+            # Otra transacción creó la fila del día en paralelo
+            cls.registrar(materia_id, altas=altas, bajas=bajas, fecha=fecha)
+
+    @classmethod
+    def reconstruir(cls, desde, hasta, materia_ids=None):
+        """
+        Recalcula las filas del rango [desde, hasta] a partir del historial
+        de MovimientoInscripcion. Las inscripciones sin movimientos (cargadas
+        sin pasar por las señales) cuentan el alta en fecha_inscripcion y la
+        baja en fecha_baja.
+        Retorna la cantidad de filas generadas.
+        """
+        inicio = timezone.make_aware(datetime.combine(desde, time.min))
+        fin = timezone.make_aware(datetime.combine(hasta + timedelta(days=1), time.min))
+        historial = MovimientoInscripcion.objects.all()
+        sin_historial = Inscripcion.objects.filter(
+            ~models.Exists(MovimientoInscripcion.objects.filter(inscripcion=models.OuterRef('pk')))
+        )
+        if materia_ids:
+            historial = historial.filter(materia_id__in=materia_ids)
+            sin_historial = sin_historial.filter(materia_id__in=materia_ids)
+
+        def contar_por_dia(queryset, campo):
+            return (
+                queryset.filter(**{f'{campo}__gte': inicio, f'{campo}__lt': fin})
+                .annotate(dia=TruncDate(campo))
+                .values('dia', 'materia_id')
+                .annotate(total=models.Count('id'))
+                .order_by()
+            )
+
+        movimientos = {}
+
+        def sumar(filas, posicion):
+            for fila in filas:
+                movimientos.setdefault(fila['materia_id'], {}).setdefault(fila['dia'], [0, 0])[posicion] += fila['total']
+
+        sumar(contar_por_dia(historial.filter(tipo=MovimientoInscripcion.ALTA), 'fecha'), 0)
+        sumar(contar_por_dia(historial.filter(tipo=MovimientoInscripcion.BAJA), 'fecha'), 1)
+        sumar(contar_por_dia(sin_historial, 'fecha_inscripcion'), 0)
+        sumar(contar_por_dia(sin_historial, 'fecha_baja'), 1)
+
+        # Activos al comenzar el rango, para acumular día a día
+        activos_iniciales = {}
+        anteriores = (
+            historial.filter(fecha__lt=inicio)
+            .values('materia_id')
+            .annotate(total=models.Sum(models.Case(
+                models.When(tipo=MovimientoInscripcion.ALTA, then=1), default=-1
+            )))
+            .order_by()
+        )
+        sin_historial_anteriores = (
+            sin_historial.filter(fecha_inscripcion__lt=inicio)
+            .filter(models.Q(activa=True) | models.Q(fecha_baja__gte=inicio))
+            .values('materia_id')
+            .annotate(total=models.Count('id'))
+            .order_by()
+        )
+        for fila in [*anteriores, *sin_historial_anteriores]:
+            activos_iniciales[fila['materia_id']] = activos_iniciales.get(fila['materia_id'], 0) + fila['total']
+        carreras = dict(Materia.objects.filter(id__in=movimientos).values_list('id', 'carrera_id'))
+
+        filas = []
+        for materia_id, dias in movimientos.items():
+            activos = activos_iniciales.get(materia_id, 0)
+            for dia in sorted(dias):
+                altas, bajas = dias[dia]
+                activos = max(activos + altas - bajas, 0)
+                filas.append(cls(
+                    fecha=dia, materia_id=materia_id, carrera_id=carreras[materia_id],
+                    altas=altas, bajas=bajas, activos=activos,
+                ))
+
+        with transaction.atomic():
+            existentes = cls.objects.filter(fecha__gte=desde, fecha__lte=hasta)
+            if materia_ids:
+                existentes = existentes.filter(materia_id__in=materia_ids)
+            existentes.delete()
+            cls.objects.bulk_create(filas, batch_size=500)
+        return len(filas)
@@ -1,6 +1,24 @@
-from django.db import transaction, IntegrityError
+from django.db import transaction, DatabaseError, IntegrityError
+from django.db.models import Q, F, Case, When, Value
 from django.core.exceptions import ValidationError
-from .models import Materia, Alumno, Inscripcion
+from django.utils import timezone
+from materia.services import MateriaService
+from .models import Materia, Alumno, Inscripcion, SolicitudInscripcion, ListaEspera, MovimientoInscripcion
+from .signals import inscripciones_masivas
+
+
+class EnListaEspera(ValidationError):
+    """
+    Se lanza cuando no hay cupo y el alumno quedó en la lista de espera
+    """
+    def __init__(self, entrada, posicion):
+        super().__init__(
+            f'No hay cupo disponible: quedaste en la lista de espera (posición {posicion})',
+            code='lista_espera'
+        )
+        self.entrada = entrada
+        self.posicion = posicion
+
 
 class InscripcionService:
     """
@@ -8,9 +26,12 @@ class InscripcionService:
     """
     
     @staticmethod
-    def inscribir_alumno(alumno_id, materia_id):
+    def inscribir_alumno(alumno_id, materia_id, lista_espera=False):
         """
-        Inscribe un alumno a una materia con todas las validaciones
+        Inscribe un alumno a una materia con todas las validaciones.
+        Si no hay cupo y lista_espera es True, el alumno queda en la lista
+        de espera de la materia y se lanza EnListaEspera. Sólo la
+        inscripción que pide el propio alumno usa la lista de espera.
         """
         try:
             with transaction.atomic():
@@ -18,7 +39,7 @@ class InscripcionService:
                 materia = Materia.objects.get(id=materia_id)
                 
                 # Validar que la materia pertenezca a la carrera del alumno
-                if alumno.carrera != materia.carrera:
+                if alumno.carrera_id != materia.carrera_id:
                     raise ValidationError('El alumno no puede inscribirse a una materia de otra carrera')
                 
                 # Validar si ya existe una inscripción
@@ -31,16 +52,18 @@ class InscripcionService:
                         # Si existe pero está inactiva, reactivarla
                         # Validar cupo disponible antes de reactivar
                         if not materia.tiene_cupo:
-                            raise ValidationError('No hay cupo disponible en esta materia')
+                            raise ValidationError('No hay cupo disponible en esta materia', code='sin_cupo')
                             
                         inscripcion_existente.activa = True
                         inscripcion_existente.fecha_baja = None
                         inscripcion_existente.save()
                         return inscripcion_existente
                 
-                # Validar cupo disponible para nueva inscripción
+                # Validar cupo disponible para nueva inscripción.
+                # Es sólo un corte rápido: la reserva real la hace
+                # Materia.reservar_cupo con un UPDATE condicional al guardar.
                 if not materia.tiene_cupo:
-                    raise ValidationError('No hay cupo disponible en esta materia')
+                    raise ValidationError('No hay cupo disponible en esta materia', code='sin_cupo')
                 
                 # Crear inscripción nueva
                 inscripcion = Inscripcion.objects.create(
@@ -55,15 +78,149 @@ class InscripcionService:
             raise ValidationError('El alumno o la materia especificados no existen')
         except IntegrityError as e:
             raise ValidationError(f'Error de integridad: {str(e)}')
+        except ValidationError as e:
+            if not lista_espera or getattr(e, 'code', None) != 'sin_cupo':
+                raise
+            # La transacción de la inscripción ya se revirtió: encolar al alumno
+            entrada = ListaEsperaService.agregar(alumno_id, materia_id)
+            raise EnListaEspera(entrada, ListaEsperaService.posicion(entrada))
     
+    # Estados posibles de cada par en el reporte de inscribir_lote
+    LOTE_INSCRIPTA = 'inscripta'
+    LOTE_REACTIVADA = 'reactivada'
+    LOTE_YA_INSCRIPTO = 'ya_inscripto'
+    LOTE_SIN_CUPO = 'sin_cupo'
+    LOTE_OTRA_CARRERA = 'otra_carrera'
+    LOTE_INACTIVO = 'inactivo'
+    LOTE_INEXISTENTE = 'inexistente'
+
+    @staticmethod
+    def inscribir_lote(alumno_ids, materia_ids):
+        """
+        Inscribe cada alumno en cada materia indicada. Las validaciones del
+        lote completo se resuelven con una cantidad fija de consultas y las
+        escrituras con un bulk_create, un UPDATE de reactivación, un UPDATE
+        de contadores y un bulk_create de movimientos. Los alumnos obtienen cupo en el orden recibido.
+
+        Returns:
+            dict: 'resultados' con un dict por par (alumno_id, materia_id,
+            estado, mensaje) y 'resumen' con la cantidad de pares por estado.
+        """
+        alumno_ids = list(dict.fromkeys(int(a) for a in alumno_ids))
+        materia_ids = list(dict.fromkeys(int(m) for m in materia_ids))
+        S = InscripcionService
+        mensajes = {
+            S.LOTE_INSCRIPTA: 'Inscripción creada',
+            S.LOTE_REACTIVADA: 'Inscripción reactivada',
+            S.LOTE_YA_INSCRIPTO: 'El alumno ya está inscripto en esta materia',
+            S.LOTE_SIN_CUPO: 'No hay cupo disponible en esta materia',
+            S.LOTE_OTRA_CARRERA: 'El alumno no puede inscribirse a una materia de otra carrera',
+            S.LOTE_INACTIVO: 'El alumno o la materia no están activos',
+            S.LOTE_INEXISTENTE: 'El alumno o la materia especificados no existen',
+        }
+
+        try:
+            with transaction.atomic():
+                # Bloquear las materias: los contadores leídos son exactos hasta el commit
+                materias = {
+                    m['id']: m for m in Materia.objects.select_for_update().filter(
+                        id__in=materia_ids
+                    ).values('id', 'carrera_id', 'activa', 'cupo_maximo', 'inscriptos_activos')
+                }
+                alumnos = {
+                    a['id']: a for a in Alumno.objects.filter(
+                        id__in=alumno_ids
+                    ).values('id', 'carrera_id', 'activo')
+                }
+                existentes = {
+                    (i['alumno_id'], i['materia_id']): i for i in Inscripcion.objects.filter(
+                        alumno_id__in=alumno_ids, materia_id__in=materia_ids
+                    ).values('id', 'alumno_id', 'materia_id', 'activa')
+                }
+                cupos = {
+                    m['id']: m['cupo_maximo'] - m['inscriptos_activos'] for m in materias.values()
+                }
+
+                resultados = []
+                nuevas = []
+                reactivar = []
+                reservas = {}
+                for materia_id in materia_ids:
+                    materia = materias.get(materia_id)
+                    for alumno_id in alumno_ids:
+                        alumno = alumnos.get(alumno_id)
+                        existente = existentes.get((alumno_id, materia_id))
+                        if materia is None or alumno is None:
+                            estado = S.LOTE_INEXISTENTE
+                        elif not materia['activa'] or not alumno['activo']:
+                            estado = S.LOTE_INACTIVO
+                        elif alumno['carrera_id'] != materia['carrera_id']:
+                            estado = S.LOTE_OTRA_CARRERA
+                        elif existente and existente['activa']:
+                            estado = S.LOTE_YA_INSCRIPTO
+                        elif cupos[materia_id] <= 0:
+                            estado = S.LOTE_SIN_CUPO
+                        else:
+                            cupos[materia_id] -= 1
+                            reservas[materia_id] = reservas.get(materia_id, 0) + 1
+                            if existente:
+                                estado = S.LOTE_REACTIVADA
+                                reactivar.append((existente['id'], materia_id))
+                            else:
+                                estado = S.LOTE_INSCRIPTA
+                                nuevas.append(Inscripcion(alumno_id=alumno_id, materia_id=materia_id, activa=True))
+                        resultados.append({
+                            'alumno_id': alumno_id,
+                            'materia_id': materia_id,
+                            'estado': estado,
+                            'mensaje': mensajes[estado],
+                        })
+
+                # bulk_create y update() no disparan señales: los contadores se ajustan acá
+                if nuevas:
+                    Inscripcion.objects.bulk_create(nuevas, batch_size=500)
+                if reactivar:
+                    Inscripcion.objects.filter(
+                        id__in=[inscripcion_id for inscripcion_id, _ in reactivar]
+                    ).update(activa=True, fecha_baja=None)
+                if reservas:
+                    Materia.objects.filter(id__in=reservas).update(
+                        inscriptos_activos=F('inscriptos_activos') + Case(
+                            *[When(id=materia_id, then=Value(cantidad)) for materia_id, cantidad in reservas.items()],
+                            default=Value(0)
+                        )
+                    )
+                    MovimientoInscripcion.registrar([
+                        (inscripcion_id, materia_id, MovimientoInscripcion.ALTA)
+                        for inscripcion_id, materia_id in [
+                            *((i.pk, i.materia_id) for i in nuevas), *reactivar
+                        ]
+                    ])
+                    MateriaService.invalidar_oferta(*{
+                        materias[materia_id]['carrera_id'] for materia_id in reservas
+                    })
+        except IntegrityError as e:
+            raise ValidationError(f'Error de integridad: {str(e)}')
+
+        if nuevas or reactivar:
+            inscripciones_masivas.send(sender=Inscripcion, materia_ids=list(reservas))
+
+        resumen = {}
+        for resultado in resultados:
+            resumen[resultado['estado']] = resumen.get(resultado['estado'], 0) + 1
+        return {'resultados': resultados, 'resumen': resumen}
+
     @staticmethod
     def dar_de_baja_inscripcion(inscripcion_id):
         """
-        Da de baja una inscripción
+        Da de baja una inscripción y, en la misma transacción, promueve al
+        primero de la lista de espera de la materia
         """
         try:
-            inscripcion = Inscripcion.objects.get(id=inscripcion_id, activa=True)
-            inscripcion.dar_de_baja()
+            with transaction.atomic():
+                inscripcion = Inscripcion.objects.get(id=inscripcion_id, activa=True)
+                inscripcion.dar_de_baja()
+                ListaEsperaService.promover(inscripcion.materia_id)
             return inscripcion
         except Inscripcion.DoesNotExist:
             raise ValidationError('La inscripción no existe o ya está dada de baja')
@@ -89,3 +246,197 @@ class InscripcionService:
             return Inscripcion.objects.filter(materia=materia, activa=True).select_related('alumno')
         except Materia.DoesNotExist:
             raise ValidationError('La materia especificada no existe')
+
+
+class ListaEsperaService:
+    """
+    Servicio para gestionar las listas de espera de materias sin cupo
+    """
+    # Entradas descartadas como máximo por promoción; las restantes se
+    # revisan en la próxima baja
+    MAX_DESCARTES = 50
+
+    @staticmethod
+    def agregar(alumno_id, materia_id):
+        """
+        Agrega al alumno al final de la lista de espera de la materia.
+        Si ya estaba en la lista, retorna la entrada existente.
+        """
+        with transaction.atomic():
+            # Bloquear la materia serializa el cálculo de la próxima posición
+            list(Materia.objects.select_for_update().filter(id=materia_id).values_list('id'))
+            entrada = ListaEspera.objects.filter(alumno_id=alumno_id, materia_id=materia_id).first()
+            if entrada:
+                return entrada
+            ultima = ListaEspera.objects.filter(materia_id=materia_id).order_by('-posicion').values_list(
+                'posicion', flat=True
+            ).first()
+            return ListaEspera.objects.create(
+                alumno_id=alumno_id,
+                materia_id=materia_id,
+                posicion=(ultima or 0) + 1
+            )
+
+    @staticmethod
+    def posicion(entrada):
+        """
+        Posición actual de la entrada dentro de la cola (1 = próximo en entrar)
+        """
+        return ListaEspera.objects.filter(
+            materia_id=entrada.materia_id, posicion__lte=entrada.posicion
+        ).count()
+
+    @staticmethod
+    def promover(materia_id):
+        """
+        Inscribe al primero de la lista de espera si hay cupo. Las entradas
+        que ya no pueden inscribirse (ya inscripto, alumno de otra carrera)
+        se descartan, hasta MAX_DESCARTES por llamada. Retorna la
+        inscripción creada o None.
+        """
+        descartadas = 0
+        with transaction.atomic():
+            while descartadas < ListaEsperaService.MAX_DESCARTES:
+                entrada = ListaEspera.objects.filter(materia_id=materia_id).order_by('posicion').first()
+                if entrada is None:
+                    return None
+                try:
+                    with transaction.atomic():
+                        inscripcion = InscripcionService.inscribir_alumno(entrada.alumno_id, materia_id)
+                        entrada.delete()
+                        return inscripcion
+                except ValidationError as e:
+                    if getattr(e, 'code', None) == 'sin_cupo':
+                        return None
+                    entrada.delete()
+                    descartadas += 1
+            return None
+
+    @staticmethod
+    def obtener_listas_alumno(alumno_id):
+        """
+        Obtiene las listas de espera de un alumno con su posición actual
+        """
+        entradas = list(ListaEspera.objects.filter(alumno_id=alumno_id).select_related('materia'))
+        for entrada in entradas:
+            entrada.posicion_actual = ListaEsperaService.posicion(entrada)
+        return entradas
+
+    @staticmethod
+    def quitar(entrada_id, alumno_id):
+        """
+        Quita al alumno de una lista de espera
+        """
+        eliminadas, _ = ListaEspera.objects.filter(id=entrada_id, alumno_id=alumno_id).delete()
+        if not eliminadas:
+            raise ValidationError('La entrada de lista de espera no existe')
+
+
+class SolicitudInscripcionService:
+    """
+    Servicio para el modo ráfaga: los pedidos de inscripción se encolan
+    y los workers los procesan en orden de llegada.
+    """
+
+    @staticmethod
+    def encolar(alumno_id, materia_id):
+        """
+        Registra un pedido de inscripción. Si ya hay uno en curso para el
+        mismo alumno y materia, lo retorna en lugar de duplicarlo.
+        """
+        en_curso = SolicitudInscripcion.objects.filter(
+            alumno_id=alumno_id,
+            materia_id=materia_id,
+            estado__in=[SolicitudInscripcion.PENDIENTE, SolicitudInscripcion.PROCESANDO]
+        )
+        solicitud = en_curso.first()
+        if solicitud:
+            return solicitud
+        try:
+            with transaction.atomic():
+                return SolicitudInscripcion.objects.create(alumno_id=alumno_id, materia_id=materia_id)
+        except IntegrityError:
+            # Un pedido simultáneo ganó la inserción (solicitud_en_curso_unica)
+            solicitud = en_curso.first()
+            if solicitud is None:
+                raise
+            return solicitud
+
+    @staticmethod
+    def posicion_en_cola(solicitud):
+        """
+        Cantidad de pedidos pendientes que llegaron antes que este
+        """
+        if solicitud.estado != SolicitudInscripcion.PENDIENTE:
+            return 0
+        return SolicitudInscripcion.objects.filter(
+            Q(fecha_solicitud__lt=solicitud.fecha_solicitud) |
+            Q(fecha_solicitud=solicitud.fecha_solicitud, id__lt=solicitud.id),
+            estado=SolicitudInscripcion.PENDIENTE
+        ).count() + 1
+
+    @staticmethod
+    def tomar_siguiente():
+        """
+        Reclama el pedido pendiente más antiguo con un UPDATE condicional,
+        de modo que dos workers nunca procesen el mismo pedido.
+        """
+        pendientes = SolicitudInscripcion.objects.filter(estado=SolicitudInscripcion.PENDIENTE)
+        while True:
+            siguiente_id = pendientes.order_by('fecha_solicitud', 'id').values_list('id', flat=True).first()
+            if siguiente_id is None:
+                return None
+            reclamada = SolicitudInscripcion.objects.filter(
+                id=siguiente_id, estado=SolicitudInscripcion.PENDIENTE
+            ).update(estado=SolicitudInscripcion.PROCESANDO)
+            if reclamada:
+                return SolicitudInscripcion.objects.get(id=siguiente_id)
+
+    @staticmethod
+    def procesar(solicitud):
+        """
+        Ejecuta la inscripción de un pedido reclamado y guarda el resultado.
+        Un error de la base (bloqueo, timeout) rechaza sólo este pedido, para
+        que el worker siga con el resto de la cola.
+        """
+        try:
+            solicitud.inscripcion = InscripcionService.inscribir_alumno(
+                solicitud.alumno_id, solicitud.materia_id
+            )
+            solicitud.estado = SolicitudInscripcion.ACEPTADA
+            solicitud.mensaje = ''
+        except ValidationError as e:
+            solicitud.estado = SolicitudInscripcion.RECHAZADA
+            solicitud.mensaje = e.messages[0][:255]
+        except DatabaseError:
+            solicitud.inscripcion = None
+            solicitud.estado = SolicitudInscripcion.RECHAZADA
+            solicitud.mensaje = 'No se pudo procesar la solicitud. Intentá nuevamente.'
+        solicitud.fecha_proceso = timezone.now()
+        solicitud.save(update_fields=['estado', 'mensaje', 'inscripcion', 'fecha_proceso'])
+        return solicitud
+
+    @staticmethod
+    def procesar_pendientes(limite=None):
+        """
+        Procesa pedidos pendientes hasta vaciar la cola o alcanzar el límite.
+        Retorna la cantidad de pedidos procesados.
+        """
+        procesadas = 0
+        while limite is None or procesadas < limite:
+            solicitud = SolicitudInscripcionService.tomar_siguiente()
+            if solicitud is None:
+                break
+            SolicitudInscripcionService.procesar(solicitud)
+            procesadas += 1
+        return procesadas
+
+    @staticmethod
+    def recuperar_en_proceso():
+        """
+        Devuelve a la cola los pedidos que quedaron en proceso tras una
+        caída del worker. Retorna la cantidad recuperada.
+        """
+        return SolicitudInscripcion.objects.filter(
+            estado=SolicitudInscripcion.PROCESANDO
+        ).update(estado=SolicitudInscripcion.PENDIENTE)
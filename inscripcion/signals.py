@@ -0,0 +1,92 @@
+"""
+Señales que mantienen sincronizados el contador Materia.inscriptos_activos
+y el historial MovimientoInscripcion con su resumen EstadisticaDiaria
+"""
+from django.core.exceptions import ValidationError
+from django.db.models import QuerySet
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import Signal, receiver
+
+from carrera.models import Carrera
+from materia.models import Materia
+from materia.services import MateriaService
+from .models import Inscripcion, MovimientoInscripcion
+
+# Enviada tras escrituras masivas (bulk_create / update) que no disparan
+# post_save, para que otras apps puedan invalidar sus caches
+inscripciones_masivas = Signal()
+
+
+def _ajustar(inscripcion, materia_id, delta):
+    Materia.ajustar_inscriptos(materia_id, delta)
+    _ajustar_en_memoria(inscripcion, materia_id, delta)
+    _invalidar_oferta(inscripcion, materia_id)
+
+
+def _reservar(inscripcion, materia_id):
+    if not Materia.reservar_cupo(materia_id):
+        raise ValidationError('No hay cupo disponible en esta materia', code='sin_cupo')
+    _ajustar_en_memoria(inscripcion, materia_id, 1)
+    _invalidar_oferta(inscripcion, materia_id)
+
+
+def _invalidar_oferta(inscripcion, materia_id):
+    # La disponibilidad de la oferta cacheada de la carrera cambió
+    if Inscripcion.materia.is_cached(inscripcion) and inscripcion.materia.pk == materia_id:
+        carrera_id = inscripcion.materia.carrera_id
+    else:
+        carrera_id = Materia.objects.filter(pk=materia_id).values_list('carrera_id', flat=True).first()
+    MateriaService.invalidar_oferta(carrera_id)
+
+
+def _ajustar_en_memoria(inscripcion, materia_id, delta):
+    # Mantener coherente la instancia de materia ya cargada en memoria
+    if Inscripcion.materia.is_cached(inscripcion) and inscripcion.materia.pk == materia_id:
+        inscripcion.materia.inscriptos_activos += delta
+
+
+@receiver(post_init, sender=Inscripcion)
+def guardar_estado_original(sender, instance, **kwargs):
+    """Recuerda el estado persistido para calcular el delta al guardar"""
+    if instance.pk:
+        # Leer desde __dict__ para no disparar consultas sobre campos diferidos
+        instance._estado_original = (
+            instance.__dict__.get('materia_id'), instance.__dict__.get('activa')
+        )
+    else:
+        instance._estado_original = (None, False)
+
+
+@receiver(post_save, sender=Inscripcion)
+def actualizar_contador_al_guardar(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    materia_anterior, activa_anterior = instance._estado_original
+    if activa_anterior is None:
+        # Estado original desconocido: lo corrige recalcular_inscriptos
+        return
+    if materia_anterior != instance.materia_id or activa_anterior != instance.activa:
+        if activa_anterior and materia_anterior:
+            _ajustar(instance, materia_anterior, -1)
+            MovimientoInscripcion.registrar([(instance.pk, materia_anterior, MovimientoInscripcion.BAJA)])
+        if instance.activa:
+            _reservar(instance, instance.materia_id)
+            MovimientoInscripcion.registrar([(instance.pk, instance.materia_id, MovimientoInscripcion.ALTA)])
+    instance._estado_original = (instance.materia_id, instance.activa)
+
+
+def _elimina_materia(origin):
+    """Indica si el borrado en cascada se originó en una materia o carrera"""
+    modelo = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return modelo in (Materia, Carrera)
+
+
+@receiver(post_delete, sender=Inscripcion)
+def actualizar_contador_al_eliminar(sender, instance, origin=None, **kwargs):
+    materia_anterior, activa_anterior = instance._estado_original
+    if activa_anterior and materia_anterior:
+        _ajustar(instance, materia_anterior, -1)
+        # Si se borra la materia, su historial y resumen se borran con ella.
+        # La fila ya no existe: el movimiento queda sin inscripción
+        if not _elimina_materia(origin):
+            MovimientoInscripcion.registrar([(None, materia_anterior, MovimientoInscripcion.BAJA)])
@@ -1,3 +1,580 @@
-from django.test import TestCase
+import re
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.core.management import call_command
+from django.db import IntegrityError, OperationalError, connection, connections, transaction
+from django.db.models import QuerySet
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from alumno.models import Alumno
+from materia.models import Materia
+from materia.services import MateriaService
+from usuario.models import Usuario
+
+from gestion_academica.pruebas import CarreraMateriaMixin, crear_admin, crear_alumnos, crear_carrera, crear_materia
+
+from .models import EstadisticaDiaria, Inscripcion, ListaEspera, SolicitudInscripcion
+from .services import EnListaEspera, InscripcionService, ListaEsperaService, SolicitudInscripcionService
+from .views import AutocompleteView
+
+
+class InscripcionConcurrenteTest(CarreraMateriaMixin, TransactionTestCase):
+    """
+    Dispara inscripciones simultáneas a una misma materia y verifica que
+    nunca se supere el cupo máximo.
+    """
+    CUPO = cupo_maximo = 25
+    ALUMNOS = 200
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('Requiere una base de test en archivo para usar varias conexiones')
+        super().setUp()
+        self.alumnos = crear_alumnos(self.carrera, self.ALUMNOS)
+
+    def _inscribir_en_paralelo(self, alumno_ids):
+        barrera = threading.Barrier(len(alumno_ids))
+        resultados = {'ok': 0, 'sin_cupo': 0, 'errores': []}
+        lock = threading.Lock()
+
+        def inscribir(alumno_id):
+            try:
+                barrera.wait()
+                InscripcionService.inscribir_alumno(alumno_id, self.materia.id)
+                with lock:
+                    resultados['ok'] += 1
+            except ValidationError:
+                with lock:
+                    resultados['sin_cupo'] += 1
+            except Exception as e:
+                with lock:
+                    resultados['errores'].append(e)
+            finally:
+                connections.close_all()
+
+        hilos = [threading.Thread(target=inscribir, args=(a,)) for a in alumno_ids]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        return resultados
+
+    def test_no_supera_cupo_maximo(self):
+        resultados = self._inscribir_en_paralelo([a.id for a in self.alumnos])
+
+        activas = Inscripcion.objects.filter(materia=self.materia, activa=True).count()
+        self.materia.refresh_from_db()
+
+        self.assertEqual(resultados['errores'], [])
+        self.assertLessEqual(activas, self.CUPO)
+        self.assertEqual(activas, resultados['ok'])
+        self.assertEqual(self.materia.inscriptos_activos, activas)
+        self.assertEqual(activas, self.CUPO)
+
+    def test_reactivaciones_concurrentes_no_superan_cupo(self):
+        # Llenar el cupo y dar de baja a todos para forzar reactivaciones
+        for alumno in self.alumnos[:self.CUPO]:
+            InscripcionService.inscribir_alumno(alumno.id, self.materia.id)
+        for inscripcion in Inscripcion.objects.filter(materia=self.materia):
+            InscripcionService.dar_de_baja_inscripcion(inscripcion.id)
+
+        resultados = self._inscribir_en_paralelo([a.id for a in self.alumnos])
+
+        activas = Inscripcion.objects.filter(materia=self.materia, activa=True).count()
+        self.materia.refresh_from_db()
+
+        self.assertEqual(resultados['errores'], [])
+        self.assertEqual(activas, self.CUPO)
+        self.assertEqual(self.materia.inscriptos_activos, activas)
+
+
+class ReservaCupoTest(CarreraMateriaMixin, TransactionTestCase):
+    cupo_maximo = 1
+
+    def setUp(self):
+        super().setUp()
+        self.alumnos = crear_alumnos(self.carrera, 2)
+
+    def test_guardado_directo_respeta_cupo(self):
+        Inscripcion.objects.create(alumno=self.alumnos[0], materia=self.materia)
+
+        with self.assertRaises(ValidationError):
+            Inscripcion.objects.create(alumno=self.alumnos[1], materia=self.materia)
+
+        self.assertEqual(Inscripcion.objects.filter(materia=self.materia).count(), 1)
+        self.materia.refresh_from_db()
+        self.assertEqual(self.materia.inscriptos_activos, 1)
+
+    def test_baja_libera_cupo(self):
+        inscripcion = InscripcionService.inscribir_alumno(self.alumnos[0].id, self.materia.id)
+        InscripcionService.dar_de_baja_inscripcion(inscripcion.id)
+
+        InscripcionService.inscribir_alumno(self.alumnos[1].id, self.materia.id)
+        self.materia.refresh_from_db()
+        self.assertEqual(self.materia.inscriptos_activos, 1)
+
+
+class SolicitudInscripcionTest(CarreraMateriaMixin, TransactionTestCase):
+    cupo_maximo = 1
+
+    def setUp(self):
+        super().setUp()
+        self.alumnos = crear_alumnos(self.carrera, 30)
+
+    def test_encolar_no_duplica_pedidos_en_curso(self):
+        primera = SolicitudInscripcionService.encolar(self.alumnos[0].id, self.materia.id)
+        self.assertEqual(SolicitudInscripcionService.encolar(self.alumnos[0].id, self.materia.id), primera)
+        segunda = SolicitudInscripcionService.encolar(self.alumnos[1].id, self.materia.id)
+
+        self.assertEqual(SolicitudInscripcionService.posicion_en_cola(primera), 1)
+        self.assertEqual(SolicitudInscripcionService.posicion_en_cola(segunda), 2)
+
+    def test_la_base_impide_dos_pedidos_en_curso(self):
+        primera = SolicitudInscripcionService.encolar(self.alumnos[0].id, self.materia.id)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            SolicitudInscripcion.objects.create(alumno=self.alumnos[0], materia=self.materia)
+
+        # Otro pedido que pasó el chequeo a la vez retorna el que ganó
+        first = QuerySet.first
+        llamadas = []
+
+        def perder_la_carrera(queryset):
+            llamadas.append(queryset)
+            return None if len(llamadas) == 1 else first(queryset)
+
+        with mock.patch.object(QuerySet, 'first', perder_la_carrera):
+            self.assertEqual(SolicitudInscripcionService.encolar(self.alumnos[0].id, self.materia.id), primera)
+
+        # Un pedido ya resuelto no impide volver a pedir
+        SolicitudInscripcion.objects.filter(pk=primera.pk).update(estado=SolicitudInscripcion.RECHAZADA)
+        self.assertNotEqual(SolicitudInscripcionService.encolar(self.alumnos[0].id, self.materia.id), primera)
+
+    def test_tomar_siguiente_reclama_en_orden_una_sola_vez(self):
+        primera = SolicitudInscripcionService.encolar(self.alumnos[0].id, self.materia.id)
+        segunda = SolicitudInscripcionService.encolar(self.alumnos[1].id, self.materia.id)
+
+        self.assertEqual(SolicitudInscripcionService.tomar_siguiente(), primera)
+        self.assertEqual(SolicitudInscripcionService.tomar_siguiente(), segunda)
+        self.assertIsNone(SolicitudInscripcionService.tomar_siguiente())
+        self.assertEqual(SolicitudInscripcion.objects.filter(estado=SolicitudInscripcion.PROCESANDO).count(), 2)
+
+        self.assertEqual(SolicitudInscripcionService.recuperar_en_proceso(), 2)
+        self.assertEqual(SolicitudInscripcionService.tomar_siguiente(), primera)
+
+    def test_workers_concurrentes_no_procesan_el_mismo_pedido(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('Requiere una base de test en archivo para usar varias conexiones')
+        for alumno in self.alumnos:
+            SolicitudInscripcionService.encolar(alumno.id, self.materia.id)
+        reclamadas = []
+        lock = threading.Lock()
+
+        def worker():
+            try:
+                while (solicitud := SolicitudInscripcionService.tomar_siguiente()) is not None:
+                    SolicitudInscripcionService.procesar(solicitud)
+                    with lock:
+                        reclamadas.append(solicitud.id)
+            finally:
+                connections.close_all()
+
+        hilos = [threading.Thread(target=worker) for _ in range(4)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        self.assertEqual(len(reclamadas), len(self.alumnos))
+        self.assertEqual(len(set(reclamadas)), len(self.alumnos))
+        self.assertEqual(SolicitudInscripcion.objects.filter(estado=SolicitudInscripcion.ACEPTADA).count(), 1)
+        self.materia.refresh_from_db()
+        self.assertEqual(self.materia.inscriptos_activos, 1)
+
+    def test_resultados_aceptada_y_rechazada(self):
+        primera = SolicitudInscripcionService.encolar(self.alumnos[0].id, self.materia.id)
+        segunda = SolicitudInscripcionService.encolar(self.alumnos[1].id, self.materia.id)
+
+        call_command('procesar_inscripciones', '--una-vez', stdout=StringIO())
+
+        primera.refresh_from_db()
+        segunda.refresh_from_db()
+        self.assertEqual(primera.estado, SolicitudInscripcion.ACEPTADA)
+        self.assertTrue(primera.inscripcion.activa)
+        self.assertEqual(segunda.estado, SolicitudInscripcion.RECHAZADA)
+        self.assertIsNone(segunda.inscripcion)
+        self.assertTrue(segunda.mensaje)
+        self.assertIsNotNone(segunda.fecha_proceso)
+        # El worker no anota al alumno en la lista de espera
+        self.assertFalse(ListaEspera.objects.exists())
+
+    def test_error_de_la_base_no_frena_la_cola(self):
+        primera = SolicitudInscripcionService.encolar(self.alumnos[0].id, self.materia.id)
+        segunda = SolicitudInscripcionService.encolar(self.alumnos[1].id, self.materia.id)
+        inscribir = InscripcionService.inscribir_alumno
+        llamadas = []
+
+        def bloqueo_en_la_primera(*args):
+            llamadas.append(args)
+            if len(llamadas) == 1:
+                raise OperationalError('database is locked')
+            return inscribir(*args)
+
+        with mock.patch.object(InscripcionService, 'inscribir_alumno', bloqueo_en_la_primera):
+            self.assertEqual(SolicitudInscripcionService.procesar_pendientes(), 2)
+
+        primera.refresh_from_db()
+        segunda.refresh_from_db()
+        self.assertEqual(primera.estado, SolicitudInscripcion.RECHAZADA)
+        self.assertIsNone(primera.inscripcion)
+        self.assertTrue(primera.mensaje)
+        self.assertEqual(segunda.estado, SolicitudInscripcion.ACEPTADA)
+
+    def test_pagina_de_estado(self):
+        usuario = self.alumnos[0].usuario
+        usuario.groups.add(Group.objects.create(name='Alumnos'))
+        self.client.force_login(usuario)
+        solicitud = SolicitudInscripcionService.encolar(self.alumnos[0].id, self.materia.id)
+        url = reverse('solicitud_inscripcion', args=[solicitud.pk])
+
+        response = self.client.get(url)
+        self.assertEqual(response.context['posicion'], 1)
+        self.assertContains(response, 'window.location.reload')
+
+        SolicitudInscripcionService.procesar_pendientes()
+        response = self.client.get(url)
+        self.assertContains(response, '¡Te inscribiste exitosamente a Programación I!')
+        self.assertNotContains(response, 'window.location.reload')
+
+        # Un alumno no ve los pedidos de otro
+        otra = SolicitudInscripcionService.encolar(self.alumnos[1].id, self.materia.id)
+        response = self.client.get(reverse('solicitud_inscripcion', args=[otra.pk]))
+        self.assertEqual(response.status_code, 404)
+
+
+class InscripcionLoteTest(TransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.carrera = crear_carrera()
+        self.otra_carrera = crear_carrera(nombre='Medicina', codigo='MED01', duracion_anios=6)
+        self.materias = [
+            crear_materia(self.carrera, nombre=f'Materia {i}', codigo=f'MAT10{i}', cupo_maximo=50)
+            for i in range(2)
+        ]
+        self.alumnos = crear_alumnos(self.carrera, 40)
+
+    def inscribir(self, alumnos, materias):
+        return InscripcionService.inscribir_lote([a.id for a in alumnos], [m.id for m in materias])
+
+    def test_consultas_no_dependen_del_tamanio_del_lote(self):
+        # El primer lote del día crea las filas de EstadisticaDiaria
+        self.inscribir(self.alumnos[:2], self.materias)
+
+        with CaptureQueriesContext(connection) as chico:
+            self.inscribir(self.alumnos[2:4], self.materias)
+        # BEGIN, 3 lecturas, bulk_create, UPDATE de contadores, bulk_create de
+        # movimientos, uno por materia en EstadisticaDiaria, COMMIT y el UPDATE
+        # de la versión de Inscripcion
+        self.assertEqual(len(chico), 11)
+        with self.assertNumQueries(len(chico)):
+            reporte = self.inscribir(self.alumnos[4:], self.materias)
+        self.assertEqual(reporte['resumen'], {InscripcionService.LOTE_INSCRIPTA: 72})
+
+    def test_estado_de_cada_par(self):
+        materia = self.materias[0]
+        materia.cupo_maximo = 3
+        materia.save()
+        ya_inscripto, dado_de_baja, nuevo, sin_cupo = self.alumnos[:4]
+        InscripcionService.inscribir_alumno(ya_inscripto.id, materia.id)
+        baja = InscripcionService.inscribir_alumno(dado_de_baja.id, materia.id)
+        InscripcionService.dar_de_baja_inscripcion(baja.id)
+        otra_carrera = self.alumnos[4]
+        otra_carrera.carrera = self.otra_carrera
+        otra_carrera.save()
+
+        reporte = self.inscribir([ya_inscripto, dado_de_baja, nuevo, sin_cupo, otra_carrera], [materia])
+
+        S = InscripcionService
+        self.assertEqual([r['estado'] for r in reporte['resultados']], [
+            S.LOTE_YA_INSCRIPTO, S.LOTE_REACTIVADA, S.LOTE_INSCRIPTA, S.LOTE_SIN_CUPO, S.LOTE_OTRA_CARRERA,
+        ])
+        self.assertTrue(Inscripcion.objects.get(pk=baja.pk).activa)
+        self.assertFalse(Inscripcion.objects.filter(alumno=sin_cupo).exists())
+
+    def test_contadores_estadisticas_y_oferta_al_dia(self):
+        materia = self.materias[0]
+        oferta = MateriaService.obtener_oferta_carrera(self.carrera.id)
+        self.assertEqual(next(m for m in oferta if m.id == materia.id).cupo_disponible, 50)
+
+        self.inscribir(self.alumnos[:10], [materia])
+
+        materia.refresh_from_db()
+        self.assertEqual(materia.inscriptos_activos, 10)
+        estadistica = EstadisticaDiaria.objects.get(materia=materia, fecha=timezone.localdate())
+        self.assertEqual((estadistica.altas, estadistica.activos), (10, 10))
+        oferta = MateriaService.obtener_oferta_carrera(self.carrera.id)
+        self.assertEqual(next(m for m in oferta if m.id == materia.id).cupo_disponible, 40)
+
+    def test_vista_y_comando(self):
+        self.client.force_login(crear_admin())
+
+        response = self.client.post(reverse('inscripcion_lote'), {
+            'carrera': self.carrera.id,
+            'materias': [self.materias[0].id],
+            'legajos': 'T-00000\nT-00001',
+        })
+        self.assertEqual(response.context['resumen'], {InscripcionService.LOTE_INSCRIPTA: 2})
+
+        salida = StringIO()
+        call_command(
+            'inscribir_lote', '--carrera', str(self.carrera.id), '--materia', str(self.materias[0].id), stdout=salida
+        )
+        self.assertIn(f'{InscripcionService.LOTE_INSCRIPTA}: 38', salida.getvalue())
+        self.assertIn(f'{InscripcionService.LOTE_YA_INSCRIPTO}: 2', salida.getvalue())
+
+
+class ListaEsperaTest(CarreraMateriaMixin, TransactionTestCase):
+    cupo_maximo = 1
+
+    def setUp(self):
+        super().setUp()
+        self.alumnos = crear_alumnos(self.carrera, 3)
+
+    def test_sin_cupo_encola_en_orden(self):
+        InscripcionService.inscribir_alumno(self.alumnos[0].id, self.materia.id)
+
+        with self.assertRaises(EnListaEspera) as primero:
+            InscripcionService.inscribir_alumno(self.alumnos[1].id, self.materia.id, lista_espera=True)
+        with self.assertRaises(EnListaEspera) as segundo:
+            InscripcionService.inscribir_alumno(self.alumnos[2].id, self.materia.id, lista_espera=True)
+
+        self.assertEqual(primero.exception.posicion, 1)
+        self.assertEqual(segundo.exception.posicion, 2)
+        self.assertEqual(ListaEspera.objects.filter(materia=self.materia).count(), 2)
+
+    def test_baja_promueve_al_primero(self):
+        inscripcion = InscripcionService.inscribir_alumno(self.alumnos[0].id, self.materia.id)
+        for alumno in self.alumnos[1:]:
+            with self.assertRaises(EnListaEspera):
+                InscripcionService.inscribir_alumno(alumno.id, self.materia.id, lista_espera=True)
+
+        InscripcionService.dar_de_baja_inscripcion(inscripcion.id)
+
+        self.assertTrue(Inscripcion.objects.filter(
+            alumno=self.alumnos[1], materia=self.materia, activa=True
+        ).exists())
+        restante = ListaEspera.objects.get(materia=self.materia)
+        self.assertEqual(restante.alumno_id, self.alumnos[2].id)
+        self.assertEqual(ListaEsperaService.posicion(restante), 1)
+        self.materia.refresh_from_db()
+        self.assertEqual(self.materia.inscriptos_activos, 1)
+
+    def test_sin_cupo_por_defecto_no_encola(self):
+        InscripcionService.inscribir_alumno(self.alumnos[0].id, self.materia.id)
+
+        with self.assertRaises(ValidationError) as error:
+            InscripcionService.inscribir_alumno(self.alumnos[1].id, self.materia.id)
+        self.assertNotIsInstance(error.exception, EnListaEspera)
+        self.assertFalse(ListaEspera.objects.exists())
+
+    def test_alumno_se_anota_en_la_lista_desde_la_oferta(self):
+        InscripcionService.inscribir_alumno(self.alumnos[0].id, self.materia.id)
+        usuario = self.alumnos[1].usuario
+        usuario.groups.add(Group.objects.create(name='Alumnos'))
+        self.client.force_login(usuario)
+
+        self.client.post(reverse('inscribirse', args=[self.materia.id]))
+
+        self.assertTrue(ListaEspera.objects.filter(alumno=self.alumnos[1], materia=self.materia).exists())
+
+    def test_promover_descarta_una_cantidad_acotada_de_entradas(self):
+        inscripcion = InscripcionService.inscribir_alumno(self.alumnos[0].id, self.materia.id)
+        # Entradas que ya no pueden inscribirse: alumnos que cambiaron de carrera
+        otra_carrera = crear_carrera(nombre='Medicina', codigo='MED01', duracion_anios=6)
+        for posicion, alumno in enumerate(self.alumnos[1:], start=1):
+            ListaEspera.objects.create(alumno=alumno, materia=self.materia, posicion=posicion)
+            alumno.carrera = otra_carrera
+            alumno.save()
+
+        with mock.patch.object(ListaEsperaService, 'MAX_DESCARTES', 1):
+            InscripcionService.dar_de_baja_inscripcion(inscripcion.id)
+
+        self.assertEqual(list(ListaEspera.objects.values_list('alumno_id', flat=True)), [self.alumnos[2].id])
+        self.assertIsNone(ListaEsperaService.promover(self.materia.id))
+        self.assertFalse(ListaEspera.objects.exists())
+
+    def test_baja_sin_lista_de_espera_libera_cupo(self):
+        inscripcion = InscripcionService.inscribir_alumno(self.alumnos[0].id, self.materia.id)
+
+        InscripcionService.dar_de_baja_inscripcion(inscripcion.id)
+
+        self.materia.refresh_from_db()
+        self.assertEqual(self.materia.inscriptos_activos, 0)
+
+
+class EstadisticaDiariaTest(CarreraMateriaMixin, TransactionTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.alumnos = crear_alumnos(self.carrera, 3)
+
+    def resumen(self):
+        return EstadisticaDiaria.objects.values('altas', 'bajas', 'activos').get(
+            fecha=timezone.localdate(), materia=self.materia
+        )
+
+    def test_altas_y_bajas_se_acumulan_y_reconstruyen(self):
+        inscripciones = [
+            InscripcionService.inscribir_alumno(alumno.id, self.materia.id)
+            for alumno in self.alumnos
+        ]
+        InscripcionService.dar_de_baja_inscripcion(inscripciones[0].id)
+
+        esperado = {'altas': 3, 'bajas': 1, 'activos': 2}
+        self.assertEqual(self.resumen(), esperado)
+
+        EstadisticaDiaria.objects.all().delete()
+        hoy = timezone.localdate()
+        self.assertEqual(EstadisticaDiaria.reconstruir(hoy, hoy), 1)
+        self.assertEqual(self.resumen(), esperado)
+
+    def test_reconstruir_coincide_con_el_registro_incremental(self):
+        # Reactivaciones, bajas repetidas y borrados en días distintos
+        dia = timezone.now() - timedelta(days=3)
+        uno, dos, tres = self.alumnos
+        with mock.patch('django.utils.timezone.now', return_value=dia):
+            for alumno in self.alumnos:
+                InscripcionService.inscribir_alumno(alumno.id, self.materia.id)
+        with mock.patch('django.utils.timezone.now', return_value=dia + timedelta(days=1)):
+            for alumno in (uno, dos):
+                Inscripcion.objects.get(alumno=alumno).dar_de_baja()
+        with mock.patch('django.utils.timezone.now', return_value=dia + timedelta(days=2)):
+            InscripcionService.inscribir_alumno(uno.id, self.materia.id)
+            InscripcionService.inscribir_lote([dos.id], [self.materia.id])
+            Inscripcion.objects.get(alumno=tres).delete()
+        with mock.patch('django.utils.timezone.now', return_value=dia + timedelta(days=3)):
+            Inscripcion.objects.get(alumno=uno).dar_de_baja()
+
+        def filas():
+            return list(EstadisticaDiaria.objects.order_by('fecha').values_list('fecha', 'altas', 'bajas', 'activos'))
+
+        desde, hasta = timezone.localdate(dia), timezone.localdate(dia + timedelta(days=3))
+        incremental = filas()
+        self.assertEqual([fila[1:] for fila in incremental], [(3, 0, 3), (0, 2, 1), (2, 1, 2), (0, 1, 1)])
+        self.assertEqual(incremental[-1][3], Materia.objects.get(pk=self.materia.pk).inscriptos_activos)
+
+        EstadisticaDiaria.objects.all().delete()
+        EstadisticaDiaria.reconstruir(desde, hasta)
+        self.assertEqual(filas(), incremental)
+
+        # Un rango parcial parte de los activos al comienzo del rango
+        EstadisticaDiaria.reconstruir(desde + timedelta(days=2), hasta)
+        self.assertEqual(filas(), incremental)
+
+    def test_eliminar_materias_en_lote_con_inscripciones(self):
+        # El borrado desde un queryset (acción del admin) no pasa por Materia.delete
+        InscripcionService.inscribir_alumno(self.alumnos[0].id, self.materia.id)
+
+        Materia.objects.filter(pk=self.materia.pk).delete()
+
+        self.assertFalse(EstadisticaDiaria.objects.exists())
+
+
+class OfertaJSONTest(CarreraMateriaMixin, TransactionTestCase):
+    cupo_maximo = 2
+
+    def setUp(self):
+        super().setUp()
+        self.alumno, = crear_alumnos(self.carrera, 1)
+        self.url = reverse('ajax_materias_json', args=[self.carrera.id])
+
+    def test_oferta_con_cupo_y_etag(self):
+        response = self.client.get(self.url)
+        materia, = response.json()['materias']
+        self.assertEqual((materia['id'], materia['cupo_disponible']), (self.materia.id, 2))
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_inscripcion_actualiza_el_cupo(self):
+        etag = self.client.get(self.url)['ETag']
+
+        InscripcionService.inscribir_alumno(self.alumno.id, self.materia.id)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['materias'][0]['cupo_disponible'], 1)
+
+    def test_carrera_inexistente(self):
+        response = self.client.get(reverse('ajax_materias_json', args=[self.carrera.id + 1]))
+        self.assertEqual(response.status_code, 404)
+
+
+class AutocompleteTest(CarreraMateriaMixin, TransactionTestCase):
+    cupo_maximo = 2
+
+    def setUp(self):
+        super().setUp()
+        self.alumnos = crear_alumnos(self.carrera, 25)
+        self.client.force_login(crear_admin())
+
+    def opciones(self, response):
+        selects = re.findall(r'<select.*?</select>', response.content.decode(), re.S)
+        return sum(select.count('<option') for select in selects)
+
+    def test_formulario_no_depende_de_la_cantidad_de_alumnos(self):
+        self.client.get(reverse('inscripcion_create'))  # permisos en cache
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(reverse('inscripcion_create'))
+        # Sólo la opción vacía en cada select
+        self.assertEqual(self.opciones(response), 2)
+
+        Alumno.objects.all().delete()
+        Usuario.objects.exclude(email='admin@test.edu.ar').delete()
+        with self.assertNumQueries(len(consultas)):
+            self.client.get(reverse('inscripcion_create'))
+
+    def test_alumnos_paginados(self):
+        datos = self.client.get(reverse('ajax_alumnos')).json()
+        self.assertEqual(len(datos['resultados']), 20)
+        self.assertTrue(datos['hay_mas'])
+        self.assertEqual(datos['resultados'][0]['carrera'], self.carrera.id)
+
+        datos = self.client.get(reverse('ajax_alumnos'), {'page': 2}).json()
+        self.assertEqual(len(datos['resultados']), 5)
+        self.assertFalse(datos['hay_mas'])
+
+    def test_pagina_fuera_de_rango_responde_vacio(self):
+        for pagina in (AutocompleteView.max_paginas + 1, 10 ** 30):
+            response = self.client.get(reverse('ajax_alumnos'), {'page': pagina})
+            self.assertEqual(response.json(), {'resultados': [], 'hay_mas': False})
+
+    def test_queryset_por_defecto_del_modelo(self):
+        vista = AutocompleteView(model=Materia)
+        self.assertEqual(list(vista.get_queryset()), [self.materia])
+        with self.assertRaises(ImproperlyConfigured):
+            AutocompleteView().get_queryset()
+
+    def test_materias_por_termino_y_carrera(self):
+        datos = self.client.get(reverse('ajax_materias'), {'q': 'program', 'carrera': self.carrera.id}).json()
+        self.assertEqual([m['id'] for m in datos['resultados']], [self.materia.id])
+        self.assertEqual(datos['resultados'][0]['cupo_disponible'], 2)
+
+    def test_inscripcion_renderiza_solo_las_opciones_elegidas(self):
+        response = self.client.post(reverse('inscripcion_create'), {
+            'alumno': self.alumnos[0].id, 'materia': self.materia.id + 1,
+        })
+        self.assertEqual(response.status_code, 200)
+        contenido = response.content.decode()
+        self.assertIn(f'data-carrera="{self.carrera.id}"', contenido)
+        self.assertEqual(self.opciones(response), 3)
@@ -8,7 +8,12 @@ from . import views
 urlpatterns = [
     # Gestión de Inscripciones
     path('', views.InscripcionListView.as_view(), name='inscripcion_list'),
+    path('exportar/', views.InscripcionExportView.as_view(), name='inscripcion_exportar'),
     path('crear/', views.InscripcionCreateView.as_view(), name='inscripcion_create'),
+    path('lote/', views.InscripcionLoteView.as_view(), name='inscripcion_lote'),
     path('<int:pk>/dar-baja/', views.InscripcionBajaView.as_view(), name='inscripcion_baja'),
+    path('ajax/alumnos/', views.AlumnoAutocompleteView.as_view(), name='ajax_alumnos'),
+    path('ajax/materias/', views.MateriaAutocompleteView.as_view(), name='ajax_materias'),
     path('ajax/load-materias/', views.load_materias, name='ajax_load_materias'),
+    path('ajax/carreras/<int:carrera_id>/materias.json', views.load_materias_json, name='ajax_materias_json'),
 ]
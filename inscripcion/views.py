@@ -5,26 +5,39 @@ from django.views.generic import (
     View, ListView, CreateView
 )
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.core.exceptions import ValidationError
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.db.models import Q
+from django.http import Http404, HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
 
+from alumno.models import Alumno
+from alumno.services import AlumnoService
+from gestion_academica.busqueda import BusquedaService
+from gestion_academica.exportar import ExportarCSVMixin
+from gestion_academica.paginacion import KeysetPaginacionMixin
+from gestion_academica.services import EstadisticasService, ReportesService
+from materia.models import Materia
+from materia.services import MateriaService
+from usuario.services import AutorizacionService
 from usuario.views import AdminRequiredMixin, AlumnoRequiredMixin
 
 from .models import Inscripcion
-from .forms import InscripcionForm
+from .forms import InscripcionForm, InscripcionLoteForm
 from .services import InscripcionService
 # Create your views here.
 
 # === GESTIÓN DE INSCRIPCIONES ===
 
-class InscripcionListView(AdminRequiredMixin, ListView):
+class InscripcionListView(AdminRequiredMixin, KeysetPaginacionMixin, ListView):
     """Lista todas las inscripciones"""
     model = Inscripcion
     template_name = 'gestion_academica/inscripciones/list.html'
     context_object_name = 'inscripciones'
     paginate_by = 10
+    orden_keyset = ('-fecha_inscripcion', '-pk')
     
     def get_queryset(self):
-        queryset = Inscripcion.objects.all().select_related('alumno__usuario', 'materia')
+        queryset = Inscripcion.objects.all().select_related('alumno__usuario', 'materia__carrera')
         
         # Filtro por estado
         estado = self.request.GET.get('estado')
@@ -37,31 +50,47 @@ class InscripcionListView(AdminRequiredMixin, ListView):
         # Filtro por búsqueda
         search = self.request.GET.get('search')
         if search:
-            from django.db.models import Q
+            # Cada rama filtra una columna de Inscripcion, así cada una usa su índice
+            usuarios = BusquedaService.coincidencias(search, 'usuario')
             queryset = queryset.filter(
-                Q(alumno__usuario__first_name__icontains=search) | 
-                Q(alumno__usuario__last_name__icontains=search) |
-                Q(alumno__legajo__icontains=search) |
-                Q(materia__nombre__icontains=search) |
-                Q(materia__codigo__icontains=search)
+                Q(alumno__in=Alumno.objects.filter(usuario__in=usuarios).values('pk'))
+                | Q(alumno__in=BusquedaService.coincidencias(search, 'alumno'))
+                | Q(materia__in=BusquedaService.coincidencias(search, 'materia'))
             )
             
-        return queryset.order_by('-fecha_inscripcion')
+        return queryset.order_by('-fecha_inscripcion', '-pk')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['search'] = self.request.GET.get('search', '')
         context['estado_seleccionado'] = self.request.GET.get('estado', '')
         # Stats
-        context['total_inscripciones'] = Inscripcion.objects.count()
-        context['inscripciones_activas'] = Inscripcion.objects.filter(activa=True).count()
-        context['inscripciones_inactivas'] = Inscripcion.objects.filter(activa=False).count()
-        # Inscripciones de hoy
-        from django.utils import timezone
-        context['inscripciones_hoy'] = Inscripcion.objects.filter(fecha_inscripcion__date=timezone.now().date()).count()
+        context.update(EstadisticasService.contar(Inscripcion, {
+            'total_inscripciones': None,
+            'inscripciones_activas': Q(activa=True),
+            'inscripciones_inactivas': Q(activa=False),
+        }))
+        # Inscripciones de hoy, desde el resumen diario
+        context['inscripciones_hoy'] = ReportesService.inscripciones_del_dia()
         return context
 
 
+class InscripcionExportView(ExportarCSVMixin, InscripcionListView):
+    """Exporta a CSV las inscripciones con los filtros del listado"""
+    nombre_archivo = 'inscripciones.csv'
+    columnas = (
+        ('Legajo', 'alumno__legajo'),
+        ('Apellido', 'alumno__usuario__last_name'),
+        ('Nombre', 'alumno__usuario__first_name'),
+        ('Código Materia', 'materia__codigo'),
+        ('Materia', 'materia__nombre'),
+        ('Carrera', 'materia__carrera__nombre'),
+        ('Fecha Inscripción', 'fecha_inscripcion'),
+        ('Fecha Baja', 'fecha_baja'),
+        ('Activa', 'activa'),
+    )
+
+
 class InscripcionCreateView(AdminRequiredMixin, CreateView):
     """Crea una nueva inscripción"""
     model = Inscripcion
@@ -79,6 +108,58 @@ class InscripcionCreateView(AdminRequiredMixin, CreateView):
             return self.form_invalid(form)
 
 
+class InscripcionLoteView(AdminRequiredMixin, View):
+    """Inscribe una cohorte completa en varias materias"""
+    template_name = 'gestion_academica/inscripciones/lote.html'
+    max_rechazos_mostrados = 200
+
+    def get(self, request):
+        carrera_id = request.GET.get('carrera')
+        form = InscripcionLoteForm(initial={'carrera': carrera_id}, carrera_id=carrera_id)
+        return render(request, self.template_name, {'form': form})
+
+    def post(self, request):
+        form = InscripcionLoteForm(request.POST, carrera_id=request.POST.get('carrera'))
+        context = {'form': form}
+
+        if form.is_valid():
+            alumno_ids = AlumnoService.obtener_ids_cohorte(
+                form.cleaned_data['carrera'].id,
+                anio_ingreso=form.cleaned_data['anio_ingreso'],
+                legajos=form.cleaned_data['legajos'],
+            )
+            if not alumno_ids:
+                messages.warning(request, 'No se encontraron alumnos activos para la cohorte indicada.')
+                return render(request, self.template_name, context)
+
+            materias = {m.id: m for m in form.cleaned_data['materias']}
+            try:
+                reporte = InscripcionService.inscribir_lote(alumno_ids, list(materias))
+            except ValidationError as e:
+                messages.error(request, str(e.message), extra_tags='danger')
+                return render(request, self.template_name, context)
+
+            exitosas = (InscripcionService.LOTE_INSCRIPTA, InscripcionService.LOTE_REACTIVADA)
+            rechazos = [r for r in reporte['resultados'] if r['estado'] not in exitosas]
+            rechazos = rechazos[:self.max_rechazos_mostrados]
+            legajos = dict(Alumno.objects.filter(
+                id__in={r['alumno_id'] for r in rechazos}
+            ).values_list('id', 'legajo'))
+            for rechazo in rechazos:
+                rechazo['legajo'] = legajos.get(rechazo['alumno_id'], '-')
+                rechazo['materia'] = materias[rechazo['materia_id']].nombre
+
+            total_exitosas = sum(reporte['resumen'].get(e, 0) for e in exitosas)
+            messages.success(request, f'Lote procesado: {total_exitosas} inscripciones registradas.')
+            context.update({
+                'resumen': reporte['resumen'],
+                'total_pares': len(reporte['resultados']),
+                'rechazos': rechazos,
+            })
+
+        return render(request, self.template_name, context)
+
+
 class InscripcionBajaView(LoginRequiredMixin, View):
     """Da de baja una inscripción"""
     def post(self, request, pk):
@@ -86,8 +167,8 @@ class InscripcionBajaView(LoginRequiredMixin, View):
             inscripcion = Inscripcion.objects.get(pk=pk)
             
             # Verificar permisos
-            es_admin = request.user.groups.filter(name='Administradores').exists()
-            es_alumno = request.user.groups.filter(name='Alumnos').exists()
+            es_admin = AutorizacionService.tiene_grupo(request.user, 'Administradores')
+            es_alumno = AutorizacionService.es_alumno(request.user)
             
             if not es_admin and not es_alumno:
                 messages.error(request, 'No tienes permisos para realizar esta acción.')
@@ -118,6 +199,75 @@ class InscripcionBajaView(LoginRequiredMixin, View):
             return redirect('inscripcion_list')
 
 
+class AutocompleteView(AdminRequiredMixin, View):
+    """
+    Base de los endpoints de autocompletado del formulario de inscripción.
+    Responde una página de resultados en JSON; la búsqueda usa los índices
+    de BusquedaService.
+    """
+    model = None
+    por_pagina = 20
+    # Más allá de este límite se responde vacío en lugar de un OFFSET sin tope
+    max_paginas = 50
+    rutas_busqueda = {}
+
+    def get_queryset(self):
+        if self.model is None:
+            raise ImproperlyConfigured(f'{self.__class__.__name__} debe definir model o get_queryset()')
+        return self.model._default_manager.order_by('pk')
+
+    def serializar(self, objeto):
+        return {'id': objeto.pk, 'texto': str(objeto)}
+
+    def get(self, request):
+        pagina = request.GET.get('page', '')
+        pagina = int(pagina) if pagina.isdigit() and int(pagina) > 0 else 1
+        if pagina > self.max_paginas:
+            return JsonResponse({'resultados': [], 'hay_mas': False})
+
+        queryset = self.get_queryset()
+        termino = request.GET.get('q', '').strip()
+        if termino:
+            queryset = queryset.filter(BusquedaService.filtro(termino, **self.rutas_busqueda))
+
+        inicio = (pagina - 1) * self.por_pagina
+        # Un resultado de más para saber si hay otra página sin un COUNT
+        objetos = list(queryset[inicio:inicio + self.por_pagina + 1])
+
+        return JsonResponse({
+            'resultados': [self.serializar(objeto) for objeto in objetos[:self.por_pagina]],
+            'hay_mas': len(objetos) > self.por_pagina,
+        })
+
+
+class AlumnoAutocompleteView(AutocompleteView):
+    """Alumnos activos por nombre, apellido, DNI, email o legajo"""
+    model = Alumno
+    rutas_busqueda = {'usuario': 'usuario', 'pk': 'alumno'}
+
+    def get_queryset(self):
+        return Alumno.objects.filter(activo=True).select_related('usuario').order_by('legajo')
+
+    def serializar(self, alumno):
+        return {**super().serializar(alumno), 'carrera': alumno.carrera_id}
+
+
+class MateriaAutocompleteView(AutocompleteView):
+    """Materias activas por nombre o código, opcionalmente de una carrera"""
+    model = Materia
+    rutas_busqueda = {'pk': 'materia'}
+
+    def get_queryset(self):
+        queryset = Materia.objects.filter(activa=True).select_related('carrera')
+        carrera_id = self.request.GET.get('carrera', '')
+        if carrera_id.isdigit():
+            queryset = queryset.filter(carrera_id=carrera_id)
+        return queryset.order_by('carrera_id', 'año', 'cuatrimestre', 'nombre')
+
+    def serializar(self, materia):
+        return {**super().serializar(materia), 'cupo_disponible': materia.cupo_disponible}
+
+
 def load_materias(request):
     """
     Vista AJAX para cargar materias filtradas por carrera del alumno.
@@ -127,12 +277,27 @@ def load_materias(request):
     
     if alumno_id:
         try:
-            from alumno.models import Alumno
-            from materia.models import Materia
-            
             alumno = Alumno.objects.get(pk=alumno_id)
             materias = Materia.objects.filter(carrera=alumno.carrera, activa=True).order_by('año', 'cuatrimestre', 'nombre')
         except (ValueError, Alumno.DoesNotExist):
             pass
     
     return render(request, 'gestion_academica/inscripciones/materias_options.html', {'materias': materias})
+
+
+def load_materias_json(request, carrera_id):
+    """
+    Vista AJAX con la oferta de una carrera en JSON, incluyendo el cupo
+    restante de cada materia. Responde 304 si el navegador ya la tiene.
+    """
+    try:
+        contenido, etag = MateriaService.obtener_oferta_json(carrera_id)
+    except ValidationError:
+        raise Http404('La carrera especificada no existe')
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(contenido, content_type='application/json')
+        response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
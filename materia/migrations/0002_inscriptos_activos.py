@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:29
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def calcular_inscriptos(apps, schema_editor):
+    Materia = apps.get_model('materia', 'Materia')
+    Inscripcion = apps.get_model('inscripcion', 'Inscripcion')
+    conteo = Inscripcion.objects.filter(
+        materia=OuterRef('pk'), activa=True
+    ).order_by().values('materia').annotate(total=Count('pk')).values('total')
+    Materia.objects.update(inscriptos_activos=Coalesce(Subquery(conteo), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materia', '0001_initial'),
+        ('inscripcion', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='materia',
+            name='inscriptos_activos',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Contador desnormalizado de inscripciones activas', verbose_name='Inscriptos Activos'),
+        ),
+        migrations.RunPython(calcular_inscriptos, migrations.RunPython.noop),
+    ]
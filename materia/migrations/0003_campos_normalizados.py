@@ -0,0 +1,36 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:04
+
+from django.db import migrations, models
+
+from gestion_academica.texto import normalizar
+
+
+def normalizar_campos(apps, schema_editor):
+    Materia = apps.get_model('materia', 'Materia')
+    campos = ('nombre', 'codigo')
+    objetos = list(Materia.objects.only(*campos))
+    for objeto in objetos:
+        for campo in campos:
+            setattr(objeto, f'{campo}_normalizado', normalizar(getattr(objeto, campo)))
+    Materia.objects.bulk_update(objetos, [f'{campo}_normalizado' for campo in campos], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materia', '0002_inscriptos_activos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='materia',
+            name='codigo_normalizado',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=15),
+        ),
+        migrations.AddField(
+            model_name='materia',
+            name='nombre_normalizado',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=200),
+        ),
+        migrations.RunPython(normalizar_campos, migrations.RunPython.noop),
+    ]
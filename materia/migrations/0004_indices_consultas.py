@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('carrera', '0002_campos_normalizados'),
+        ('materia', '0003_campos_normalizados'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='materia',
+            index=models.Index(condition=models.Q(('activa', True)), fields=['carrera', 'año', 'cuatrimestre', 'nombre'], name='materia_oferta_idx'),
+        ),
+    ]
@@ -1,10 +1,41 @@
+from django.apps import apps
 from django.db import models
 from django.core.validators import RegexValidator, MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
+from django.db.models.functions import Coalesce, NullIf
 
 from carrera.models import Carrera
+from gestion_academica.texto import CamposNormalizadosMixin
 # Create your models here.
-class Materia(models.Model):
+class MateriaQuerySet(models.QuerySet):
+    """
+    QuerySet de materias con anotaciones de ocupación calculadas en SQL
+    """
+
+    def with_ocupacion(self):
+        """
+        Anota inscriptos, disponible y porcentaje_ocupacion para que las
+        vistas muestren la ocupación sin consultas adicionales por fila.
+        """
+        return self.annotate(
+            inscriptos=models.F('inscriptos_activos'),
+            disponible=models.F('cupo_maximo') - models.F('inscriptos_activos'),
+            # Con cupo 0 la división da NULL y se muestra como 0, igual que
+            # la propiedad ocupacion
+            porcentaje_ocupacion=Coalesce(
+                models.ExpressionWrapper(
+                    models.F('inscriptos_activos') * 100 / NullIf(models.F('cupo_maximo'), 0),
+                    output_field=models.IntegerField()
+                ),
+                0,
+            ),
+        )
+
+    def con_cupo(self):
+        return self.filter(inscriptos_activos__lt=models.F('cupo_maximo'))
+
+
+class Materia(CamposNormalizadosMixin, models.Model):
     """
     Modelo para las materias académicas
     """
@@ -35,13 +66,40 @@ class Materia(models.Model):
     )
     descripcion = models.TextField(blank=True, verbose_name='Descripción')
     activa = models.BooleanField(default=True, verbose_name='Activa')
+    inscriptos_activos = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Inscriptos Activos',
+        help_text='Contador desnormalizado de inscripciones activas'
+    )
     fecha_creacion = models.DateTimeField(auto_now_add=True)
 
+    # Copias en minúsculas y sin acentos para la búsqueda
+    nombre_normalizado = models.CharField(max_length=200, default='', editable=False, db_index=True)
+    codigo_normalizado = models.CharField(max_length=15, default='', editable=False, db_index=True)
+    campos_normalizados = ('nombre', 'codigo')
+
+    objects = MateriaQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Materia'
         verbose_name_plural = 'Materias'
         unique_together = ['carrera', 'codigo']  # No duplicar códigos por carrera
         ordering = ['carrera', 'año', 'cuatrimestre', 'nombre']
+        indexes = [
+            # Oferta de una carrera, ya en el orden en que se muestra
+            models.Index(
+                fields=['carrera', 'año', 'cuatrimestre', 'nombre'],
+                condition=models.Q(activa=True),
+                name='materia_oferta_idx',
+            ),
+            # Materias con cupo de todas las carreras (reportes, catálogo público)
+            models.Index(
+                fields=['carrera', 'año', 'cuatrimestre', 'nombre'],
+                condition=models.Q(activa=True, inscriptos_activos__lt=models.F('cupo_maximo')),
+                name='materia_con_cupo_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.nombre} - {self.carrera.nombre} ({self.año}° año)"
@@ -70,19 +128,45 @@ class Materia(models.Model):
     @property
     def cupo_disponible(self):
         """Propiedad que calcula el cupo disponible"""
-        inscriptos = self.inscripciones.filter(activa=True).count()
-        return self.cupo_maximo - inscriptos
+        if 'disponible' in self.__dict__:
+            return self.disponible
+        return self.cupo_maximo - self.inscriptos_activos
     
     @property
     def inscriptos_actuales(self):
         """Propiedad que retorna la cantidad de inscriptos actuales"""
-        return self.inscripciones.filter(activa=True).count()
+        if 'inscriptos' in self.__dict__:
+            return self.inscriptos
+        return self.inscriptos_activos
+
+    @property
+    def ocupacion(self):
+        """Propiedad que retorna el porcentaje de ocupación (0-100)"""
+        if 'porcentaje_ocupacion' in self.__dict__:
+            return self.porcentaje_ocupacion
+        return self.inscriptos_activos * 100 // self.cupo_maximo if self.cupo_maximo else 0
 
     @property
     def tiene_cupo(self):
         """Propiedad que indica si hay cupo disponible"""
         return self.cupo_disponible > 0
 
+    def save(self, *args, **kwargs):
+        """
+        inscriptos_activos sólo se escribe al crear la materia: después lo
+        mantienen los UPDATE atómicos de ajustar_inscriptos y reservar_cupo,
+        y una instancia cargada antes de una inscripción lo pisaría con un
+        valor viejo.
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            diferidos = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                campo.name for campo in self._meta.concrete_fields
+                if not campo.primary_key and campo.name != 'inscriptos_activos'
+                and campo.attname not in diferidos
+            ]
+        super().save(*args, **kwargs)
+
     def delete(self, *args, **kwargs):
         """
         Validación: No permitir eliminar si tiene inscripciones activas
@@ -90,3 +174,49 @@ class Materia(models.Model):
         if self.inscripciones.filter(activa=True).exists():
             raise ValidationError('No se puede eliminar una materia que tiene inscripciones activas')
         super().delete(*args, **kwargs)
+
+    @classmethod
+    def ajustar_inscriptos(cls, materia_id, delta):
+        """
+        Ajusta el contador de inscriptos activos con un UPDATE atómico
+        """
+        if delta:
+            cls.objects.filter(pk=materia_id).update(
+                inscriptos_activos=models.F('inscriptos_activos') + delta
+            )
+
+    @classmethod
+    def reservar_cupo(cls, materia_id):
+        """
+        Reserva un lugar con un UPDATE condicional, sin ventana entre la
+        verificación del cupo y la escritura. Retorna False si no hay cupo.
+        """
+        actualizadas = cls.objects.filter(
+            pk=materia_id,
+            inscriptos_activos__lt=models.F('cupo_maximo')
+        ).update(inscriptos_activos=models.F('inscriptos_activos') + 1)
+        return actualizadas == 1
+
+    @classmethod
+    def recalcular_inscriptos(cls, queryset=None):
+        """
+        Recalcula el contador de inscriptos activos desde Inscripcion.
+        Retorna la cantidad de materias que estaban desincronizadas.
+        """
+        activas = cls._inscripciones_activas_subquery()
+        queryset = (queryset if queryset is not None else cls.objects.all()).order_by()
+        desincronizadas = queryset.annotate(
+            real=activas
+        ).exclude(inscriptos_activos=models.F('real'))
+        cantidad = desincronizadas.count()
+        if cantidad:
+            queryset.update(inscriptos_activos=activas)
+        return cantidad
+
+    @classmethod
+    def _inscripciones_activas_subquery(cls):
+        Inscripcion = apps.get_model('inscripcion', 'Inscripcion')
+        conteo = Inscripcion.objects.filter(
+            materia=models.OuterRef('pk'), activa=True
+        ).order_by().values('materia').annotate(total=models.Count('pk')).values('total')
+        return Coalesce(models.Subquery(conteo), 0)
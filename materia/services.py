@@ -1,4 +1,9 @@
+import hashlib
+import json
+
+from django.core.cache import cache
 from django.db import transaction, IntegrityError
+from django.db.models import F, Q, Sum, Count
 from django.core.exceptions import ValidationError
 from .models import  Carrera, Materia
 
@@ -7,6 +12,7 @@ class MateriaService:
     """
     Servicio para gestionar la lógica de negocio de materias
     """
+    TIMEOUT_OFERTA = 60 * 10
     
     @staticmethod
     def crear_materia(nombre, codigo, carrera_id, año, cuatrimestre, cupo_maximo, descripcion=""):
@@ -67,18 +73,110 @@ class MateriaService:
         """
         try:
             carrera = Carrera.objects.get(id=carrera_id)
-            return Materia.objects.filter(carrera=carrera, activa=True).order_by('año', 'cuatrimestre', 'nombre')
+            return Materia.objects.filter(carrera=carrera, activa=True).select_related(
+                'carrera'
+            ).with_ocupacion().order_by('año', 'cuatrimestre', 'nombre')
         except Carrera.DoesNotExist:
             raise ValidationError('La carrera especificada no existe')
     
     @staticmethod
-    def obtener_materias_con_cupo():
+    def _clave_oferta(carrera_id):
+        return f'oferta:carrera:{carrera_id}'
+
+    @staticmethod
+    def obtener_oferta_carrera(carrera_id):
+        """
+        Materias activas de la carrera con su ocupación, iguales para todos
+        sus alumnos. Se cachean por carrera y se invalidan con
+        invalidar_oferta() cuando cambia una materia o una inscripción.
+        """
+        clave = MateriaService._clave_oferta(carrera_id)
+        materias = cache.get(clave)
+        if materias is None:
+            materias = list(MateriaService.obtener_materias_por_carrera(carrera_id))
+            cache.set(clave, materias, MateriaService.TIMEOUT_OFERTA)
+        return materias
+
+    @staticmethod
+    def obtener_oferta_json(carrera_id):
+        """
+        Oferta de la carrera serializada para el formulario de inscripción,
+        con el cupo restante de cada materia. Retorna (contenido, etag); se
+        cachea por carrera junto con obtener_oferta_carrera().
+        """
+        clave = MateriaService._clave_oferta(carrera_id) + ':json'
+        oferta = cache.get(clave)
+        if oferta is None:
+            contenido = json.dumps({
+                'carrera': int(carrera_id),
+                'materias': [
+                    {
+                        'id': materia.id,
+                        'texto': str(materia),
+                        'codigo': materia.codigo,
+                        'año': materia.año,
+                        'cuatrimestre': materia.cuatrimestre,
+                        'cupo_maximo': materia.cupo_maximo,
+                        'cupo_disponible': materia.cupo_disponible,
+                    }
+                    for materia in MateriaService.obtener_oferta_carrera(carrera_id)
+                ],
+            }, ensure_ascii=False).encode()
+            oferta = (contenido, f'"{hashlib.md5(contenido).hexdigest()}"')
+            cache.set(clave, oferta, MateriaService.TIMEOUT_OFERTA)
+        return oferta
+
+    @staticmethod
+    def invalidar_oferta(*carrera_ids):
+        """Descarta la oferta cacheada de las carreras al confirmar la transacción"""
+        claves = [
+            clave
+            for carrera_id in carrera_ids if carrera_id
+            for clave in (MateriaService._clave_oferta(carrera_id), MateriaService._clave_oferta(carrera_id) + ':json')
+        ]
+        if claves:
+            transaction.on_commit(lambda: cache.delete_many(claves))
+
+    @staticmethod
+    def obtener_materias_con_cupo(carrera_id=None, anio=None, cuatrimestre=None):
+        """
+        Obtiene las materias activas con cupo disponible. La ocupación y los
+        filtros se resuelven en la consulta (ver MateriaQuerySet.with_ocupacion).
+        """
+        queryset = Materia.objects.filter(activa=True).con_cupo().select_related('carrera').with_ocupacion()
+        if carrera_id:
+            queryset = queryset.filter(carrera_id=carrera_id)
+        if anio:
+            queryset = queryset.filter(año=anio)
+        if cuatrimestre:
+            queryset = queryset.filter(cuatrimestre=cuatrimestre)
+        return queryset.order_by('carrera__nombre', 'año', 'cuatrimestre', 'nombre')
+
+    @staticmethod
+    def resumen_cupo(queryset):
         """
-        Obtiene todas las materias que tienen cupo disponible
+        Totales de un queryset de materias en una sola consulta agregada
         """
-        materias_con_cupo = []
-        for materia in Materia.objects.filter(activa=True):
-            if materia.tiene_cupo:
-                materias_con_cupo.append(materia)
-        return materias_con_cupo
+        resumen = queryset.order_by().aggregate(
+            total_materias=Count('id'),
+            total_cupos_disponibles=Sum(F('cupo_maximo') - F('inscriptos_activos')),
+            total_carreras=Count('carrera', distinct=True),
+        )
+        resumen['total_cupos_disponibles'] = resumen['total_cupos_disponibles'] or 0
+        return resumen
 
+    @staticmethod
+    def estadisticas_listado(queryset):
+        """
+        Contadores y totales de cupo del listado de materias, calculados
+        sobre el queryset ya filtrado en una sola consulta agregada
+        """
+        estadisticas = queryset.order_by().aggregate(
+            materias_activas=Count('id', filter=Q(activa=True)),
+            materias_inactivas=Count('id', filter=Q(activa=False)),
+            total_cupo=Sum('cupo_maximo'),
+            cupo_disponible=Sum(F('cupo_maximo') - F('inscriptos_activos')),
+        )
+        estadisticas['total_cupo'] = estadisticas['total_cupo'] or 0
+        estadisticas['cupo_disponible'] = estadisticas['cupo_disponible'] or 0
+        return estadisticas
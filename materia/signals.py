@@ -0,0 +1,29 @@
+"""
+Señales que invalidan la oferta académica cacheada por carrera
+"""
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from carrera.models import Carrera
+from .models import Materia
+from .services import MateriaService
+
+
+@receiver(post_init, sender=Materia)
+def guardar_carrera_original(sender, instance, **kwargs):
+    # Leer desde __dict__ para no disparar consultas sobre campos diferidos
+    instance._carrera_original = instance.__dict__.get('carrera_id')
+
+
+@receiver(post_save, sender=Materia)
+@receiver(post_delete, sender=Materia)
+def invalidar_oferta_materia(sender, instance, **kwargs):
+    # Si la materia cambió de carrera, ambas ofertas quedan desactualizadas
+    MateriaService.invalidar_oferta(instance._carrera_original, instance.carrera_id)
+    instance._carrera_original = instance.carrera_id
+
+
+@receiver(post_save, sender=Carrera)
+@receiver(post_delete, sender=Carrera)
+def invalidar_oferta_carrera(sender, instance, **kwargs):
+    MateriaService.invalidar_oferta(instance.pk)
@@ -1,3 +1,171 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
 from django.test import TestCase
+from django.urls import reverse
+
+from gestion_academica.pruebas import (
+    CarreraMateriaMixin, crear_alumno, crear_alumnos, crear_carrera, crear_materia,
+)
+from inscripcion.models import Inscripcion
+from inscripcion.services import InscripcionService
+
+from .models import Materia
+from .services import MateriaService
+
+
+class OfertaCarreraTest(CarreraMateriaMixin, TestCase):
+    cupo_maximo = 2
+
+    def setUp(self):
+        super().setUp()
+        self.otra = crear_carrera(nombre='Medicina', codigo='MED01', duracion_anios=6)
+        self.alumno = crear_alumno(self.carrera)
+
+    def test_oferta_cacheada_por_carrera(self):
+        MateriaService.obtener_oferta_carrera(self.carrera.id)
+
+        with self.assertNumQueries(0):
+            materia, = MateriaService.obtener_oferta_carrera(self.carrera.id)
+        self.assertEqual(materia.cupo_disponible, 2)
+
+    def test_inscripcion_invalida_la_oferta(self):
+        MateriaService.obtener_oferta_carrera(self.carrera.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            InscripcionService.inscribir_alumno(self.alumno.id, self.materia.id)
+
+        materia, = MateriaService.obtener_oferta_carrera(self.carrera.id)
+        self.assertEqual(materia.cupo_disponible, 1)
+
+    def test_cambio_de_carrera_invalida_ambas_ofertas(self):
+        MateriaService.obtener_oferta_carrera(self.carrera.id)
+        MateriaService.obtener_oferta_carrera(self.otra.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.materia.carrera = self.otra
+            self.materia.save()
+
+        self.assertEqual(MateriaService.obtener_oferta_carrera(self.carrera.id), [])
+        self.assertEqual(len(MateriaService.obtener_oferta_carrera(self.otra.id)), 1)
+
+
+class MateriasConCupoTest(CarreraMateriaMixin, TestCase):
+    cupo_maximo = 1
+
+    def setUp(self):
+        super().setUp()
+        self.otra_carrera = crear_carrera(nombre='Medicina', codigo='MED01', duracion_anios=6)
+        for codigo, carrera, año, cuatrimestre, campos in [
+            ('LLE101', self.carrera, 1, 1, {'cupo_maximo': 1, 'inscriptos_activos': 1}),
+            ('INA101', self.carrera, 1, 1, {'activa': False}),
+            ('ANA201', self.carrera, 2, 1, {}),
+            ('FIS202', self.carrera, 2, 2, {}),
+            ('ANA101', self.otra_carrera, 1, 1, {}),
+        ]:
+            crear_materia(carrera, nombre=codigo, codigo=codigo, año=año, cuatrimestre=cuatrimestre, **campos)
+
+    def codigos(self, **filtros):
+        return [materia.codigo for materia in MateriaService.obtener_materias_con_cupo(**filtros)]
+
+    def test_filtra_por_cupo_carrera_anio_y_cuatrimestre(self):
+        # Ordenadas por carrera, año, cuatrimestre y nombre; sin las llenas ni las inactivas
+        self.assertEqual(self.codigos(), ['PRO101', 'ANA201', 'FIS202', 'ANA101'])
+        self.assertEqual(self.codigos(carrera_id=self.otra_carrera.id), ['ANA101'])
+        self.assertEqual(self.codigos(carrera_id=self.carrera.id, anio=2), ['ANA201', 'FIS202'])
+        self.assertEqual(self.codigos(anio=2, cuatrimestre=2), ['FIS202'])
+        self.assertEqual(self.codigos(carrera_id=self.otra_carrera.id, anio=2), [])
+
+    def test_consultas_no_dependen_de_la_cantidad_de_materias(self):
+        url = reverse('materias_con_cupo')
+        # Versiones, conteo del paginador, resumen, página de materias con su
+        # carrera y carreras del filtro
+        with self.assertNumQueries(5):
+            response = self.client.get(url)
+        self.assertEqual(len(response.context['materias']), 4)
+
+        for i in range(5):
+            crear_materia(self.otra_carrera, nombre=f'Materia {i}', codigo=f'MAT10{i}')
+        cache.clear()
+        with self.assertNumQueries(5):
+            response = self.client.get(url)
+        self.assertEqual(len(response.context['materias']), 9)
+
+
+class EstadisticasListadoTest(CarreraMateriaMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        Materia.objects.filter(pk=self.materia.pk).update(inscriptos_activos=3)
+        crear_materia(self.carrera, nombre='Análisis I', codigo='ANA101', cupo_maximo=5, activa=False)
+        otra_carrera = crear_carrera(nombre='Medicina', codigo='MED01', duracion_anios=6)
+        crear_materia(otra_carrera, nombre='Anatomía', codigo='ANT101', cupo_maximo=4, inscriptos_activos=4)
+
+    def test_totales_del_listado_filtrado(self):
+        with self.assertNumQueries(1):
+            estadisticas = MateriaService.estadisticas_listado(Materia.objects.all())
+        self.assertEqual(estadisticas, {
+            'materias_activas': 2, 'materias_inactivas': 1, 'total_cupo': 19, 'cupo_disponible': 12,
+        })
+
+        self.assertEqual(MateriaService.estadisticas_listado(Materia.objects.filter(carrera=self.carrera)), {
+            'materias_activas': 1, 'materias_inactivas': 1, 'total_cupo': 15, 'cupo_disponible': 12,
+        })
+        self.assertEqual(MateriaService.estadisticas_listado(Materia.objects.none()), {
+            'materias_activas': 0, 'materias_inactivas': 0, 'total_cupo': 0, 'cupo_disponible': 0,
+        })
+
+
+class OcupacionAnotadaTest(CarreraMateriaMixin, TestCase):
+
+    def test_anotacion_coincide_con_la_propiedad(self):
+        Materia.objects.filter(pk=self.materia.pk).update(inscriptos_activos=3)
+        for codigo, cupo, inscriptos in [('ANA101', 3, 3), ('FIS101', 7, 2), ('SIN101', 0, 0)]:
+            Materia.objects.create(
+                nombre=codigo, codigo=codigo, carrera=self.carrera, año=1, cuatrimestre=1,
+                cupo_maximo=cupo, inscriptos_activos=inscriptos,
+            )
+
+        anotadas = {materia.codigo: materia.ocupacion for materia in Materia.objects.with_ocupacion()}
+        self.assertEqual(anotadas, {materia.codigo: materia.ocupacion for materia in Materia.objects.all()})
+        self.assertEqual(anotadas, {'PRO101': 30, 'ANA101': 100, 'FIS101': 28, 'SIN101': 0})
+
+
+class ContadorInscriptosTest(CarreraMateriaMixin, TestCase):
+    cupo_maximo = 2
+
+    def setUp(self):
+        super().setUp()
+        self.alumnos = crear_alumnos(self.carrera, 3)
+
+    def test_guardar_una_instancia_vieja_no_pisa_el_contador(self):
+        vieja = Materia.objects.get(pk=self.materia.pk)
+        for alumno in self.alumnos[:2]:
+            InscripcionService.inscribir_alumno(alumno.id, self.materia.id)
+
+        vieja.descripcion = 'Editada'
+        vieja.save()
+
+        self.materia.refresh_from_db()
+        self.assertEqual((self.materia.descripcion, self.materia.inscriptos_activos), ('Editada', 2))
+        with self.assertRaises(ValidationError):
+            InscripcionService.inscribir_alumno(self.alumnos[2].id, self.materia.id)
+
+    def test_comando_recalcular_inscriptos(self):
+        InscripcionService.inscribir_alumno(self.alumnos[0].id, self.materia.id)
+        # Escrituras que no pasan por las señales
+        Inscripcion.objects.bulk_create([Inscripcion(alumno=self.alumnos[1], materia=self.materia)])
+        Materia.objects.filter(pk=self.materia.pk).update(inscriptos_activos=0)
+
+        salida = StringIO()
+        call_command('recalcular_inscriptos', stdout=salida)
+
+        self.materia.refresh_from_db()
+        self.assertEqual(self.materia.inscriptos_activos, 2)
+        self.assertIn('Materias corregidas: 1', salida.getvalue())
 
-# Create your tests here.
+        salida = StringIO()
+        call_command('recalcular_inscriptos', '--materia', str(self.materia.id), stdout=salida)
+        self.assertNotIn('corregidas', salida.getvalue())
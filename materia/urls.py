@@ -7,6 +7,7 @@ from . import views
 
 urlpatterns = [
     path('', views.MateriaListView.as_view(), name='materia_list'),
+    path('exportar/', views.MateriaExportView.as_view(), name='materia_exportar'),
     path('crear/', views.MateriaCreateView.as_view(), name='materia_create'),
     path('<int:pk>/editar/', views.MateriaUpdateView.as_view(), name='materia_update'),
     path('<int:pk>/eliminar/', views.MateriaDeleteView.as_view(), name='materia_delete'),
@@ -6,7 +6,12 @@ from django.views.generic import (
     TemplateView, ListView, CreateView, UpdateView, DeleteView, DetailView
 )
 from django.core.exceptions import ValidationError
+from django.utils.http import urlencode
 
+from gestion_academica.busqueda import BusquedaService
+from gestion_academica.catalogo import CatalogoPublicoMixin
+from gestion_academica.exportar import ExportarCSVMixin
+from inscripcion.models import Inscripcion
 from usuario.views import AdminRequiredMixin
 
 from .models import Carrera, Materia
@@ -24,7 +29,7 @@ class MateriaListView(AdminRequiredMixin, ListView):
     paginate_by = 10
     
     def get_queryset(self):
-        queryset = Materia.objects.all().select_related('carrera')
+        queryset = Materia.objects.all().select_related('carrera').with_ocupacion()
         
         # Filtro por estado
         estado = self.request.GET.get('estado')
@@ -37,11 +42,7 @@ class MateriaListView(AdminRequiredMixin, ListView):
         # Filtro por búsqueda
         search = self.request.GET.get('search')
         if search:
-            from django.db.models import Q
-            queryset = queryset.filter(
-                Q(nombre__icontains=search) | 
-                Q(codigo__icontains=search)
-            )
+            queryset = queryset.filter(BusquedaService.filtro(search, pk='materia'))
         
         # Filtro por carrera
         carrera_id = self.request.GET.get('carrera')
@@ -56,16 +57,27 @@ class MateriaListView(AdminRequiredMixin, ListView):
         context['search'] = self.request.GET.get('search', '')
         context['estado_seleccionado'] = self.request.GET.get('estado', '')
         
-        # Calcular estadísticas
-        materias_queryset = self.get_queryset()
-        context['materias_activas'] = materias_queryset.filter(activa=True).count()
-        context['materias_inactivas'] = materias_queryset.filter(activa=False).count()
-        context['total_cupo'] = sum(m.cupo_maximo for m in materias_queryset)
-        context['cupo_disponible'] = sum(m.cupo_disponible for m in materias_queryset)
+        # Calcular estadísticas sobre el queryset ya filtrado
+        context.update(MateriaService.estadisticas_listado(self.object_list))
         
         return context
 
 
+class MateriaExportView(ExportarCSVMixin, MateriaListView):
+    """Exporta a CSV las materias con los filtros del listado"""
+    nombre_archivo = 'materias.csv'
+    columnas = (
+        ('Código', 'codigo'),
+        ('Materia', 'nombre'),
+        ('Carrera', 'carrera__nombre'),
+        ('Año', 'año'),
+        ('Cuatrimestre', 'cuatrimestre'),
+        ('Cupo Máximo', 'cupo_maximo'),
+        ('Inscriptos', 'inscriptos_activos'),
+        ('Activa', 'activa'),
+    )
+
+
 class MateriaCreateView(AdminRequiredMixin, CreateView):
     """Crea una nueva materia"""
     model = Materia
@@ -135,37 +147,44 @@ class MateriasPorCarreraView(LoginRequiredMixin, TemplateView):
         
         return context
     
-class MateriasConCupoView(TemplateView):
+class MateriasConCupoView(CatalogoPublicoMixin, ListView):
     """Vista para ver materias con cupo disponible (pública)"""
     template_name = 'gestion_academica/publico/materias_con_cupo.html'
-    
+    fragmento_template_name = 'gestion_academica/publico/materias_con_cupo_catalogo.html'
+    # El cupo disponible cambia con cada inscripción o baja
+    modelos_catalogo = (Carrera, Materia, Inscripcion)
+    parametros_catalogo = ('carrera', 'anio', 'cuatrimestre', 'page')
+    context_object_name = 'materias'
+    paginate_by = 20
+
+    def get_filtros(self):
+        filtros = {}
+        for parametro in ('carrera', 'anio', 'cuatrimestre'):
+            valor = self.request.GET.get(parametro, '')
+            filtros[parametro] = valor if valor.isdigit() else ''
+        return filtros
+
+    def get_queryset(self):
+        filtros = self.get_filtros()
+        return MateriaService.obtener_materias_con_cupo(
+            carrera_id=filtros['carrera'],
+            anio=filtros['anio'],
+            cuatrimestre=filtros['cuatrimestre'],
+        )
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        materias = MateriaService.obtener_materias_con_cupo()
-        
-        # Aplicar filtros
-        carrera_id = self.request.GET.get('carrera')
-        anio = self.request.GET.get('anio')
-        cuatrimestre = self.request.GET.get('cuatrimestre')
-        
-        if carrera_id:
-            materias = [m for m in materias if str(m.carrera.id) == carrera_id]
-        
-        if anio:
-            materias = [m for m in materias if str(m.año) == anio]
-        
-        if cuatrimestre:
-            materias = [m for m in materias if str(m.cuatrimestre) == cuatrimestre]
-        
-        context['materias'] = materias
+        filtros = self.get_filtros()
+
         context['carreras'] = Carrera.objects.filter(activa=True)
-        context['filtro_carrera'] = carrera_id or ''
-        context['filtro_anio'] = anio or ''
-        context['filtro_cuatrimestre'] = cuatrimestre or ''
-        
-        # Calcular total de cupos disponibles
-        context['total_cupos_disponibles'] = sum(m.cupo_disponible for m in materias)
-        
+        context['filtro_carrera'] = filtros['carrera']
+        context['filtro_anio'] = filtros['anio']
+        context['filtro_cuatrimestre'] = filtros['cuatrimestre']
+        context['filtros_query'] = urlencode({k: v for k, v in filtros.items() if v})
+
+        # Totales sobre todas las páginas en una sola consulta
+        context.update(MateriaService.resumen_cupo(self.object_list))
+
         return context
     
 class MateriasPorCarreraView(LoginRequiredMixin, TemplateView):
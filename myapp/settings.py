@@ -83,6 +83,29 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Tomar el lock de escritura al iniciar la transacción evita los
+            # "database is locked" en inscripciones concurrentes
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+        # Base en archivo para que los tests concurrentes usen varias conexiones
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
+    }
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# En producción con varios procesos conviene un backend compartido
+# (Redis/Memcached) para que las invalidaciones lleguen a todos
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'gestion-academica',
     }
 }
 
@@ -135,3 +158,23 @@ AUTH_USER_MODEL = 'usuario.Usuario'
 LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/login/'
+
+# Modo ráfaga de inscripciones: los pedidos se encolan y los procesa
+# el comando procesar_inscripciones en lugar de la request HTTP
+INSCRIPCION_MODO_RAFAGA = False
+
+# Reportes en segundo plano: hilos del pool (0 = se generan en la misma
+# request) y segundos que se conserva el resultado en cache
+REPORTES_TRABAJOS_WORKERS = 2
+REPORTES_TRABAJOS_TTL = 60 * 60
+
+# Segundos que se reutilizan los grupos y permisos resueltos de un usuario.
+# Con LocMemCache cada proceso tiene su propia cache y las señales sólo
+# invalidan la del proceso que atendió el cambio: los demás lo ven recién
+# cuando vence la entrada. Con un backend compartido se puede subir.
+AUTORIZACION_CACHE_TIMEOUT = 30
+
+# Segundos que cada proceso reutiliza las versiones de los modelos
+# (gestion_academica.models.VersionModelo) antes de volver a leerlas de la
+# base: es la demora máxima con la que ve las escrituras de otros procesos
+VERSIONES_CACHE_TIMEOUT = 5
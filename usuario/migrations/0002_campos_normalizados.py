@@ -0,0 +1,41 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:04
+
+from django.db import migrations, models
+
+from gestion_academica.texto import normalizar
+
+
+def normalizar_campos(apps, schema_editor):
+    Usuario = apps.get_model('usuario', 'Usuario')
+    campos = ('first_name', 'last_name', 'email')
+    objetos = list(Usuario.objects.only(*campos))
+    for objeto in objetos:
+        for campo in campos:
+            setattr(objeto, f'{campo}_normalizado', normalizar(getattr(objeto, campo)))
+    Usuario.objects.bulk_update(objetos, [f'{campo}_normalizado' for campo in campos], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuario', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usuario',
+            name='email_normalizado',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='usuario',
+            name='first_name_normalizado',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=150),
+        ),
+        migrations.AddField(
+            model_name='usuario',
+            name='last_name_normalizado',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=150),
+        ),
+        migrations.RunPython(normalizar_campos, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,12 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser, Group
 from django.core.validators import RegexValidator
+from django.utils.functional import cached_property
 
-class Usuario(AbstractUser):
+from gestion_academica.texto import CamposNormalizadosMixin
+
+
+class Usuario(CamposNormalizadosMixin, AbstractUser):
     email = models.EmailField(unique=True, verbose_name='Correo Electrónico')
     username = models.CharField(
         max_length=8, 
@@ -12,6 +16,12 @@ class Usuario(AbstractUser):
         db_column='dni'
     )
     primer_login = models.BooleanField(default=True, verbose_name='Primer Login')
+
+    # Copias en minúsculas y sin acentos para la búsqueda
+    first_name_normalizado = models.CharField(max_length=150, default='', editable=False, db_index=True)
+    last_name_normalizado = models.CharField(max_length=150, default='', editable=False, db_index=True)
+    email_normalizado = models.CharField(max_length=254, default='', editable=False, db_index=True)
+    campos_normalizados = ('first_name', 'last_name', 'email')
     
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']
@@ -19,24 +29,53 @@ class Usuario(AbstractUser):
     class Meta:
         verbose_name = 'Usuario'
         verbose_name_plural = 'Usuarios'
+        indexes = [
+            # Orden del listado paginado por keyset
+            models.Index(fields=['last_name', 'first_name', 'id'], name='usuario_apellido_nombre_idx'),
+            # El mismo orden filtrado por activos, sin recorrer los inactivos
+            models.Index(
+                fields=['last_name', 'first_name', 'id'], condition=models.Q(is_active=True),
+                name='usuario_activo_apellido_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.get_rol_display()})"
 
+    # Orden de prioridad de los grupos al resolver el rol
+    ROLES_POR_GRUPO = [
+        ('Administradores', 'administrador'),
+        ('Alumnos', 'alumno'),
+        ('Docentes', 'docente'),
+        ('Preceptores', 'preceptor'),
+    ]
+
+    @cached_property
+    def nombres_grupos(self):
+        """
+        Nombres de los grupos del usuario, resueltos una sola vez por instancia.
+        Usa el prefetch_related('groups') del queryset cuando está disponible
+        y si no, la cache de AutorizacionService.
+        """
+        if 'groups' in getattr(self, '_prefetched_objects_cache', {}):
+            return tuple(sorted(grupo.name for grupo in self.groups.all()))
+        from .services import AutorizacionService
+        return AutorizacionService.obtener(self)['grupos']
+
+    def invalidar_roles(self):
+        """Descarta los grupos memorizados tras modificar self.groups"""
+        self.__dict__.pop('nombres_grupos', None)
+        self.__dict__.pop('_autorizacion', None)
+        getattr(self, '_prefetched_objects_cache', {}).pop('groups', None)
+
     @property
     def rol(self):
         if self.is_superuser:
             return 'administrador'
-        if self.groups.filter(name='Administradores').exists():
-            return 'administrador'
-        elif self.groups.filter(name='Alumnos').exists():
-            return 'alumno'
-        elif self.groups.filter(name='Docentes').exists():
-            return 'docente'
-        elif self.groups.filter(name='Preceptores').exists():
-            return 'preceptor'
-        else:
-            return 'sin_rol'
+        for grupo, rol in self.ROLES_POR_GRUPO:
+            if grupo in self.nombres_grupos:
+                return rol
+        return 'sin_rol'
 
     def get_rol_display(self):
         roles = {
@@ -78,6 +117,7 @@ class Usuario(AbstractUser):
             try:
                 grupo = Group.objects.get(name=grupo_name)
                 usuario.groups.add(grupo)
+                usuario.invalidar_roles()
             except Group.DoesNotExist:
                 pass  # El grupo se creará con el comando crear_grupos
             
@@ -1,5 +1,9 @@
+from django.conf import settings
 from django.db import transaction, IntegrityError
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
+from django.contrib.auth.models import Permission
+from django.db.models import Q
 from .models import Usuario
 
 class UsuarioService:
@@ -64,3 +68,78 @@ class UsuarioService:
             return None
         except Usuario.DoesNotExist:
             return None
+
+
+class AutorizacionService:
+    """
+    Resuelve los grupos y permisos de un usuario una sola vez y los guarda
+    en cache. Las señales de usuario.signals invalidan la entrada cuando
+    cambian los grupos o permisos.
+
+    La invalidación sólo alcanza a la cache del proceso que atendió el
+    cambio si el backend no es compartido (LocMemCache), por eso las
+    entradas viven AUTORIZACION_CACHE_TIMEOUT segundos.
+    """
+    CLAVE_VERSION = 'autorizacion:version'
+
+    @staticmethod
+    def _clave(usuario_id):
+        version = cache.get_or_set(AutorizacionService.CLAVE_VERSION, 1, None)
+        return f'autorizacion:{version}:{usuario_id}'
+
+    @staticmethod
+    def obtener(usuario):
+        """
+        Retorna {'grupos': tuple, 'permisos': frozenset} del usuario.
+        Se memoriza en la instancia para el resto de la request.
+        """
+        if not getattr(usuario, 'is_authenticated', False) or not usuario.pk:
+            return {'grupos': (), 'permisos': frozenset()}
+        datos = usuario.__dict__.get('_autorizacion')
+        if datos is not None:
+            return datos
+
+        clave = AutorizacionService._clave(usuario.pk)
+        datos = cache.get(clave)
+        if datos is None:
+            grupos = tuple(usuario.groups.order_by('name').values_list('name', flat=True))
+            permisos = frozenset(
+                f'{app_label}.{codename}' for app_label, codename in Permission.objects.filter(
+                    Q(group__user=usuario) | Q(user=usuario)
+                ).values_list('content_type__app_label', 'codename').distinct()
+            )
+            datos = {'grupos': grupos, 'permisos': permisos}
+            cache.set(clave, datos, settings.AUTORIZACION_CACHE_TIMEOUT)
+
+        usuario.__dict__['_autorizacion'] = datos
+        return datos
+
+    @staticmethod
+    def tiene_grupo(usuario, nombre_grupo):
+        return nombre_grupo in AutorizacionService.obtener(usuario)['grupos']
+
+    @staticmethod
+    def tiene_permiso(usuario, permiso):
+        if getattr(usuario, 'is_superuser', False) and usuario.is_active:
+            return True
+        return permiso in AutorizacionService.obtener(usuario)['permisos']
+
+    @staticmethod
+    def es_admin(usuario):
+        return getattr(usuario, 'is_superuser', False) or AutorizacionService.tiene_grupo(usuario, 'Administradores')
+
+    @staticmethod
+    def es_alumno(usuario):
+        return AutorizacionService.tiene_grupo(usuario, 'Alumnos')
+
+    @staticmethod
+    def invalidar_usuarios(usuario_ids):
+        cache.delete_many([AutorizacionService._clave(usuario_id) for usuario_id in usuario_ids])
+
+    @staticmethod
+    def invalidar_todos():
+        """Invalida todas las entradas incrementando la versión de la cache"""
+        try:
+            cache.incr(AutorizacionService.CLAVE_VERSION)
+        except ValueError:
+            cache.set(AutorizacionService.CLAVE_VERSION, 2, None)
@@ -0,0 +1,40 @@
+"""
+Señales que invalidan la cache de AutorizacionService
+"""
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Usuario
+from .services import AutorizacionService
+
+ACCIONES = ('post_add', 'post_remove', 'post_clear')
+
+
+@receiver(m2m_changed, sender=Usuario.groups.through)
+@receiver(m2m_changed, sender=Usuario.user_permissions.through)
+def invalidar_por_usuario(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ACCIONES:
+        return
+    if not reverse:
+        # usuario.groups.add(...) / usuario.user_permissions.add(...)
+        AutorizacionService.invalidar_usuarios([instance.pk])
+        if isinstance(instance, Usuario):
+            instance.invalidar_roles()
+    elif pk_set:
+        # grupo.user_set.add(...) / permiso.user_set.add(...)
+        AutorizacionService.invalidar_usuarios(pk_set)
+    else:
+        AutorizacionService.invalidar_todos()
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidar_por_grupo(sender, action, **kwargs):
+    if action in ACCIONES:
+        AutorizacionService.invalidar_todos()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidar_por_grupo_guardado(sender, **kwargs):
+    AutorizacionService.invalidar_todos()
@@ -1,3 +1,118 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from gestion_academica.pruebas import crear_admin
+
+from .models import Usuario
+from .services import AutorizacionService
+
+
+class AutorizacionServiceTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.admins = Group.objects.create(name='Administradores')
+        self.usuario = Usuario.objects.create(
+            username='30111222', email='admin@test.edu.ar', password='!'
+        )
+
+    def recargar(self):
+        return Usuario.objects.get(pk=self.usuario.pk)
+
+    def test_consultas_cacheadas_entre_requests(self):
+        self.assertFalse(AutorizacionService.es_admin(self.recargar()))
+
+        usuario = self.recargar()
+        with self.assertNumQueries(0):
+            self.assertFalse(AutorizacionService.es_admin(usuario))
+            self.assertEqual(usuario.nombres_grupos, ())
+
+    def test_agregar_grupo_invalida(self):
+        self.assertFalse(AutorizacionService.es_admin(self.recargar()))
+
+        self.usuario.groups.add(self.admins)
+        self.assertTrue(AutorizacionService.es_admin(self.recargar()))
+
+        self.admins.user_set.remove(self.usuario)
+        self.assertFalse(AutorizacionService.es_admin(self.recargar()))
+
+    def test_permisos_de_grupo_invalidan(self):
+        self.usuario.groups.add(self.admins)
+        self.assertFalse(AutorizacionService.tiene_permiso(self.recargar(), 'usuario.view_usuario'))
+
+        self.admins.permissions.add(Permission.objects.get(codename='view_usuario'))
+        self.assertTrue(AutorizacionService.tiene_permiso(self.recargar(), 'usuario.view_usuario'))
+
+    def test_renombrar_grupo_invalida(self):
+        self.usuario.groups.add(self.admins)
+        self.assertTrue(AutorizacionService.es_admin(self.recargar()))
+
+        self.admins.name = 'Ex Administradores'
+        self.admins.save()
+        self.assertFalse(AutorizacionService.es_admin(self.recargar()))
+
+    @override_settings(AUTORIZACION_CACHE_TIMEOUT=5)
+    def test_las_entradas_vencen(self):
+        with mock.patch.object(cache, 'set', wraps=cache.set) as guardar:
+            AutorizacionService.es_admin(self.recargar())
+        self.assertEqual(guardar.call_args.args[2], 5)
+
+
+
+class RolesListadoTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(crear_admin(last_name='Admin'))
+        self.grupos = [Group.objects.create(name=nombre) for nombre in ('Alumnos', 'Docentes')]
+
+    def crear_usuarios(self, desde, cantidad):
+        for i in range(desde, desde + cantidad):
+            usuario = Usuario.objects.create(
+                username=f'{31000000 + i}', email=f'usuario{i}@test.edu.ar', last_name=f'Usuario {i}', password='!'
+            )
+            usuario.groups.add(self.grupos[i % 2])
+
+    def listar(self):
+        cache.clear()
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(reverse('usuario_list'))
+        return response, len(consultas)
+
+    def test_roles_en_consultas_constantes(self):
+        self.crear_usuarios(0, 2)
+        response, pocos = self.listar()
+        self.assertEqual(len(response.context['usuarios']), 3)
+
+        self.crear_usuarios(2, 6)
+        with mock.patch.object(AutorizacionService, 'obtener', wraps=AutorizacionService.obtener) as obtener:
+            response, muchos = self.listar()
+        self.assertEqual(muchos, pocos)
+        self.assertEqual(len(response.context['usuarios']), 9)
+        # Sólo el usuario logueado pasa por AutorizacionService
+        self.assertLessEqual(
+            {llamada.args[0].pk for llamada in obtener.call_args_list}, {response.wsgi_request.user.pk}
+        )
+        self.assertEqual(
+            [usuario.get_rol_display() for usuario in response.context['usuarios']],
+            ['Administrador'] + ['Alumno', 'Docente'] * 4,
+        )
+
+    def test_sin_grupos_precargados_usa_autorizacion_service(self):
+        self.crear_usuarios(0, 1)
+        usuario = Usuario.objects.get(username='31000000')
+
+        with mock.patch.object(AutorizacionService, 'obtener', wraps=AutorizacionService.obtener) as obtener:
+            self.assertEqual(usuario.rol, 'alumno')
+        obtener.assert_called_once_with(usuario)
+
+        # Otra instancia del mismo usuario reutiliza la cache
+        otra = Usuario.objects.get(pk=usuario.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(otra.rol, 'alumno')
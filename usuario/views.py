@@ -9,14 +9,18 @@ from django.views.generic import (
 from django.core.exceptions import ValidationError
 from django.contrib.auth import login, logout
 
+from gestion_academica.busqueda import BusquedaService
+from gestion_academica.paginacion import KeysetPaginacionMixin
+from gestion_academica.services import EstadisticasService
+
 from .models import Usuario
+from .services import AutorizacionService
 from .forms import CambiarPasswordForm, LoginForm, UsuarioForm
 
 class AdminRequiredMixin(UserPassesTestMixin):
     """Mixin que requiere grupo de administrador"""
     def test_func(self):
-        return (self.request.user.is_authenticated and 
-                self.request.user.groups.filter(name='Administradores').exists())
+        return AutorizacionService.tiene_grupo(self.request.user, 'Administradores')
     
     def handle_no_permission(self):
         messages.error(self.request, 'No tienes permisos para acceder a esta página.')
@@ -26,8 +30,7 @@ class AdminRequiredMixin(UserPassesTestMixin):
 class AlumnoRequiredMixin(UserPassesTestMixin):
     """Mixin que requiere grupo de alumno"""
     def test_func(self):
-        return (self.request.user.is_authenticated and 
-                self.request.user.groups.filter(name='Alumnos').exists())
+        return AutorizacionService.es_alumno(self.request.user)
     
     def handle_no_permission(self):
         messages.error(self.request, 'No tienes permisos para acceder a esta página.')
@@ -91,15 +94,17 @@ class CambiarPasswordView(LoginRequiredMixin, View):
         return render(request, self.template_name, {'form': form})
 
 
-class UsuarioListView(AdminRequiredMixin, ListView):
+class UsuarioListView(AdminRequiredMixin, KeysetPaginacionMixin, ListView):
     """Lista todos los usuarios"""
     model = Usuario
     template_name = 'gestion_academica/usuarios/list.html'
     context_object_name = 'usuarios'
     paginate_by = 10
+    orden_keyset = ('last_name', 'first_name', 'pk')
     
     def get_queryset(self):
-        queryset = Usuario.objects.all()
+        # Los grupos precargados resuelven el rol de cada fila sin consultas extra
+        queryset = Usuario.objects.all().prefetch_related('groups')
         
         # Filtro por estado
         estado = self.request.GET.get('estado')
@@ -112,26 +117,23 @@ class UsuarioListView(AdminRequiredMixin, ListView):
         # Filtro por búsqueda
         search = self.request.GET.get('search')
         if search:
-            from django.db.models import Q
-            queryset = queryset.filter(
-                Q(first_name__icontains=search) | 
-                Q(last_name__icontains=search) |
-                Q(username__icontains=search) |
-                Q(email__icontains=search)
-            )
+            queryset = queryset.filter(BusquedaService.filtro(search, pk='usuario'))
             
-        return queryset.order_by('last_name', 'first_name')
+        return queryset.order_by('last_name', 'first_name', 'pk')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['search'] = self.request.GET.get('search', '')
         context['estado_seleccionado'] = self.request.GET.get('estado', '')
         # Stats
-        context['total_usuarios'] = Usuario.objects.count()
-        context['usuarios_activos'] = Usuario.objects.filter(is_active=True).count()
-        context['usuarios_inactivos'] = Usuario.objects.filter(is_active=False).count()
-        context['administradores'] = Usuario.objects.filter(groups__name='Administradores').count()
-        context['alumnos'] = Usuario.objects.filter(groups__name='Alumnos').count()
+        from django.db.models import Q
+        context.update(EstadisticasService.contar(Usuario, {
+            'total_usuarios': None,
+            'usuarios_activos': Q(is_active=True),
+            'usuarios_inactivos': Q(is_active=False),
+            'administradores': Q(groups__name='Administradores'),
+            'alumnos': Q(groups__name='Alumnos'),
+        }))
         return context
 
 